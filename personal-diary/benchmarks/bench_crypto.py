@@ -0,0 +1,50 @@
+"""Benchmark bulk AES-GCM sealing and unsealing by number of processes.
+
+Usage: python benchmarks/bench_crypto.py [--size 100000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cryptography.fernet import Fernet
+
+from bulk_crypto import seal_many, unseal_many
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000, help="number of entries")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    key = Fernet.generate_key()
+    # A head and a ~1 KB content per entry, as re-key and a first save see them
+    items = [item for i in range(args.size) for item in (
+        (f'{{"title": "Entry {i}", "category": "General", "tags": [], "mood": "neutral"}}'.encode(),
+         f"{i}\0head".encode()),
+        ((f"Dear diary, day {i}. " * 50).encode(), f"{i}\0content".encode()))]
+    sealed = [(blob, aad) for blob, (_, aad) in zip(seal_many(key, items), items)]
+
+    print(f"\n{args.size:,} entries, {os.cpu_count()} cores (seconds)")
+    print(f"{'workers':<10}{'seal':>10}{'unseal':>10}{'speedup':>10}")
+    baseline = None
+    for workers in args.workers:
+        seal = timed(lambda: seal_many(key, items, workers))
+        unseal = timed(lambda: unseal_many(key, sealed, workers))
+        baseline = baseline or seal + unseal
+        print(f"{workers:<10}{seal:>10.2f}{unseal:>10.2f}{baseline / (seal + unseal):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
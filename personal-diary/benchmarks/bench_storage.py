@@ -0,0 +1,88 @@
+"""Benchmark diary file size, load and save: the v1 JSON file against the container.
+
+Usage: python benchmarks/bench_storage.py [--size 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cryptography.fernet import Fernet
+
+from cli_diary import DiaryEntry, PersonalDiary
+
+PASSWORD = "benchmark"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def write_v1(path, key, size):
+    """The same entries in the v1 layout: a Fernet token per title and
+    content, everything else in the clear"""
+    fernet = Fernet(key)
+    data = {}
+    for i in range(size):
+        data[f"2024-01-01 00:00:{i:06d}"] = {
+            "title": fernet.encrypt(f"Entry {i}".encode()).decode(),
+            "content": fernet.encrypt((f"Dear diary, day {i}. " * 50).encode()).decode(),
+            "category": "General",
+            "tags": ["daily"],
+            "mood": "neutral"
+        }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=20000, help="number of entries")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory, \
+            mock.patch("builtins.input", return_value=PASSWORD):
+        os.chdir(directory)
+        diary = PersonalDiary()
+        diary.autosave = False
+        for i in range(args.size):
+            timestamp = f"2024-01-01 00:00:{i:06d}"
+            diary.entries[timestamp] = DiaryEntry(diary, timestamp, {
+                "title": f"Entry {i}",
+                "content": f"Dear diary, day {i}. " * 50,
+                "category": "General",
+                "tags": ["daily"],
+                "mood": "neutral"
+            })
+            diary.dirty.add(timestamp)
+        diary.save_entries()
+        v1_file = "v1_entries.json"
+        write_v1(v1_file, diary.key, args.size)
+
+        v2_file = diary.diary_file
+        v2_load = timed(diary.load_entries)
+        timestamp = next(iter(diary.entries))
+        diary.update_entry(timestamp, title="Changed")
+        v2_save = timed(diary.save_entries)
+        # Point the diary at the v1 file alone, as before a migration
+        diary.diary_file, diary.legacy_file = "missing.dat", v1_file
+        v1_load = timed(diary.load_entries)
+
+        print(f"\n{args.size:,} entries of ~1 KB")
+        print(f"{'format':<10}{'size (MB)':>12}{'load (s)':>12}{'save one (s)':>15}")
+        print(f"{'v1 json':<10}{os.path.getsize(v1_file) / 1e6:>12.1f}{v1_load:>12.2f}{'-':>15}")
+        print(f"{'dat':<10}{os.path.getsize(v2_file) / 1e6:>12.1f}{v2_load:>12.2f}{v2_save:>15.2f}")
+        os.chdir(Path(__file__).parent)
+
+
+if __name__ == "__main__":
+    main()
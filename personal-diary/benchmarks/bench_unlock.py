@@ -0,0 +1,53 @@
+"""Benchmark diary unlock time for different KDF settings and the key cache.
+
+Usage: python benchmarks/bench_unlock.py [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from diary_kdf import SessionKeyCache, derive_key, new_params
+
+SETTINGS = [
+    ("pbkdf2-sha256, 100k iterations", new_params(iterations=100000)),
+    ("pbkdf2-sha256, 300k iterations", new_params(iterations=300000)),
+    ("pbkdf2-sha256, 600k iterations", new_params(iterations=600000)),
+    ("scrypt, n=2^14", new_params("scrypt", n=2 ** 14)),
+    ("scrypt, n=2^15", new_params("scrypt", n=2 ** 15)),
+]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    password = b"correct horse battery staple"
+    print(f"\n{'setting':<36}{'unlock (ms)':>14}")
+    for name, params in SETTINGS:
+        print(f"{name:<36}{timed(lambda: derive_key(password, params), args.repeat):>14.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["XDG_RUNTIME_DIR"] = tmp
+        cache = SessionKeyCache(ttl=60)
+        params = SETTINGS[0][1]
+        cache.put("diary_entries.json", params, derive_key(password, params))
+        cached = timed(lambda: cache.get("diary_entries.json", params), 100)
+        print(f"{'session key cache hit':<36}{cached:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Strings per task handed to a worker process
+CHUNK_SIZE = 2000
+NONCE_SIZE = 12
+
+_cipher = None
+
+
+def aes_gcm(key):
+    """AES-256-GCM cipher for a (Fernet-style, urlsafe base64) diary key"""
+    return AESGCM(base64.urlsafe_b64decode(key))
+
+
+def seal(aead, data, aad):
+    """Random nonce + AES-GCM ciphertext of ``data``, bound to ``aad``"""
+    nonce = os.urandom(NONCE_SIZE)
+    return nonce + aead.encrypt(nonce, data, aad)
+
+
+def unseal(aead, blob, aad):
+    """Plain bytes of a sealed blob; raises InvalidTag for a wrong key"""
+    return aead.decrypt(blob[:NONCE_SIZE], blob[NONCE_SIZE:], aad)
+
+
+def _init_worker(make_cipher, key):
+    global _cipher
+    _cipher = make_cipher(key)
+
+
+def _decrypt_chunk(tokens, fernet=None):
+    fernet = fernet or _cipher
+    plain = []
+    for token in tokens:
+        try:
+            plain.append(fernet.decrypt(token.encode()).decode())
+        except Exception:
+            plain.append(token)  # Return as is if not encrypted
+    return plain
+
+
+def _seal_chunk(items, aead=None):
+    aead = aead or _cipher
+    return [seal(aead, data, aad) for data, aad in items]
+
+
+def _unseal_chunk(items, aead=None):
+    aead = aead or _cipher
+    return [unseal(aead, blob, aad) for blob, aad in items]
+
+
+def _run(chunk_fn, make_cipher, key, values, workers, chunk_size):
+    """Apply ``chunk_fn`` to ``values`` in chunks, in order.
+
+    By default everything runs in this process: AES-GCM is fast enough
+    that pickling the blobs to a pool costs more than it saves (see
+    benchmarks/bench_crypto.py), and the GUI saves from a thread, where
+    forking is unsafe. Asking for ``workers`` > 1 spreads batches of more
+    than one chunk across a process pool, each worker building its cipher
+    once.
+    """
+    values = list(values)
+    if workers is None or workers <= 1 or len(values) <= chunk_size:
+        return chunk_fn(values, make_cipher(key))
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    workers = min(workers, len(chunks))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(make_cipher, key)) as pool:
+        results = []
+        for chunk in pool.map(chunk_fn, chunks):
+            results.extend(chunk)
+    return results
+
+
+def decrypt_many(key, tokens, workers=None, chunk_size=CHUNK_SIZE):
+    """Plain text of Fernet ``tokens``; values that are not tokens come back
+    unchanged (entries written before encryption was added)"""
+    return _run(_decrypt_chunk, Fernet, key, tokens, workers, chunk_size)
+
+
+def seal_many(key, items, workers=None, chunk_size=CHUNK_SIZE):
+    """AES-GCM sealed blobs of (data, aad) items"""
+    return _run(_seal_chunk, aes_gcm, key, items, workers, chunk_size)
+
+
+def unseal_many(key, items, workers=None, chunk_size=CHUNK_SIZE):
+    """Plain bytes of (blob, aad) items; raises InvalidTag for a wrong key"""
+    return _run(_unseal_chunk, aes_gcm, key, items, workers, chunk_size)
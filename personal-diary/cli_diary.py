@@ -1,103 +1,413 @@
 import os
 import json
+from collections import OrderedDict
+from collections.abc import MutableMapping
 from datetime import datetime
-import base64
 import csv
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+import threading
+from cryptography.exceptions import InvalidTag
+from bulk_crypto import aes_gcm, decrypt_many, seal_many, unseal, unseal_many
+from diary_store import Container, read_params, write_container
+from diary_kdf import (LEGACY_PARAMS, PBKDF2_ITERATIONS, SCRYPT_N, SessionKeyCache, derive_key,
+                       key_matches, make_check, new_params, read_header, validate_params,
+                       write_header)
+
+class DiaryEntry(MutableMapping):
+    """A diary entry whose content is decrypted only when it is read.
+
+    Loaded entries keep just their metadata and decrypted title; reading
+    ``entry["content"]`` asks the diary, which decrypts the stored
+    ciphertext through a small LRU cache. Content that is set (new or
+    updated entries) is held in plain text like any other field.
+    """
+
+    __slots__ = ("diary", "timestamp", "fields")
+
+    def __init__(self, diary, timestamp, fields):
+        self.diary = diary
+        self.timestamp = timestamp
+        self.fields = fields
+
+    @property
+    def lazy(self):
+        """Whether the content is still only stored encrypted"""
+        return "content" not in self.fields
+
+    def __getitem__(self, key):
+        if key == "content" and self.lazy:
+            return self.diary.read_content(self.timestamp)
+        return self.fields[key]
+
+    def __setitem__(self, key, value):
+        self.fields[key] = value
+
+    def __delitem__(self, key):
+        del self.fields[key]
+
+    def __iter__(self):
+        yield from self.fields
+        if self.lazy:
+            yield "content"
+
+    def __len__(self):
+        return len(self.fields) + self.lazy
+
+    def __repr__(self):
+        return f"DiaryEntry({self.timestamp!r}, {self.fields!r})"
+
 
 class PersonalDiary:
+    # Decrypted entry contents kept in memory at most
+    CONTENT_CACHE_SIZE = 256
+    # Sealed together as an entry's head; the content is sealed on its own
+    HEAD_FIELDS = ("title", "category", "tags", "mood")
+
     def __init__(self):
-        self.diary_file = "diary_entries.json"
+        # Entries, in the binary format of diary_store
+        self.diary_file = "diary_entries.dat"
+        # Where entries were kept before (one Fernet token per field in
+        # JSON); migrated to diary_file on the first successful unlock
+        self.legacy_file = "diary_entries.json"
+        # Salt and KDF settings of a diary that has no diary_file yet (a new
+        # or v1 one); once written, diary_file carries its own (see diary_kdf)
+        self.header_file = "diary_header.json"
+        self.kdf_params = None
         self.password = None
-        self.fernet = None
+        self.key = None
+        self.aead = None
+        # Processes used for bulk encryption and decryption (None: this one)
+        self.workers = None
+        # When False, callers persist with save_entries() themselves (the GUI
+        # does so from a background writer)
+        self.autosave = True
+        # The diary file as last loaded or saved (memory-mapped), and
+        # timestamp -> its record there; contents are read from it by offset
+        # when first needed. The lock keeps reads off it while a (background)
+        # save replaces it.
+        self.container = None
+        self.stored = {}
+        self.container_lock = threading.Lock()
+        # timestamp -> (sealed head, sealed content) of entries sealed since
+        # the last save; these and the stored records are reused by
+        # save_entries() for every entry not in dirty
+        self.ciphertexts = {}
+        self.dirty = set()
+        # timestamp -> decrypted content, least recently read first
+        self.contents = OrderedDict()
+        # Off unless DIARY_KEY_CACHE_SECONDS is set
+        self.key_cache = SessionKeyCache(int(os.environ.get("DIARY_KEY_CACHE_SECONDS", "0")))
         self.setup_encryption()
         self.load_entries()
+        if not os.path.exists(self.diary_file) and os.path.exists(self.legacy_file):
+            self._migrate()
+        if "check" not in self.kdf_params and self.kdf_params is not LEGACY_PARAMS:
+            # A new diary, or a header from before check values: the key
+            # opened every entry, so it is the right one from now on
+            self.kdf_params = dict(self.kdf_params, check=make_check(self.key))
+            write_header(self.header_file, self.kdf_params)
+        # Only a key that opened the diary gets here
+        self.key_cache.put(self.diary_file, self.kdf_params, self.key)
 
     def setup_encryption(self):
-        """Initialize encryption with password"""
-        if not self.password:
-            self.password = input("Enter your diary password (remember this!): ").encode()
-        
-        # Generate key from password
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b"diary_salt",  # In production, use a random salt and store it
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(self.password))
-        self.fernet = Fernet(key)
-
-    def encrypt_data(self, data):
-        """Encrypt string data"""
-        return self.fernet.encrypt(data.encode()).decode()
-
-    def decrypt_data(self, encrypted_data):
-        """Decrypt string data"""
-        try:
-            return self.fernet.decrypt(encrypted_data.encode()).decode()
-        except Exception:
-            return encrypted_data  # Return as is if not encrypted
+        """Initialize encryption with password.
+
+        The salt and KDF settings come from the diary file, else from the
+        header file (a new diary gets a random salt; one without a header
+        used the old fixed salt). A key from the session cache skips both
+        the prompt and derivation.
+        """
+        self.kdf_params = None
+        if os.path.exists(self.diary_file):
+            try:
+                self.kdf_params = read_params(self.diary_file)
+                if self.kdf_params is not None:
+                    validate_params(self.kdf_params)
+            except ValueError:
+                raise ValueError("The diary file is damaged") from None
+        if self.kdf_params is None:
+            self.kdf_params = read_header(self.header_file)
+        if self.kdf_params is None:
+            if os.path.exists(self.diary_file) or os.path.exists(self.legacy_file):
+                self.kdf_params = LEGACY_PARAMS
+            else:
+                self.kdf_params = new_params()
+
+        key = None if self.password else self.key_cache.get(self.diary_file, self.kdf_params)
+        if key is not None and not key_matches(key, self.kdf_params):
+            key = None
+        if key is None:
+            if not self.password:
+                self.password = input("Enter your diary password (remember this!): ").encode()
+            key = derive_key(self.password, self.kdf_params)
+            if not key_matches(key, self.kdf_params):
+                raise ValueError("Wrong password")
+        self.key = key
+        self.aead = aes_gcm(self.key)
+
+    @staticmethod
+    def _aad(timestamp, part):
+        """Binds a sealed part to its entry, so records cannot be swapped"""
+        return f"{timestamp}\0{part}".encode()
 
     def load_entries(self):
-        """Load existing diary entries from file"""
+        """Load existing diary entries from file.
+
+        Only the heads (title and metadata) are decrypted; contents are
+        decrypted on first read. Raises ValueError if the password is wrong.
+        """
+        self.entries = {}
+        with self.container_lock:
+            if self.container is not None:
+                self.container.close()
+            self.container = None
+        self.stored = {}
+        self.ciphertexts = {}
+        self.dirty = set()
+        self.contents.clear()
         if os.path.exists(self.diary_file):
+            container = None
             try:
-                with open(self.diary_file, "r") as f:
-                    encrypted_data = json.load(f)
-                    # Decrypt entries
-                    self.entries = {}
-                    for timestamp, entry in encrypted_data.items():
-                        self.entries[timestamp] = {
-                            "title": self.decrypt_data(entry["title"]),
-                            "content": self.decrypt_data(entry["content"]),
-                            "category": entry.get("category", "General"),
-                            "tags": entry.get("tags", []),
-                            "mood": entry.get("mood", "neutral")
-                        }
-            except Exception:
-                self.entries = {}
+                container = Container(self.diary_file)
+                heads = container.heads()
+                fields = unseal_many(self.key, [(head, self._aad(timestamp, "head"))
+                                                for timestamp, head in heads], self.workers)
+            except (InvalidTag, ValueError):
+                if container is not None:
+                    container.close()
+                raise ValueError("Wrong password, or the diary file is damaged") from None
+            for i, ((timestamp, _), head) in enumerate(zip(heads, fields)):
+                self.entries[timestamp] = DiaryEntry(self, timestamp, json.loads(head))
+                self.stored[timestamp] = i
+            self.container = container
+        elif os.path.exists(self.legacy_file):
+            self._load_legacy()
+
+    def _load_legacy(self):
+        """Load the v1 JSON file, decrypting everything; all entries are
+        left dirty so the next save writes them in the current format"""
+        try:
+            with open(self.legacy_file, "r") as f:
+                encrypted_data = json.load(f)
+        except Exception:
+            return
+        stored = [entry["title"] for entry in encrypted_data.values()]
+        stored += [entry["content"] for entry in encrypted_data.values()]
+        plain = decrypt_many(self.key, stored, self.workers)
+        if plain == stored and any(title.startswith("gAAAAA") for title in stored):
+            # Nothing decrypted, though some fields look like Fernet tokens
+            raise ValueError("Wrong password, or the diary file is damaged")
+        titles, contents = plain[:len(encrypted_data)], plain[len(encrypted_data):]
+        for (timestamp, entry), title, content in zip(encrypted_data.items(), titles, contents):
+            self.entries[timestamp] = DiaryEntry(self, timestamp, {
+                "title": title,
+                "content": content,
+                "category": entry.get("category", "General"),
+                "tags": entry.get("tags", []),
+                "mood": entry.get("mood", "neutral")
+            })
+        self.dirty = set(self.entries)
+
+    def _migrate(self):
+        """Write a diary loaded from the v1 JSON file in the current format"""
+        if self.kdf_params is LEGACY_PARAMS and self.password:
+            # Written with the old fixed salt; move it to a random one
+            self._rekey(self.password, new_params())
         else:
-            self.entries = {}
+            self.save_entries()
+        for timestamp, entry in self.entries.items():
+            # Sealed now, so read contents back through the cache
+            if self._sealed(timestamp) and timestamp not in self.dirty:
+                entry.fields.pop("content", None)
+        os.replace(self.legacy_file, self.legacy_file + ".bak")
+
+    def read_content(self, timestamp):
+        """Decrypted content of a loaded entry, through the LRU cache"""
+        content = self.contents.get(timestamp)
+        if content is not None:
+            self.contents.move_to_end(timestamp)
+            return content
+        with self.container_lock:
+            sealed = self._sealed_content(timestamp)
+        content = unseal(self.aead, sealed, self._aad(timestamp, "content")).decode()
+        self.contents[timestamp] = content
+        if len(self.contents) > self.CONTENT_CACHE_SIZE:
+            self.contents.popitem(last=False)
+        return content
 
     def save_entries(self):
-        """Save diary entries to file with encryption"""
-        encrypted_entries = {}
-        for timestamp, entry in self.entries.items():
-            encrypted_entries[timestamp] = {
-                "title": self.encrypt_data(entry["title"]),
-                "content": self.encrypt_data(entry["content"]),
-                "category": entry["category"],
-                "tags": entry["tags"],
-                "mood": entry["mood"]
-            }
-        with open(self.diary_file, "w") as f:
-            json.dump(encrypted_entries, f, indent=4)
+        """Save diary entries to file with encryption.
+
+        Only entries added or changed since the last save (``dirty``) are
+        encrypted; the others reuse their cached ciphertext, so the cost of
+        a save grows with the changes, not with the size of the diary.
+        """
+        # Work on copies so entries can be added while a background save runs
+        dirty, self.dirty = self.dirty, set()
+        entries = dict(self.entries)
+        try:
+            self._encrypt([(timestamp, entry, entry["content"])
+                           for timestamp, entry in entries.items()
+                           if timestamp in dirty or not self._sealed(timestamp)])
+            records = [self._record(timestamp) for timestamp in entries]
+            with self.container_lock:
+                write_container(self.diary_file, records, self.kdf_params,
+                                replacing=self.container)
+                # Saved entries are read from the new file from now on
+                self.container = Container(self.diary_file)
+                self.stored = {timestamp: i for i, timestamp in enumerate(entries)}
+        except BaseException:
+            self.dirty |= dirty
+            raise
+        for timestamp in set(self.ciphertexts):
+            # Saved, or deleted meanwhile (unless re-added since the copy)
+            if timestamp in entries or timestamp not in self.entries:
+                self.ciphertexts.pop(timestamp, None)
+
+    def _sealed(self, timestamp):
+        """Whether there is a sealed copy of the entry to reuse"""
+        return timestamp in self.ciphertexts or timestamp in self.stored
+
+    def _sealed_content(self, timestamp):
+        if timestamp in self.ciphertexts:
+            return self.ciphertexts[timestamp][1]
+        return self.container.body(self.stored[timestamp])
+
+    def _record(self, timestamp):
+        """(timestamp, sealed head, sealed content) to write for an entry"""
+        if timestamp in self.ciphertexts:
+            return (timestamp, *self.ciphertexts[timestamp])
+        return self.container.record(self.stored[timestamp])
+
+    def _encrypt(self, items):
+        """Seal (timestamp, entry, content) items, in bulk, into ciphertexts"""
+        parts = []
+        for timestamp, entry, content in items:
+            head = json.dumps({field: entry[field] for field in self.HEAD_FIELDS})
+            parts += ((head.encode(), self._aad(timestamp, "head")),
+                      (content.encode(), self._aad(timestamp, "content")))
+        sealed = iter(seal_many(self.key, parts, self.workers))
+        for timestamp, _, _ in items:
+            self.ciphertexts[timestamp] = (next(sealed), next(sealed))
+
+    def _all_contents(self, entries):
+        """Contents of ``entries``, decrypting the missing ones in bulk
+        rather than one by one through (and flushing) the LRU cache"""
+        pending = [timestamp for timestamp, entry in entries.items()
+                   if entry.lazy and timestamp not in self.contents]
+        with self.container_lock:
+            sealed = [(self._sealed_content(timestamp), self._aad(timestamp, "content"))
+                      for timestamp in pending]
+        contents = {timestamp: content.decode() for timestamp, content
+                    in zip(pending, unseal_many(self.key, sealed, self.workers))}
+        for timestamp, entry in entries.items():
+            if timestamp not in contents:
+                contents[timestamp] = entry["content"]
+        return contents
+
+    def change_password(self, new_password, kdf="pbkdf2-sha256", iterations=PBKDF2_ITERATIONS,
+                        n=SCRYPT_N):
+        """Re-encrypt every entry with a key derived from ``new_password``.
+
+        ``kdf`` and its cost (``iterations`` for pbkdf2-sha256, ``n`` for
+        scrypt) are stored with the diary; see diary_kdf.new_params().
+        """
+        self._rekey(new_password.encode(), new_params(kdf, iterations, n))
+
+    def _rekey(self, password, params):
+        """Re-encrypt every entry under a new password and KDF settings.
+
+        The new settings travel inside the diary file, so the one rename
+        that replaces it switches key and data together; if the save fails
+        the diary is left as it was, still under the old password.
+        """
+        entries = dict(self.entries)
+        contents = self._all_contents(entries)
+        old = (self.password, self.key, self.aead, self.kdf_params,
+               self.container, self.stored, self.ciphertexts, self.dirty)
+        self.password = password
+        self.key = derive_key(password, params)
+        self.aead = aes_gcm(self.key)
+        self.kdf_params = dict(params, check=make_check(self.key))
+        # The container stays, so the save unmaps it before replacing it
+        self.stored = {}
+        self.ciphertexts = {}
+        self._encrypt([(timestamp, entry, contents[timestamp])
+                       for timestamp, entry in entries.items()])
+        self.dirty = self.dirty - set(entries)
+        try:
+            self.save_entries()
+        except BaseException:
+            (self.password, self.key, self.aead, self.kdf_params,
+             self.container, self.stored, self.ciphertexts, self.dirty) = old
+            raise
+        self.key_cache.forget(self.diary_file, old[3])
+        self.key_cache.put(self.diary_file, self.kdf_params, self.key)
+        # Only read while there is no diary file, but keep it in step
+        write_header(self.header_file, self.kdf_params)
 
     def add_entry(self, title, content, category="General", tags=None, mood="neutral"):
         """Add a new diary entry"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.entries[timestamp] = {
+        self.entries[timestamp] = DiaryEntry(self, timestamp, {
             "title": title,
             "content": content,
             "category": category,
             "tags": tags or [],
             "mood": mood
-        }
-        self.save_entries()
+        })
+        self.dirty.add(timestamp)
+        if self.autosave:
+            self.save_entries()
         return timestamp
 
+    def list_entries(self):
+        """Get all entries keyed by timestamp"""
+        return self.entries
+
+    def view_entry(self, timestamp):
+        """Get a single entry, or None"""
+        return self.entries.get(timestamp)
+
+    def update_entry(self, timestamp, **fields):
+        """Change fields of an entry; returns False if there is no such entry.
+
+        Entries must be changed through here (or add_entry) rather than in
+        place, so the next save knows to encrypt them again.
+        """
+        entry = self.entries.get(timestamp)
+        if entry is None:
+            return False
+        if "content" not in fields:
+            # It is encrypted again on save, so keep it in plain text
+            fields["content"] = entry["content"]
+        entry.update(fields)
+        self.contents.pop(timestamp, None)
+        self.dirty.add(timestamp)
+        if self.autosave:
+            self.save_entries()
+        return True
+
+    def delete_entry(self, timestamp):
+        """Delete an entry"""
+        if timestamp not in self.entries:
+            return False
+        del self.entries[timestamp]
+        self.dirty.discard(timestamp)
+        self.contents.pop(timestamp, None)
+        if self.autosave:
+            self.save_entries()
+        return True
+
     def search_entries(self, query):
         """Search entries by title, content, category, or tags"""
         results = {}
         query = query.lower()
         for timestamp, entry in self.entries.items():
+            # Content last: it may have to be decrypted
             if (query in entry["title"].lower() or
-                query in entry["content"].lower() or
                 query in entry["category"].lower() or
-                query in [tag.lower() for tag in entry["tags"]]):
+                query in [tag.lower() for tag in entry["tags"]] or
+                query in entry["content"].lower()):
                 results[timestamp] = entry
         return results
 
@@ -117,18 +427,24 @@ class PersonalDiary:
         with open(filename, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             writer.writerow(["Timestamp", "Title", "Content", "Category", "Tags", "Mood"])
-            for timestamp, entry in self.entries.items():
+            entries = dict(self.entries)
+            contents = self._all_contents(entries)
+            for timestamp, entry in entries.items():
                 writer.writerow([
                     timestamp,
                     entry["title"],
-                    entry["content"],
+                    contents[timestamp],
                     entry["category"],
                     ",".join(entry["tags"]),
                     entry["mood"]
                 ])
 
 def main():
-    diary = PersonalDiary()
+    try:
+        diary = PersonalDiary()
+    except ValueError as e:
+        print(e)
+        return
     
     while True:
         print("\nPersonal Diary")
@@ -138,9 +454,10 @@ def main():
         print("4. View by Category")
         print("5. Export to CSV")
         print("6. Delete Entry")
-        print("7. Exit")
+        print("7. Change Password")
+        print("8. Exit")
         
-        choice = input("\nEnter your choice (1-7): ")
+        choice = input("\nEnter your choice (1-8): ")
         
         if choice == "1":
             title = input("Enter entry title: ")
@@ -254,6 +571,24 @@ def main():
                 print("Invalid input. Please enter a number.")
 
         elif choice == "7":
+            new_password = input("Enter the new password: ")
+            if not new_password:
+                print("Password not changed.")
+            elif input("Repeat the new password: ") != new_password:
+                print("Passwords do not match.")
+            else:
+                kdf = input("Key derivation, pbkdf2-sha256 or scrypt "
+                            "(press Enter for pbkdf2-sha256): ") or "pbkdf2-sha256"
+                cost = input("Cost: iterations for pbkdf2-sha256, N for scrypt "
+                             "(press Enter for the default): ")
+                try:
+                    option = "n" if kdf == "scrypt" else "iterations"
+                    diary.change_password(new_password, kdf, **({option: int(cost)} if cost else {}))
+                    print("Password changed; all entries re-encrypted.")
+                except ValueError as e:
+                    print(f"Password not changed: {e}")
+
+        elif choice == "8":
             print("Goodbye!")
             break
         
@@ -0,0 +1,182 @@
+import base64
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from bulk_crypto import aes_gcm, seal, unseal
+
+PBKDF2_ITERATIONS = 100000
+SCRYPT_N = 2 ** 15
+# What diaries written before the header file existed were derived with
+LEGACY_PARAMS = {"kdf": "pbkdf2-sha256", "salt": base64.b64encode(b"diary_salt").decode(),
+                 "iterations": 100000}
+# Sealed into the header's "check" so a wrong password is caught even when
+# the diary has no entries to fail on
+CHECK_TEXT = b"personal diary key check"
+
+
+def new_params(kdf="pbkdf2-sha256", iterations=PBKDF2_ITERATIONS, n=SCRYPT_N):
+    """KDF parameters with a fresh random salt.
+
+    ``iterations`` is the cost of pbkdf2-sha256, ``n`` (a power of two)
+    that of scrypt; higher is slower to unlock and to brute-force.
+    """
+    salt = base64.b64encode(os.urandom(16)).decode()
+    if kdf == "pbkdf2-sha256":
+        params = {"kdf": kdf, "salt": salt, "iterations": iterations}
+    elif kdf == "scrypt":
+        params = {"kdf": kdf, "salt": salt, "n": n, "r": 8, "p": 1}
+    else:
+        raise ValueError(f"unknown kdf {kdf!r}")
+    validate_params(params)
+    return params
+
+
+def validate_params(params):
+    """Raise ValueError unless ``params`` has every field its KDF needs"""
+    def positive_int(field):
+        value = params.get(field)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"{field} must be a positive integer, not {value!r}")
+        return value
+
+    if not isinstance(params.get("salt"), str):
+        raise ValueError("the salt is missing")
+    try:
+        base64.b64decode(params["salt"], validate=True)
+    except ValueError:
+        raise ValueError("the salt is not base64") from None
+    if "check" in params and not isinstance(params["check"], str):
+        raise ValueError("the check value is not a string")
+    if params.get("kdf") == "pbkdf2-sha256":
+        positive_int("iterations")
+    elif params.get("kdf") == "scrypt":
+        n = positive_int("n")
+        if n < 2 or n & (n - 1):
+            raise ValueError(f"n must be a power of two, not {n}")
+        positive_int("r")
+        positive_int("p")
+    else:
+        raise ValueError(f"unknown kdf {params.get('kdf')!r}")
+
+
+def derive_key(password, params):
+    """Fernet key for ``password`` (bytes) under the header ``params``"""
+    salt = base64.b64decode(params["salt"])
+    if params["kdf"] == "pbkdf2-sha256":
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt,
+                         iterations=params["iterations"])
+    elif params["kdf"] == "scrypt":
+        kdf = Scrypt(salt=salt, length=32, n=params["n"], r=params["r"], p=params["p"])
+    else:
+        raise ValueError(f"unknown kdf {params['kdf']!r}")
+    return base64.urlsafe_b64encode(kdf.derive(password))
+
+
+def make_check(key):
+    """Key-check value for the header: a constant sealed with ``key``"""
+    return base64.b64encode(seal(aes_gcm(key), CHECK_TEXT, b"check")).decode()
+
+
+def key_matches(key, params):
+    """Whether ``key`` opens the header's check value (True if it has none)"""
+    if "check" not in params:
+        return True
+    try:
+        return unseal(aes_gcm(key), base64.b64decode(params["check"]), b"check") == CHECK_TEXT
+    except (InvalidTag, ValueError):
+        return False
+
+
+def read_header(path):
+    """KDF parameters stored next to a diary, or None if there are none.
+
+    Raises ValueError if the file is there but unreadable: without its salt
+    the diary cannot be opened, and starting over would lock it for good.
+    """
+    try:
+        with open(path, "r") as f:
+            params = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        raise ValueError(f"The diary header {path} is damaged") from None
+    if not isinstance(params, dict):
+        raise ValueError(f"The diary header {path} is damaged")
+    try:
+        validate_params(params)
+    except ValueError as e:
+        raise ValueError(f"The diary header {path} is damaged: {e}") from None
+    return params
+
+
+def write_header(path, params):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(params, f, indent=4)
+    os.replace(tmp_file, path)
+
+
+class SessionKeyCache:
+    """Derived keys kept for ``ttl`` seconds in files only the user can read.
+
+    Lets repeated CLI/GUI launches within a session skip the password
+    prompt and the key derivation, like sudo's timestamp. Files live in
+    XDG_RUNTIME_DIR when there is one (a per-user tmpfs cleared on logout),
+    else the temp directory, and are named after the diary path and salt
+    so a new salt (password change) never matches an old key. A ttl of 0
+    disables the cache. The cache is best effort: a file that is not ours
+    or any OS error is treated as a miss, never as a failure to open.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+
+    def path(self, diary_file, params):
+        digest = hashlib.sha256(f"{os.path.abspath(diary_file)}\0{params['salt']}".encode())
+        return os.path.join(self.directory, f"diary-key-{digest.hexdigest()[:24]}")
+
+    def get(self, diary_file, params):
+        if not self.ttl:
+            return None
+        path = self.path(diary_file, params)
+        try:
+            info = os.lstat(path)
+            if (not stat.S_ISREG(info.st_mode) or info.st_mode & 0o077
+                    or (hasattr(os, "getuid") and info.st_uid != os.getuid())):
+                return None  # Not created by us (the temp directory is shared)
+            with open(path, "r") as f:
+                cached = json.load(f)
+            if cached["expires"] < time.time():
+                self.forget(diary_file, params)
+                return None
+            return cached["key"].encode()
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def put(self, diary_file, params, key):
+        if not self.ttl:
+            return
+        path = self.path(diary_file, params)
+        self.forget(diary_file, params)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"expires": time.time() + self.ttl, "key": key.decode()}, f)
+        except OSError:
+            pass  # Someone else's file is in the way; go without the cache
+
+    def forget(self, diary_file, params):
+        try:
+            os.remove(self.path(diary_file, params))
+        except OSError:
+            pass
@@ -0,0 +1,158 @@
+import json
+import mmap
+import os
+import struct
+
+# Diary container format v3:
+#   magic (8 bytes) | params length (u32) | params (JSON) |
+#   record count (u32) | offset table: one u64 per record
+#   record: timestamp length (u16), head length (u32), body length (u32),
+#           then the timestamp (UTF-8), head and body bytes
+# Integers are little-endian. The params are the KDF settings the records
+# are sealed under, so replacing the file switches key and data together.
+# The head and body are opaque here (the diary stores its AES-GCM sealed
+# metadata and content in them). v2 is the same without the params.
+MAGIC = b"DIARY\x00v3"
+MAGIC_V2 = b"DIARY\x00v2"
+COUNT = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+RECORD = struct.Struct("<HII")
+
+
+def _read_params(data):
+    """KDF params (None for v2) and where the record count starts"""
+    magic = bytes(data[:len(MAGIC)])
+    if magic == MAGIC_V2:
+        return None, len(MAGIC)
+    if magic != MAGIC:
+        raise ValueError("not a diary file")
+    try:
+        (length,) = COUNT.unpack_from(data, len(MAGIC))
+    except struct.error:
+        raise ValueError("the diary file is truncated") from None
+    start = len(MAGIC) + COUNT.size
+    if start + length > len(data):
+        raise ValueError("the diary file is truncated")
+    params = json.loads(bytes(data[start:start + length]))
+    if not isinstance(params, dict):
+        raise ValueError("the diary file is damaged")
+    return params, start + length
+
+
+def read_params(path):
+    """KDF params stored in a diary file, or None if it predates them"""
+    with open(path, "rb") as f:
+        data = f.read(len(MAGIC) + COUNT.size)
+        if data[:len(MAGIC)] == MAGIC and len(data) == len(MAGIC) + COUNT.size:
+            data += f.read(COUNT.unpack_from(data, len(MAGIC))[0])
+    return _read_params(data)[0]
+
+
+class Container:
+    """A diary file, memory-mapped rather than read.
+
+    The offset table locates any record directly, so ``record(i)`` (or
+    just its ``body(i)``) reads neither the records before it nor, for
+    ``heads()``, the bodies: only the pages holding what is returned are
+    read from disk. Raises ValueError for a file that is not a diary or
+    is cut short.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.open()
+        try:
+            self.params, start = _read_params(self.data)
+            if start + COUNT.size > len(self.data):
+                raise ValueError("the diary file is truncated")
+            (self.count,) = COUNT.unpack_from(self.data, start)
+            self.table = start + COUNT.size
+            if self.table + self.count * OFFSET.size > len(self.data):
+                raise ValueError("the diary file is truncated")
+        except BaseException:
+            self.close()
+            raise
+
+    def open(self):
+        """Map the file (again, after close())"""
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("not a diary file")
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Unmap the file; a mapped file cannot be replaced on Windows"""
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def __len__(self):
+        return self.count
+
+    def _locate(self, i):
+        """Timestamp and the start and end of the head and body of record i"""
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        (offset,) = OFFSET.unpack_from(self.data, self.table + i * OFFSET.size)
+        try:
+            ts_len, head_len, body_len = RECORD.unpack_from(self.data, offset)
+        except struct.error:
+            raise ValueError("the diary file is truncated") from None
+        start = offset + RECORD.size
+        head = start + ts_len
+        body = head + head_len
+        end = body + body_len
+        if end > len(self.data):
+            raise ValueError("the diary file is truncated")
+        return str(self.data[start:head], "utf-8"), head, body, end
+
+    def record(self, i):
+        """(timestamp, head, body) of the i-th record"""
+        timestamp, head, body, end = self._locate(i)
+        return timestamp, self.data[head:body], self.data[body:end]
+
+    def heads(self):
+        """(timestamp, head) of every record, without reading the bodies"""
+        heads = []
+        for i in range(self.count):
+            timestamp, head, body, _ = self._locate(i)
+            heads.append((timestamp, self.data[head:body]))
+        return heads
+
+    def body(self, i):
+        _, _, body, end = self._locate(i)
+        return self.data[body:end]
+
+    def records(self):
+        return [self.record(i) for i in range(self.count)]
+
+
+def write_container(path, records, params, replacing=None):
+    """Atomically write (timestamp, head, body) records, sealed under the
+    KDF ``params``, as a diary file.
+
+    ``replacing``, a Container open on ``path``, is unmapped just before
+    the new file takes its place (and mapped again if that fails).
+    """
+    records = list(records)
+    params = json.dumps(params).encode()
+    parts = [MAGIC, COUNT.pack(len(params)), params, COUNT.pack(len(records))]
+    offset = len(MAGIC) + 2 * COUNT.size + len(params) + OFFSET.size * len(records)
+    blobs = []
+    for timestamp, head, body in records:
+        timestamp = timestamp.encode()
+        parts.append(OFFSET.pack(offset))
+        blobs += (RECORD.pack(len(timestamp), len(head), len(body)), timestamp, head, body)
+        offset += RECORD.size + len(timestamp) + len(head) + len(body)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(b"".join(parts + blobs))
+    if replacing is not None:
+        replacing.close()
+    try:
+        os.replace(tmp_file, path)
+    except BaseException:
+        if replacing is not None:
+            replacing.open()
+        raise
@@ -5,6 +5,7 @@ import os
 from datetime import datetime
 from cli_diary import PersonalDiary
 from ttkthemes import ThemedTk
+from autosave import DebouncedWriter
 
 class DiaryGUI:
     def __init__(self, root):
@@ -16,14 +17,18 @@ class DiaryGUI:
         self.is_dark_mode = tk.BooleanVar(value=False)
         self.setup_theme()
         
-        # Initialize diary
+        # Initialize diary; saving (and re-encrypting) happens in the background
         self.diary = PersonalDiary()
+        self.diary.autosave = False
+        self.writer = DebouncedWriter(self.diary.save_entries)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Create GUI elements
         self.setup_gui()
         
         # Load entries
         self.load_entries_list()
+        self.update_save_status()
         
     def setup_theme(self):
         """Setup and configure theme"""
@@ -155,6 +160,11 @@ class DiaryGUI:
         ttk.Button(button_frame, text="Export to CSV", 
                   command=self.export_to_csv).pack(side=tk.LEFT, padx=5)
         
+        # Save status
+        self.save_status_var = tk.StringVar()
+        ttk.Label(self.main_frame, textvariable=self.save_status_var).grid(
+            row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
         # Configure grid weights
         self.main_frame.columnconfigure(1, weight=1)
         self.main_frame.rowconfigure(1, weight=1)
@@ -231,6 +241,7 @@ class DiaryGUI:
             return
         
         self.diary.add_entry(title, content, category, tags, mood)
+        self.writer.schedule()
         self.load_entries_list()
         messagebox.showinfo("Success", "Entry saved successfully!")
     
@@ -244,6 +255,7 @@ class DiaryGUI:
             index = selection[0]
             timestamp = self.timestamps[index]
             if self.diary.delete_entry(timestamp):
+                self.writer.schedule()
                 self.load_entries_list()
                 self.new_entry()
                 messagebox.showinfo("Success", "Entry deleted successfully!")
@@ -262,10 +274,44 @@ class DiaryGUI:
                 messagebox.showinfo("Success", f"Entries exported to {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to export entries: {str(e)}")
+    
+    def update_save_status(self):
+        """Show whether changes are still waiting to be written"""
+        if self.writer.error:
+            self.save_status_var.set(f"Save failed: {self.writer.error}")
+        elif self.writer.pending:
+            self.save_status_var.set("Saving...")
+        else:
+            self.save_status_var.set("All changes saved")
+        self.root.after(250, self.update_save_status)
+    
+    def on_close(self):
+        """Save pending writes before closing the window.
+
+        What the background writer could not save is saved here once more;
+        if that fails too, the user decides whether to lose it.
+        """
+        if not self.writer.close():
+            try:
+                self.diary.save_entries()
+            except Exception as e:
+                if not messagebox.askyesno(
+                        "Unsaved changes",
+                        f"Your latest entries could not be saved:\n{e}\n\n"
+                        "Close anyway and lose them?"):
+                    self.writer = DebouncedWriter(self.diary.save_entries)
+                    self.writer.schedule()
+                    return
+        self.root.destroy()
 
 def main():
     root = ThemedTk(theme="arc")  # You can use other themes like "equilux" for dark mode
-    app = DiaryGUI(root)
+    try:
+        app = DiaryGUI(root)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        root.destroy()
+        return
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+"""Fixtures shared by the diary tests"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cli_diary
+from cli_diary import PersonalDiary
+
+
+class Clock(datetime):
+    """datetime whose now() moves a second per call, so entries added in
+    quick succession still get distinct timestamps"""
+
+    current = datetime(2024, 1, 1, 9, 0, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        Clock.current += timedelta(seconds=1)
+        return Clock.current
+
+
+@pytest.fixture(autouse=True)
+def diary_dir(tmp_path, monkeypatch):
+    """Run each test in its own directory, with the key cache off"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("DIARY_KEY_CACHE_SECONDS", raising=False)
+    monkeypatch.setattr(cli_diary, "datetime", Clock)
+    monkeypatch.setattr(Clock, "current", datetime(2024, 1, 1, 9, 0, 0))
+    return tmp_path
+
+
+@pytest.fixture
+def open_diary(monkeypatch):
+    """Open the diary in the current directory, answering the password prompt"""
+    def open_diary(password="secret"):
+        monkeypatch.setattr("builtins.input", lambda prompt="": password)
+        return PersonalDiary()
+    return open_diary
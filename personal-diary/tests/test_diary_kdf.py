@@ -0,0 +1,150 @@
+"""Tests for passwords, the diary header and the session key cache"""
+import json
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from cryptography.fernet import Fernet
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cli_diary
+from cli_diary import PersonalDiary
+from diary_kdf import SessionKeyCache, new_params, read_header
+
+
+def test_wrong_password_is_rejected(open_diary):
+    """Test that a wrong password raises ValueError"""
+    open_diary().add_entry("Monday", "Rained all day")
+    with pytest.raises(ValueError):
+        open_diary("not the password")
+    assert [entry["content"] for entry in open_diary().list_entries().values()] == ["Rained all day"]
+
+
+def test_wrong_password_on_empty_diary(open_diary):
+    """Test that the header's check value rejects a wrong password even
+    when there are no entries to fail on"""
+    open_diary()
+    assert "check" in read_header("diary_header.json")
+    with pytest.raises(ValueError):
+        open_diary("not the password")
+    assert open_diary().list_entries() == {}
+
+
+def test_change_password_then_reopen(open_diary):
+    """Test that only the new password opens the diary after a change"""
+    diary = open_diary()
+    diary.add_entry("Monday", "Rained all day")
+    old_salt = read_header("diary_header.json")["salt"]
+    diary.change_password("new secret")
+    assert read_header("diary_header.json")["salt"] != old_salt
+
+    with pytest.raises(ValueError):
+        open_diary()
+    reopened = open_diary("new secret")
+    assert [entry["content"] for entry in reopened.list_entries().values()] == ["Rained all day"]
+
+
+def test_damaged_header_is_rejected(open_diary):
+    """Test that an unreadable header raises instead of being replaced"""
+    open_diary()  # No entries yet, so no diary file to take the salt from
+    for damaged in ("{not json", "[]", json.dumps({"kdf": "scrypt"}),
+                    json.dumps({"kdf": "pbkdf2-sha256", "salt": "c2FsdA=="}),
+                    json.dumps({"kdf": "scrypt", "salt": "c2FsdA==", "n": 3, "r": 8, "p": 1}),
+                    json.dumps({"kdf": "md5", "salt": "c2FsdA=="})):
+        Path("diary_header.json").write_text(damaged)
+        with pytest.raises(ValueError):
+            open_diary()
+    assert Path("diary_header.json").read_text() == damaged
+
+
+def test_change_password_with_other_kdf(open_diary):
+    """Test that the KDF and its cost chosen on a password change are kept"""
+    diary = open_diary()
+    diary.add_entry("Monday", "Rained all day")
+    diary.change_password("new secret", "scrypt", n=2 ** 10)
+    params = read_header("diary_header.json")
+    assert (params["kdf"], params["n"]) == ("scrypt", 2 ** 10)
+
+    reopened = open_diary("new secret")
+    assert reopened.kdf_params["n"] == 2 ** 10
+    reopened.change_password("secret", iterations=1000)
+    assert open_diary().kdf_params["iterations"] == 1000
+
+    for bad in ({"kdf": "md5"}, {"kdf": "scrypt", "n": 1000}, {"iterations": 0}):
+        with pytest.raises(ValueError):
+            diary.change_password("other", **bad)
+    assert len(open_diary().list_entries()) == 1
+
+
+def test_failed_rekey_keeps_old_password(open_diary):
+    """Test that a password change whose save fails leaves the diary
+    opening with the old password"""
+    diary = open_diary()
+    diary.add_entry("Monday", "Rained all day")
+
+    with mock.patch.object(cli_diary, "write_container", side_effect=OSError("disk full")), \
+            pytest.raises(OSError):
+        diary.change_password("new secret")
+
+    assert [entry["content"] for entry in diary.list_entries().values()] == ["Rained all day"]
+    with pytest.raises(ValueError):
+        open_diary("new secret")
+    reopened = open_diary()
+    assert [entry["content"] for entry in reopened.list_entries().values()] == ["Rained all day"]
+
+
+def test_diary_file_carries_its_salt(open_diary):
+    """Test that a rekey interrupted after the diary file is replaced (but
+    before the header is) opens with the new password"""
+    diary = open_diary()
+    diary.add_entry("Monday", "Rained all day")
+
+    with mock.patch.object(cli_diary, "write_header", side_effect=OSError("interrupted")), \
+            pytest.raises(OSError):
+        diary.change_password("new secret")
+
+    reopened = open_diary("new secret")
+    assert [entry["content"] for entry in reopened.list_entries().values()] == ["Rained all day"]
+
+
+def test_key_cache_skips_prompt(open_diary, monkeypatch, tmp_path):
+    """Test that a cached key opens the diary without asking again"""
+    monkeypatch.setenv("DIARY_KEY_CACHE_SECONDS", "60")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    open_diary().add_entry("Monday", "Rained all day")
+
+    def no_prompt(prompt=""):
+        raise AssertionError("prompted for the password")
+    monkeypatch.setattr("builtins.input", no_prompt)
+    assert len(PersonalDiary().list_entries()) == 1
+
+
+def test_key_cache_ignores_foreign_files(tmp_path, monkeypatch):
+    """Test that cache files others could write or read are misses"""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    cache = SessionKeyCache(60)
+    params = new_params()
+    cache.put("diary_entries.dat", params, b"key")
+    assert cache.get("diary_entries.dat", params) == b"key"
+
+    os.chmod(cache.path("diary_entries.dat", params), 0o644)
+    assert cache.get("diary_entries.dat", params) is None
+
+    cache.forget("diary_entries.dat", params)
+    os.mkdir(cache.path("diary_entries.dat", params))
+    cache.put("diary_entries.dat", params, b"key")  # Does not raise
+    assert cache.get("diary_entries.dat", params) is None
+
+
+def test_stale_cached_key_falls_back_to_prompt(open_diary, monkeypatch, tmp_path):
+    """Test that a cached key that fails the check is not used"""
+    monkeypatch.setenv("DIARY_KEY_CACHE_SECONDS", "60")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    diary = open_diary()
+    diary.add_entry("Monday", "Rained all day")
+    SessionKeyCache(60).put(diary.diary_file, diary.kdf_params, Fernet.generate_key())
+    assert len(open_diary().list_entries()) == 1
@@ -0,0 +1,146 @@
+"""Tests for the v2 diary file and reading it back"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from diary_kdf import LEGACY_PARAMS, derive_key, read_header
+from diary_store import COUNT, MAGIC_V2, OFFSET, RECORD, Container, write_container
+
+
+@pytest.fixture
+def diary(open_diary):
+    diary = open_diary()
+    diary.add_entry("Monday", "Rained all day", category="Weather", tags=["rain"])
+    diary.add_entry("Tuesday", "Sunny at last", mood="happy")
+    diary.add_entry("Wednesday", "Nothing much")
+    return diary
+
+
+def contents(diary):
+    return {entry["title"]: entry["content"] for entry in diary.list_entries().values()}
+
+
+def test_reload_keeps_entries(diary, open_diary):
+    """Test that entries read back with their metadata after a reopen"""
+    reopened = open_diary()
+    assert contents(reopened) == contents(diary)
+    monday = next(e for e in reopened.list_entries().values() if e["title"] == "Monday")
+    assert monday["category"] == "Weather"
+    assert monday["tags"] == ["rain"]
+    assert all(entry.lazy for entry in reopened.list_entries().values())
+
+
+def test_reload_after_update_and_delete(diary, open_diary):
+    """Test that updates and deletions are what a reopened diary sees"""
+    monday, tuesday, wednesday = diary.list_entries()
+    diary.update_entry(monday, content="Rained, then snowed")
+    diary.update_entry(tuesday, title="Tuesday!")
+    diary.delete_entry(wednesday)
+
+    reopened = open_diary()
+    assert contents(reopened) == {"Monday": "Rained, then snowed", "Tuesday!": "Sunny at last"}
+    # And the entries that were not touched survive a further save
+    reopened.add_entry("Thursday", "Back to work")
+    assert contents(open_diary()) == {"Monday": "Rained, then snowed",
+                                      "Tuesday!": "Sunny at last",
+                                      "Thursday": "Back to work"}
+
+
+def test_contents_read_after_save(diary, open_diary):
+    """Test that contents not yet read come from the file the last save
+    wrote, not from the one that was loaded"""
+    reopened = open_diary()
+    monday, tuesday, wednesday = reopened.list_entries()
+    reopened.update_entry(monday, title="Monday!")
+    assert not Path("diary_entries.dat.tmp").exists()
+    assert reopened.stored == {monday: 0, tuesday: 1, wednesday: 2}
+    assert reopened.ciphertexts == {}
+    assert reopened.view_entry(wednesday)["content"] == "Nothing much"
+
+
+def test_v1_file_is_migrated(open_diary):
+    """Test that a v1 JSON diary is rewritten as v2 and kept as .bak"""
+    fernet = Fernet(derive_key(b"secret", LEGACY_PARAMS))
+    v1 = {
+        "2023-05-01 08:00:00": {"title": fernet.encrypt(b"Old news").decode(),
+                                "content": fernet.encrypt(b"Written long ago").decode(),
+                                "category": "Past", "tags": ["v1"], "mood": "calm"},
+        "2023-05-02 08:00:00": {"title": fernet.encrypt(b"Older news").decode(),
+                                "content": fernet.encrypt(b"Still here").decode()}
+    }
+    with open("diary_entries.json", "w") as f:
+        json.dump(v1, f)
+
+    diary = open_diary()
+    assert contents(diary) == {"Old news": "Written long ago", "Older news": "Still here"}
+    assert os.path.exists("diary_entries.json.bak")
+    assert not os.path.exists("diary_entries.json")
+    # Moved off the old fixed salt
+    assert read_header("diary_header.json")["salt"] != LEGACY_PARAMS["salt"]
+
+    reopened = open_diary()
+    assert contents(reopened) == contents(diary)
+    entry = reopened.view_entry("2023-05-01 08:00:00")
+    assert (entry["category"], entry["tags"], entry["mood"]) == ("Past", ["v1"], "calm")
+
+
+def test_swapped_records_fail(diary, open_diary):
+    """Test that a sealed part only opens for the entry it was written for"""
+    container = Container("diary_entries.dat")
+    (ts1, head1, body1), (ts2, head2, body2), third = container.records()
+    container.close()
+
+    params = container.params
+    write_container("diary_entries.dat", [(ts1, head1, body2), (ts2, head2, body1), third], params)
+    reopened = open_diary()
+    with pytest.raises(InvalidTag):
+        reopened.view_entry(ts1)["content"]
+
+    write_container("diary_entries.dat", [(ts1, head2, body1), (ts2, head1, body2), third], params)
+    with pytest.raises(ValueError):
+        open_diary()
+
+
+def test_damaged_file_is_rejected(diary, open_diary):
+    """Test that a truncated or overwritten diary file raises ValueError"""
+    data = Path("diary_entries.dat").read_bytes()
+    for damaged in (data[:-10], data[:20], data[:5], b"not a diary at all"):
+        Path("diary_entries.dat").write_bytes(damaged)
+        with pytest.raises(ValueError):
+            open_diary()
+
+
+def test_container_reads_single_records(tmp_path):
+    """Test that records and bodies are found through the offset table"""
+    path = str(tmp_path / "records.dat")
+    records = [(f"2024-01-0{i} 00:00:00", f"head {i}".encode(), f"body {i}".encode() * i)
+               for i in range(1, 5)]
+    write_container(path, records, {"kdf": "scrypt"})
+    container = Container(path)
+    assert container.params == {"kdf": "scrypt"}
+    assert len(container) == 4
+    assert container.record(2) == records[2]
+    assert container.body(3) == records[3][2]
+    assert container.heads() == [(ts, head) for ts, head, _ in records]
+    with pytest.raises(IndexError):
+        container.record(4)
+
+
+def test_v2_container_is_read(tmp_path):
+    """Test that files from before the params were stored still read"""
+    path = tmp_path / "records.dat"
+    timestamp = b"2024-01-01 00:00:00"
+    offset = len(MAGIC_V2) + COUNT.size + OFFSET.size
+    path.write_bytes(MAGIC_V2 + COUNT.pack(1) + OFFSET.pack(offset)
+                     + RECORD.pack(len(timestamp), 4, 4) + timestamp + b"head" + b"body")
+    container = Container(str(path))
+    assert container.params is None
+    assert container.record(0) == ("2024-01-01 00:00:00", b"head", b"body")
@@ -0,0 +1,118 @@
+import threading
+import time
+
+
+class DebouncedWriter:
+    """Runs a save function on a background thread, coalescing bursts.
+
+    Call ``schedule()`` after every change. ``write`` runs once no change
+    has been scheduled for ``delay`` seconds, or ``max_delay`` seconds after
+    the first unsaved change during a continuous burst, so the Tk main loop
+    never waits on the disk. ``flush()`` forces pending changes out and
+    ``close()`` flushes and stops the thread.
+
+    A write that raises (kept in ``error``) or returns False (it could not
+    write everything yet) leaves the changes pending. They are tried again
+    ``max_delay`` (after an error) or ``delay`` seconds later, or right away
+    by ``flush()``.
+    """
+
+    def __init__(self, write, delay=0.5, max_delay=5.0):
+        self.write = write
+        self.delay = delay
+        self.max_delay = max_delay
+        self.error = None
+        self._cond = threading.Condition()
+        self._dirty_since = None
+        self._last_change = None
+        self._retry_at = 0
+        self._attempts = 0
+        self._failed = False
+        self._writing = False
+        self._force = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Whether some changes have not reached the disk yet"""
+        with self._cond:
+            return self._dirty_since is not None or self._writing
+
+    def schedule(self):
+        """Note that something changed and needs to be written"""
+        with self._cond:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_change = now
+            self._cond.notify_all()
+
+    def flush(self):
+        """Write pending changes now and wait until they are on disk.
+
+        Returns False if a write failed meanwhile and changes are still
+        pending.
+        """
+        with self._cond:
+            if self._dirty_since is not None:
+                self._force = True
+                self._cond.notify_all()
+            attempts = self._attempts
+            while self._dirty_since is not None or self._writing:
+                if self._attempts != attempts and self._failed and not self._writing:
+                    return False
+                self._cond.wait()
+            return True
+
+    def close(self):
+        """Flush and stop the background thread.
+
+        Returns False if changes are still pending; the thread stops all
+        the same, leaving the caller to save them some other way or to
+        give them up.
+        """
+        written = self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        return written
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._dirty_since is None and not self._closed:
+                    self._cond.wait()
+                if self._dirty_since is None or (self._closed and self._failed):
+                    return
+                while not (self._force or self._closed):
+                    deadline = max(min(self._last_change + self.delay,
+                                       self._dirty_since + self.max_delay), self._retry_at)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._dirty_since = None
+                self._force = False
+                self._writing = True
+            written = False
+            try:
+                written = self.write() is not False
+                self.error = None
+            except Exception as e:
+                self.error = e
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._attempts += 1
+                    self._failed = not written
+                    if not written:
+                        # Still unsaved: mark dirty again and retry later
+                        now = time.monotonic()
+                        if self._dirty_since is None:
+                            self._dirty_since = now
+                        self._last_change = now
+                        self._retry_at = now + (self.delay if self.error is None else self.max_delay)
+                    self._cond.notify_all()
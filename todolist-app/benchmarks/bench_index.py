@@ -0,0 +1,91 @@
+"""Benchmark TodoList lookups against the linear scans they replaced.
+
+Usage: python benchmarks/bench_index.py [--sizes 100000 1000000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+
+CATEGORIES = ["work", "home", "errands", "health", "study", "finance", "travel", "misc"]
+PRIORITIES = ["low", "medium", "high"]
+
+
+def build(todo_list, size):
+    """Fill a TodoList in memory through the journal replay path"""
+    rng = random.Random(42)
+    for todo_id in range(1, size + 1):
+        todo_list._apply({"op": "add", "todo": {
+            "id": todo_id,
+            "title": f"Todo {todo_id}",
+            "description": "",
+            "created_date": "2025-01-01 09:00:00",
+            "due_date": None,
+            "priority": rng.choice(PRIORITIES),
+            "category": rng.choice(CATEGORIES),
+            "completed": rng.random() < 0.9,
+            "completed_date": None
+        }})
+
+
+def scan_find(todos, todo_id):
+    for todo in todos:
+        if todo["id"] == todo_id:
+            return todo
+    return None
+
+
+def scan_filter(todos, completed, category, priority):
+    todos = [t for t in todos if t["completed"] == completed]
+    todos = [t for t in todos if t["category"].lower() == category]
+    return [t for t in todos if t["priority"].lower() == priority]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            todo_list = TodoList(str(Path(tmp) / f"todos_{size}.json"))
+            build(todo_list, size)
+            todos = todo_list.todos
+            ids = [random.randint(1, size) for _ in range(100)]
+
+            print(f"\n{size:,} todos (ms per operation)")
+            print(f"{'operation':<36}{'linear scan':>14}{'indexed':>14}")
+            rows = [
+                ("lookup by id",
+                 timed(lambda: [scan_find(todos, i) for i in ids], 1) / len(ids),
+                 timed(lambda: [todo_list.get_todo(i) for i in ids], 100) / len(ids)),
+                ("active + category + priority",
+                 timed(lambda: scan_filter(todos, False, "work", "high"), 3),
+                 timed(lambda: todo_list.get_todos(False, "work", "high"), 30)),
+                ("active todos",
+                 timed(lambda: [t for t in todos if not t["completed"]], 3),
+                 timed(lambda: todo_list.get_todos(filter_completed=False), 30)),
+                ("categories",
+                 timed(lambda: sorted(set(t["category"] for t in todos)), 3),
+                 timed(todo_list.get_categories, 1000)),
+            ]
+            for name, scan, indexed in rows:
+                print(f"{name:<36}{scan:>14.4f}{indexed:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
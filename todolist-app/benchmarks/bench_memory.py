@@ -0,0 +1,61 @@
+"""Compare the memory used by todo dicts and TodoRecord objects.
+
+Usage: python benchmarks/bench_memory.py [--size 1000000]
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from todo_record import TodoRecord
+
+CATEGORIES = ["work", "home", "errands", "health", "study"]
+PRIORITIES = ["low", "medium", "high"]
+
+
+def sample_todos(size):
+    """Todo dicts as json.load would produce them (no shared value strings)"""
+    for todo_id in range(1, size + 1):
+        yield json.loads(json.dumps({
+            "id": todo_id,
+            "title": f"Todo number {todo_id}",
+            "description": "",
+            "created_date": f"2025-{todo_id % 12 + 1:02d}-{todo_id % 28 + 1:02d} 09:30:00",
+            "due_date": f"2026-{todo_id % 12 + 1:02d}-15" if todo_id % 3 else None,
+            "priority": PRIORITIES[todo_id % 3],
+            "category": CATEGORIES[todo_id % 5],
+            "completed": todo_id % 4 == 0,
+            "completed_date": "2025-12-31 18:00:00" if todo_id % 4 == 0 else None
+        }))
+
+
+def measure(build, size):
+    gc.collect()
+    tracemalloc.start()
+    todos = build(sample_todos(size))
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del todos
+    return current
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    as_dicts = measure(list, args.size)
+    as_records = measure(lambda todos: [TodoRecord.from_dict(t) for t in todos], args.size)
+    print(f"{args.size:,} todos")
+    print(f"{'dict':<12}{as_dicts / 2**20:>10.1f} MiB{as_dicts / args.size:>10.0f} B/todo")
+    print(f"{'TodoRecord':<12}{as_records / 2**20:>10.1f} MiB{as_records / args.size:>10.0f} B/todo")
+    print(f"saving {1 - as_records / as_dicts:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark the reminder timer wheel with many pending reminders.
+
+Schedules reminders spread over the next year, then advances the wheel
+through simulated time and reports the cost of scheduling and of each tick.
+
+Usage: python benchmarks/bench_reminders.py [--count 1000000] [--days 30]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from todo_reminders import TimerWheel
+
+DAY = 24 * 3600
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=30, help="Simulated days to advance")
+    parser.add_argument("--tick", type=float, default=60.0, help="Tick length in seconds")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    wheel = TimerWheel(tick=args.tick, now=0)
+    fired = 0
+
+    def fire():
+        nonlocal fired
+        fired += 1
+
+    start = time.perf_counter()
+    for _ in range(args.count):
+        wheel.schedule(rng.uniform(0, 365 * DAY), fire)
+    elapsed = time.perf_counter() - start
+    print(f"schedule {args.count} reminders: {elapsed:.2f}s "
+          f"({elapsed / args.count * 1e6:.2f} us each)")
+
+    ticks = int(args.days * DAY / args.tick)
+    start = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        wheel.advance(tick * args.tick)
+    elapsed = time.perf_counter() - start
+    print(f"advance {ticks} ticks, {fired} fired: {elapsed:.2f}s "
+          f"({elapsed / ticks * 1e6:.2f} us per tick)")
+    print(f"{len(wheel)} reminders still pending")
+
+
+if __name__ == "__main__":
+    main()
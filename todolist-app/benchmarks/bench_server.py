@@ -0,0 +1,110 @@
+"""Load-test the todo HTTP service and report requests per second.
+
+Starts todo_server.py on a temporary todo file in a separate process (or
+uses --host/--port of a running one), then runs concurrent keep-alive
+clients issuing a mix of reads and writes for a fixed time.
+
+Usage: python benchmarks/bench_server.py [--clients 50] [--seconds 10] [--writes 0.1]
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER = Path(__file__).parent.parent / "todo_server.py"
+
+
+async def request(reader, writer, method, path, body=None):
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, deadline, write_ratio, seed, stats):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            roll = rng.random()
+            if roll < write_ratio:
+                status = await request(reader, writer, "POST", "/todos",
+                                       {"title": f"Load test {seed}", "category": "bench"})
+                kind = "write"
+            elif roll < (1 + write_ratio) / 2:
+                status = await request(reader, writer, "GET", "/todos?completed=false&limit=20")
+                kind = "list"
+            else:
+                status = await request(reader, writer, "GET", f"/todos/{rng.randint(1, 1000)}")
+                kind = "get"
+            stats.setdefault(kind, []).append(time.perf_counter() - start)
+            if status >= 500:
+                stats["errors"] = stats.get("errors", 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, clients, seconds, write_ratio):
+    stats = {}
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, deadline, write_ratio, seed, stats)
+                           for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    total = sum(len(v) for k, v in stats.items() if k != "errors")
+    print(f"{clients} clients, {elapsed:.1f}s: {total} requests, {total / elapsed:.0f} req/s, "
+          f"{stats.get('errors', 0)} errors")
+    for kind in ("get", "list", "write"):
+        latencies = sorted(stats.get(kind, []))
+        if latencies:
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            print(f"  {kind:5} {len(latencies):8} requests  p50 {p50:.2f} ms  p99 {p99:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None,
+                        help="Port of a running server (default: start one)")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--writes", type=float, default=0.1, help="Share of requests that add a todo")
+    args = parser.parse_args(argv)
+
+    if args.port is not None:
+        asyncio.run(run(args.host, args.port, args.clients, args.seconds, args.writes))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen(
+            [sys.executable, str(SERVER), "--file", str(Path(tmp) / "todos.json"),
+             "--host", args.host, "--port", "0"],
+            stdout=subprocess.PIPE, text=True)
+        try:
+            # "Serving todos on http://host:port"
+            port = int(server.stdout.readline().rsplit(":", 1)[1])
+            asyncio.run(run(args.host, port, args.clients, args.seconds, args.writes))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
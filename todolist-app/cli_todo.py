@@ -1,101 +1,758 @@
+import argparse
 import json
 import os
-from datetime import datetime, date
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from itertools import islice
+from operator import itemgetter
+from todo_archive import TodoArchive
+from todo_deps import DependencyGraph, prerequisites
+from todo_due import DueIndex
+from todo_history import UndoHistory
+from todo_index import TodoIndex
+from todo_journal import TodoJournal
+from todo_query import compile_query
+from todo_record import TIMESTAMP_FORMAT, TodoRecord
+from todo_search import SearchIndex
+from todo_sort import SORT_KEYS, SortedIndex, check_sort, make_cursor
+from todo_stats import TodoStats, compute_stats
+from todo_stream import iter_json_array
 
 class TodoList:
-    def __init__(self):
-        self.todo_file = "todos.json"
+    # The snapshot is rewritten once the journal holds this many records, or
+    # as many records as there are todos, whichever is larger. That keeps the
+    # cost of compaction amortized O(1) per mutation.
+    COMPACT_MIN = 1000
+    # archive_completed() moves todos completed longer ago than this
+    ARCHIVE_AFTER_DAYS = 30
+
+    def __init__(self, todo_file="todos.json", write_behind=False, load_completed=True):
+        self.todo_file = todo_file
+        self.journal = TodoJournal(os.path.splitext(todo_file)[0] + ".journal")
+        self.archive = TodoArchive(os.path.splitext(todo_file)[0] + ".archive")
+        # With write_behind, journal records are queued in memory and only
+        # written by flush(), typically from a background DebouncedWriter.
+        # The lock guards the indexes against that thread.
+        self.write_behind = write_behind
+        self._unwritten = []
+        self._lock = threading.RLock()
+        self._txn_depth = 0
+        self._txn_records = []
+        self._txn_before = {}
+        self._listeners = []
+        # Secondary indexes, kept up to date incrementally: every change to a
+        # todo is passed to each of them, and a reload clears and refills
+        # them. Each one provides clear(), add(todo), update(todo, old) and
+        # remove(todo). Sorted indexes join the list when first used.
+        self.search_index = SearchIndex()
+        self.due_index = DueIndex()
+        self.stats_index = TodoStats()
+        self.dependencies = DependencyGraph()
+        self.secondary_indexes = [self.search_index, self.due_index, self.stats_index,
+                                  self.dependencies]
+        # sort_by -> SortedIndex, created the first time a page is requested
+        self.sorted_indexes = {}
+        # Without load_completed, completed todos in the snapshot are skipped
+        # at startup and only loaded by ensure_completed_loaded(), which every
+        # method that may need them calls first. Journal records touching
+        # them are kept in _deferred until then.
+        self.completed_loaded = load_completed
+        self._unloaded = set()
+        self._deferred = []
+        # Inverse deltas of the changes made through this object, for undo()
+        self.undo_history = UndoHistory()
         self.load_todos()
 
+    @property
+    def todos(self):
+        """All todos, ordered by id"""
+        self.ensure_completed_loaded()
+        return self.index.find()
+
     def load_todos(self):
-        """Load existing todos from file"""
+        """Load the todos snapshot and replay the journal on top of it.
+
+        The snapshot is streamed one todo at a time, so a large file is never
+        held in memory as a whole.
+        """
+        with self._lock, self.journal.locked():
+            self._load_snapshot()
+            for record in self.journal.replay():
+                self._apply(record)
+        self._notify("reset", None)
+
+    def _load_snapshot(self):
+        self._reset()
         if os.path.exists(self.todo_file):
             try:
-                with open(self.todo_file, "r") as f:
-                    self.todos = json.load(f)
-            except json.JSONDecodeError:
-                self.todos = []
-        else:
-            self.todos = []
+                for todo in iter_json_array(self.todo_file):
+                    self.next_id = max(self.next_id, todo["id"] + 1)
+                    if not self.completed_loaded and todo.get("completed"):
+                        self._unloaded.add(todo["id"])
+                    else:
+                        self._insert(TodoRecord.from_dict(todo))
+            except ValueError:
+                self._reset()
+
+    def _reset(self):
+        self.index = TodoIndex()
+        for index in self.secondary_indexes:
+            index.clear()
+        self.next_id = 1
+        self._unloaded = set()
+        self._deferred = []
+
+    def ensure_completed_loaded(self):
+        """Load the completed todos skipped at startup, if any"""
+        with self._lock:
+            if self.completed_loaded:
+                return
+            self.completed_loaded = True
+            with self.journal.locked():
+                if self.journal.stored_version() != self.journal.version:
+                    # The snapshot we skipped them in is gone; the reload
+                    # brings in everything from the new one
+                    self._merge(self._unwritten)
+                    return
+                if self._unloaded:
+                    for todo in iter_json_array(self.todo_file):
+                        if todo["id"] in self._unloaded:
+                            self._insert(TodoRecord.from_dict(todo))
+            self._unloaded = set()
+            deferred = self._deferred
+            self._deferred = []
+            for record in deferred:
+                self._apply(record)
+
+    def _get(self, todo_id):
+        """Look up a todo, loading the completed ones if it may be among them"""
+        todo = self.index.get(todo_id)
+        if todo is None and todo_id in self._unloaded:
+            self.ensure_completed_loaded()
+            todo = self.index.get(todo_id)
+        return todo
 
     def save_todos(self):
-        """Save todos to file"""
-        with open(self.todo_file, "w") as f:
-            json.dump(self.todos, f, indent=4)
-
-    def add_todo(self, title, description="", due_date=None, priority="medium", category="general"):
-        """Add a new todo item"""
-        todo = {
-            "id": len(self.todos) + 1,
-            "title": title,
-            "description": description,
-            "created_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "due_date": due_date,
-            "priority": priority,
-            "category": category,
-            "completed": False,
-            "completed_date": None
-        }
-        self.todos.append(todo)
-        self.save_todos()
+        """Write a full snapshot of the todos and reset the journal"""
+        self.ensure_completed_loaded()
+        with self._lock, self.journal.locked():
+            # Fold in what other processes wrote, or it would be lost
+            self._merge(self._unwritten)
+            todos = self.index.find()
+            tmp_file = self.todo_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(todos, f, indent=4, default=dict)
+            os.replace(tmp_file, self.todo_file)
+            self.journal.truncate()
+            if self.next_id > (todos[-1]["id"] if todos else 0) + 1:
+                # Ids of deleted todos are never handed out again; the
+                # snapshot alone would start over after its highest id
+                self.journal.append_many([{"op": "next_id", "next_id": self.next_id}])
+
+    def refresh(self):
+        """Pick up changes other processes made since the last sync.
+
+        Only the journal records appended since then are read, unless the
+        journal was compacted in between. Queued write-behind records are
+        written at the same time. Change events fire in the calling thread.
+        Returns whether anything was read or written.
+        """
+        with self._lock, self.journal.locked():
+            if self.journal.is_current() and not self._unwritten:
+                return False
+            if self._unwritten:
+                self.flush()
+            else:
+                self._merge([])
+            return True
+
+    def _merge(self, pending):
+        """Apply records other processes appended since our last read.
+
+        ``pending`` are this process's records that are applied in memory
+        but not written yet. They are re-applied after the foreign ones so
+        memory ends up in the order the journal will have. A todo added by
+        another process takes precedence over a pending add with the same
+        id; ours is moved to a fresh id. Called with the journal locked.
+        """
+        records = self.journal.read_new()
+        if records == []:
+            return
+        pending_adds = {op["todo"]["id"]: op["todo"]
+                        for op in flatten(pending) if op["op"] == "add"}
+        reloaded = records is None
+        if reloaded:
+            # Compacted by another process: start over from the new snapshot
+            self._load_snapshot()
+            for todo_id in list(pending_adds):
+                if todo_id in self.index or todo_id in self._unloaded:
+                    self._renumber(pending_adds, todo_id, pending)
+            records = self.journal.replay()
+        for record in records:
+            for op in flatten([record]):
+                if op["op"] == "add" and op["todo"]["id"] in pending_adds:
+                    self._renumber(pending_adds, op["todo"]["id"], pending)
+                self._apply(op)
+        for record in pending:
+            self._apply(record)
+        if reloaded:
+            self._notify("reset", None)
+
+    def _renumber(self, pending_adds, todo_id, pending):
+        """Move a pending, not yet written todo to the next free id"""
+        todo = pending_adds.pop(todo_id)
+        new_id = self.next_id
+        self.next_id += 1
+        if self.index.get(todo_id) is todo:
+            self._remove(todo)
+            todo["id"] = new_id
+            self._add(todo)
+        else:
+            todo["id"] = new_id
+        for op in flatten(pending):
+            if op.get("id") == todo_id:
+                op["id"] = new_id
+        self.undo_history.renumber(todo_id, new_id)
+        pending_adds[new_id] = todo
+
+    def subscribe(self, listener):
+        """Call ``listener(event, todo, old)`` after every change.
+
+        ``event`` is "add", "update", "delete" or "reset" (everything was
+        reloaded, ``todo`` is None). For updates ``old`` holds the previous
+        values of the fields that were set; otherwise it is None.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, event, todo, old=None):
+        for listener in self._listeners:
+            listener(event, todo, old)
+
+    def _add(self, todo):
+        with self._lock:
+            self.index.add(todo)
+            for index in self.secondary_indexes:
+                index.add(todo)
+        self._notify("add", todo)
+
+    def _update(self, todo, fields):
+        old = {field: todo.get(field) for field in fields}
+        with self._lock:
+            self.index.update(todo, fields)
+            for index in self.secondary_indexes:
+                index.update(todo, old)
+        self._notify("update", todo, old)
+
+    def _remove(self, todo):
+        with self._lock:
+            self.index.remove(todo)
+            for index in self.secondary_indexes:
+                index.remove(todo)
+        self._notify("delete", todo)
+
+    def _insert(self, todo):
+        """Add a todo to the indexes, replacing any todo with the same id"""
+        existing = self.index.get(todo["id"])
+        if existing is todo:
+            return todo
+        if existing is not None:
+            self._update(existing, todo)
+            return existing
+        self._add(todo)
+        self.next_id = max(self.next_id, todo["id"] + 1)
+        return todo
+
+    def _apply(self, record):
+        """Apply a journal record to the in-memory todos.
+
+        Records set state rather than describe changes (``add`` is an upsert,
+        ``delete`` of a missing id is a no-op), so replaying a journal over a
+        snapshot that already contains its effects is harmless.
+        """
+        op = record["op"]
+        if op == "next_id":
+            self.next_id = max(self.next_id, record["next_id"])
+            return
+        if op != "batch" and self._unloaded:
+            todo_id = record["todo"]["id"] if op == "add" else record["id"]
+            if todo_id in self._unloaded:
+                self._deferred.append(record)
+                return
+        if op == "add":
+            todo = record["todo"]
+            self._insert(todo if isinstance(todo, TodoRecord) else TodoRecord.from_dict(todo))
+        elif op in ("update", "complete"):
+            todo = self.index.get(record["id"])
+            if todo is not None:
+                self._update(todo, record["fields"])
+        elif op == "delete":
+            todo = self.index.get(record["id"])
+            if todo is not None:
+                self._remove(todo)
+        elif op == "batch":
+            for op_record in record["ops"]:
+                self._apply(op_record)
+
+    def _log(self, record):
+        """Persist a mutation, or hold it back until the transaction commits"""
+        if self._txn_depth:
+            self._txn_records.append(record)
+            return
+        self._write(record)
+        self.undo_history.end_step()
+
+    def _write(self, record):
+        with self._lock:
+            self._unwritten.append(record)
+        if not self.write_behind:
+            self.flush()
+
+    def flush(self, merge=True):
+        """Write journal records queued up by write-behind mode.
+
+        If other processes appended to the journal since our last read,
+        their records are merged in first (see refresh()). Background
+        threads pass ``merge=False``: the records then stay queued until
+        the next call from the thread that owns the listeners, and False is
+        returned.
+        """
+        with self._lock:
+            if not self._unwritten:
+                return True
+            with self.journal.locked():
+                if not merge and not self.journal.is_current():
+                    return False
+                self._merge(self._unwritten)
+                self.journal.append_many(self._unwritten)
+                self._unwritten = []
+                self._maybe_compact()
+        return True
+
+    def _maybe_compact(self):
+        if self.journal.count >= max(self.COMPACT_MIN, len(self.index)):
+            self.save_todos()
+
+    def _remember(self, todo_id):
+        """Keep the pre-transaction state of a todo so it can be rolled back"""
+        if self._txn_depth and todo_id not in self._txn_before:
+            todo = self.index.get(todo_id)
+            self._txn_before[todo_id] = None if todo is None else (todo, dict(todo))
+
+    @contextmanager
+    def transaction(self):
+        """Apply several mutations in memory and persist them once.
+
+        The mutations are written as a single journal record when the
+        outermost ``with`` block exits, or all undone if it raises. Nested
+        transactions join the enclosing one.
+        """
+        self._txn_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._txn_depth -= 1
+            if not self._txn_depth:
+                self._rollback()
+            raise
+        self._txn_depth -= 1
+        if not self._txn_depth:
+            self._commit()
+
+    def _commit(self):
+        records = self._txn_records
+        self._txn_records = []
+        self._txn_before = {}
+        if records:
+            self._write({"op": "batch", "ops": records})
+        self.undo_history.end_step()
+
+    def _rollback(self):
+        for todo_id, before in self._txn_before.items():
+            current = self.index.get(todo_id)
+            if before is None:
+                if current is not None:
+                    self._remove(current)
+            elif current is None:
+                todo, fields = before
+                for key in [key for key in todo if key not in fields]:
+                    del todo[key]
+                todo.update(fields)
+                self._add(todo)
+            else:
+                # Keys the transaction added (like depends_on) go away too
+                added = {key: None for key in current if key not in before[1]}
+                self._update(current, dict(before[1], **added))
+                for key in added:
+                    del current[key]
+        self._txn_records = []
+        self._txn_before = {}
+        self.undo_history.discard_step()
+
+    def close(self):
+        """Write anything still queued and release the journal file handle"""
+        self.flush()
+        self.journal.close()
+
+    def add_todo(self, title, description="", due_date=None, priority="medium", category="general",
+                 depends_on=None):
+        """Add a new todo item, optionally waiting for the todos in ``depends_on``"""
+        for prerequisite in depends_on or ():
+            if self._get(prerequisite) is None:
+                raise ValueError(f"todo {prerequisite} not found")
+        todo = TodoRecord(
+            id=self.next_id,
+            title=title,
+            description=description,
+            created_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            due_date=due_date,
+            priority=priority,
+            category=category
+        )
+        if depends_on:
+            todo["depends_on"] = list(depends_on)
+        self._put(todo)
         return todo["id"]
 
     def complete_todo(self, todo_id):
         """Mark a todo as completed"""
-        for todo in self.todos:
-            if todo["id"] == todo_id:
-                todo["completed"] = True
-                todo["completed_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self.save_todos()
-                return True
-        return False
+        todo = self._get(todo_id)
+        if todo is None:
+            return False
+        fields = {
+            "completed": True,
+            "completed_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self._set_fields(todo, fields, "complete")
+        return True
 
     def delete_todo(self, todo_id):
         """Delete a todo item"""
-        for todo in self.todos:
-            if todo["id"] == todo_id:
-                self.todos.remove(todo)
-                self.save_todos()
-                return True
-        return False
+        todo = self._get(todo_id)
+        if todo is None:
+            return False
+        with self.transaction():
+            for dependent_id in sorted(self.dependencies.dependents.get(todo_id, ())):
+                dependent = self.index.get(dependent_id)
+                if dependent is not None:
+                    self._set_fields(dependent, {"depends_on": [
+                        i for i in prerequisites(dependent) if i != todo_id]})
+            self.undo_history.record(("add", dict(todo)))
+            self._remember(todo_id)
+            self._remove(todo)
+            self._log({"op": "delete", "id": todo_id})
+        return True
 
-    def get_todos(self, filter_completed=None, category=None, priority=None):
-        """Get filtered todos"""
-        filtered_todos = self.todos
-        
+    def _put(self, todo, logged=None):
+        """Add a new todo and log it (as ``logged`` if given, else the todo)"""
+        self.undo_history.record(("delete", todo["id"]))
+        self._remember(todo["id"])
+        self._insert(todo)
+        self._log({"op": "add", "todo": logged or todo})
+
+    def _set_fields(self, todo, fields, op="update"):
+        self.undo_history.record(("update", todo["id"], {field: todo.get(field) for field in fields}))
+        self._remember(todo["id"])
+        self._update(todo, fields)
+        self._log({"op": op, "id": todo["id"], "fields": fields})
+
+    def get_todo(self, todo_id):
+        """Get a single todo by id, or None"""
+        return self._get(todo_id)
+
+    def get_todos(self, filter_completed=None, category=None, priority=None,
+                  sort_by="id", limit=None, after=None):
+        """Get filtered todos.
+
+        Todos are ordered by ``sort_by`` ("id", "due_date", "priority" or
+        "title"), ties broken by id. With ``limit`` at most that many are
+        returned; pass ``make_cursor(last_todo, sort_by)`` as ``after`` to
+        get the page that follows.
+        """
+        check_sort(sort_by)
+        if filter_completed is not False:
+            self.ensure_completed_loaded()
+        filters = {}
         if filter_completed is not None:
-            filtered_todos = [t for t in filtered_todos if t["completed"] == filter_completed]
-            
+            filters["completed"] = filter_completed
         if category:
-            filtered_todos = [t for t in filtered_todos if t["category"].lower() == category.lower()]
-            
+            filters["category"] = category
         if priority:
-            filtered_todos = [t for t in filtered_todos if t["priority"].lower() == priority.lower()]
-            
-        return filtered_todos
+            filters["priority"] = priority
+        if sort_by == "id" and limit is None and after is None:
+            return self.index.find(**filters)
+        with self._lock:
+            return self._page(filters, sort_by, limit, after)
+
+    def _sorted_index(self, sort_by):
+        sorted_index = self.sorted_indexes.get(sort_by)
+        if sorted_index is None:
+            sorted_index = self.sorted_indexes[sort_by] = SortedIndex(sort_by)
+            for todo in self.index.by_id.values():
+                sorted_index.add(todo)
+            self.secondary_indexes.append(sorted_index)
+        return sorted_index
+
+    def _page(self, filters, sort_by, limit, after):
+        """One page of matching todos from the pre-sorted index.
+
+        Without filters the page is a binary search and a slice. With
+        filters, the sorted index is walked and each todo checked, unless
+        the matches are so few that sorting just them is cheaper.
+        """
+        sorted_index = self._sorted_index(sort_by)
+        cursor = sorted_index.cursor_key(after)
+        if filters:
+            selected = len(self.index.smallest_bucket(filters))
+            if limit is None or limit * len(self.index) > selected * selected:
+                keys = sorted(sorted_index.keys[todo_id]
+                              for todo_id in self.index.matching(**filters))
+                start = 0 if cursor is None else bisect_right(keys, cursor)
+                end = None if limit is None else start + limit
+                return [sorted_index.docs[todo_id] for _, todo_id in keys[start:end]]
+        start = sorted_index.position(cursor)
+        todos = (todo for todo in sorted_index.iter_from(start)
+                 if self.index.matches(todo, filters))
+        return list(islice(todos, limit))
+
+    def archive_completed(self, older_than_days=None, now=None):
+        """Move todos completed more than ``older_than_days`` ago to the archive.
+
+        They are written to the archive first, then deleted here and the
+        snapshot is rewritten, so todos.json only holds recent work.
+        Returns the number of todos archived.
+        """
+        if older_than_days is None:
+            older_than_days = self.ARCHIVE_AFTER_DAYS
+        cutoff = ((now or datetime.now()) - timedelta(days=older_than_days)).strftime(TIMESTAMP_FORMAT)
+        self.ensure_completed_loaded()
+        with self._lock, self.journal.locked():
+            self._merge(self._unwritten)
+            old = [todo for todo in self.index.bucket("completed", True).values()
+                   if (todo["completed_date"] or "") < cutoff]
+            if not old:
+                return 0
+            self.archive.append(old)
+            with self.transaction():
+                for todo in old:
+                    self.delete_todo(todo["id"])
+            self.save_todos()
+            # Undoing would bring archived todos back while they stay in
+            # the archive, so archiving starts a new history
+            self.undo_history.clear()
+        return len(old)
+
+    def history(self, since=None, until=None, category=None):
+        """Archived todos completed between ``since`` and ``until`` (YYYY-MM-DD).
+
+        A generator: archive segments are only read as it is consumed.
+        """
+        return self.archive.history(since, until, category)
+
+    def stats(self):
+        """Counts per category and priority, completion rate and average
+        time to complete, from aggregates kept up to date on every change"""
+        self.ensure_completed_loaded()
+        return self.stats_index.summary()
+
+    def history_stats(self, since=None, until=None, category=None):
+        """The same stats, recomputed over archived todos"""
+        return compute_stats(self.history(since, until, category))
 
     def get_categories(self):
-        """Get list of all categories"""
-        return sorted(set(todo["category"] for todo in self.todos))
+        """Get list of all categories.
+
+        Does not load skipped completed todos, so categories only used by
+        those are missing until something else loads them.
+        """
+        return sorted(self.index.categories())
+
+    def search(self, query, limit=None):
+        """Full-text search over titles and descriptions, best matches first"""
+        self.ensure_completed_loaded()
+        return self.search_index.search(query, limit)
+
+    def query(self, text, limit=None):
+        """Todos matching a query such as ``priority:high !completed due<2026-11-01
+        report`` (see todo_query.Query), ordered by id.
+
+        Candidates come from the most selective index the query can use, so
+        a selective query does not scan the whole list. Raises ValueError
+        for a malformed query.
+        """
+        plan = compile_query(text)
+        if plan.needs_completed:
+            self.ensure_completed_loaded()
+        with self._lock:
+            return plan.run(self.index, self.due_index, self.search_index, limit)
+
+    def due_before(self, when):
+        """Incomplete todos due on or before the day of ``when``, soonest first.
+
+        ``when`` is a date, datetime, "YYYY-MM-DD" string or epoch seconds.
+        """
+        return self.due_index.due_before(when)
+
+    def overdue(self, today=None):
+        """Incomplete todos whose due date has passed, most overdue first"""
+        return self.due_index.overdue(today)
+
+    def next_due(self, n, today=None):
+        """The ``n`` incomplete todos due soonest, from today on"""
+        return self.due_index.next_due(n, today)
 
     def update_todo(self, todo_id, title=None, description=None, due_date=None, 
                    priority=None, category=None):
         """Update a todo item"""
-        for todo in self.todos:
-            if todo["id"] == todo_id:
-                if title is not None:
-                    todo["title"] = title
-                if description is not None:
-                    todo["description"] = description
-                if due_date is not None:
-                    todo["due_date"] = due_date
-                if priority is not None:
-                    todo["priority"] = priority
-                if category is not None:
-                    todo["category"] = category
-                self.save_todos()
-                return True
-        return False
+        todo = self._get(todo_id)
+        if todo is None:
+            return False
+        fields = {}
+        if title is not None:
+            fields["title"] = title
+        if description is not None:
+            fields["description"] = description
+        if due_date is not None:
+            fields["due_date"] = due_date
+        if priority is not None:
+            fields["priority"] = priority
+        if category is not None:
+            fields["category"] = category
+        self._set_fields(todo, fields)
+        return True
+
+    def add_many(self, todos):
+        """Add several todos, given as dicts of add_todo arguments, in one write"""
+        with self.transaction():
+            return [self.add_todo(**todo) for todo in todos]
+
+    def insert_many(self, todos):
+        """Add complete todos (e.g. imported rows) under new ids, in one write.
+
+        Unlike add_many, every field is taken from the given dicts, including
+        completion status and dates. Returns the new ids.
+        """
+        ids = []
+        with self.transaction():
+            for fields in todos:
+                fields = dict(fields, id=self.next_id)
+                todo = TodoRecord.from_dict(fields)
+                # The plain dict serializes much faster than the record
+                self._put(todo, logged=fields)
+                ids.append(todo["id"])
+        return ids
+
+    def update_many(self, updates):
+        """Apply several (todo_id, fields) updates in one write.
+
+        Returns the number of todos that were found and updated.
+        """
+        with self.transaction():
+            return sum(1 for todo_id, fields in updates if self.update_todo(todo_id, **fields))
+
+    def add_dependency(self, todo_id, depends_on):
+        """Make a todo wait for another one to be completed.
+
+        Returns False if either todo does not exist. Raises ValueError if
+        the link would close a cycle; only the prerequisites reachable from
+        ``depends_on`` are walked to find out.
+        """
+        self.ensure_completed_loaded()
+        todo = self._get(todo_id)
+        if todo is None or self._get(depends_on) is None:
+            return False
+        current = list(prerequisites(todo))
+        if depends_on in current:
+            return True
+        cycle = self.dependencies.would_cycle(todo_id, depends_on)
+        if cycle:
+            raise ValueError("that would create a cycle: " + " -> ".join(f"#{i}" for i in cycle))
+        self._set_fields(todo, {"depends_on": current + [depends_on]})
+        return True
+
+    def remove_dependency(self, todo_id, depends_on):
+        """Stop a todo waiting for another one; returns False if it did not"""
+        todo = self._get(todo_id)
+        if todo is None or depends_on not in prerequisites(todo):
+            return False
+        self._set_fields(todo, {"depends_on": [i for i in prerequisites(todo) if i != depends_on]})
+        return True
+
+    def ready(self):
+        """Open todos whose prerequisites are all completed, ordered by id.
+
+        Read from the ready set the dependency graph keeps up to date, so
+        the cost depends on the answer, not on the size of the list.
+        """
+        with self._lock:
+            return sorted(self.dependencies.ready.values(), key=itemgetter("id"))
+
+    def blocked_by(self, todo_id):
+        """Open todos that ``todo_id`` still waits for"""
+        with self._lock:
+            return self.dependencies.blocked_by(todo_id)
+
+    def critical_path(self):
+        """Longest chain of open todos each waiting for the one before it"""
+        with self._lock:
+            return self.dependencies.critical_path()
+
+    def undo(self):
+        """Revert the latest change made through this list (a single
+        mutation or a whole transaction); returns False if there is none"""
+        return self.undo_history.undo(self._revert)
+
+    def redo(self):
+        """Apply the latest undone change again; returns False if there is none"""
+        return self.undo_history.redo(self._revert)
+
+    def _revert(self, deltas):
+        """Apply inverse deltas (see UndoHistory) newest first, as one change.
+
+        Todos deleted or re-added by another process meanwhile are skipped.
+        """
+        with self.transaction():
+            for delta in reversed(deltas):
+                if delta[0] == "add":
+                    if self._get(delta[1]["id"]) is None:
+                        self._put(TodoRecord.from_dict(delta[1]))
+                    continue
+                todo = self._get(delta[1])
+                if todo is None:
+                    continue
+                if delta[0] == "delete":
+                    self.delete_todo(delta[1])
+                else:
+                    self._set_fields(todo, delta[2])
+
+def flatten(records):
+    """Yield the single operations in journal records, unpacking batches"""
+    for record in records:
+        if record["op"] == "batch":
+            yield from flatten(record["ops"])
+        else:
+            yield record
+
+def open_todo_list(backend="json", path=None, write_behind=False, load_completed=True):
+    """Create a todo list using the given storage backend ("json" or "sqlite")"""
+    if backend == "sqlite":
+        from todo_sqlite import SQLiteTodoList
+        return SQLiteTodoList(path or "todos.db")
+    return TodoList(path or "todos.json", write_behind=write_behind,
+                    load_completed=load_completed)
+
+def build_arg_parser(description):
+    """Command line options shared by the CLI and the GUI"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json",
+                        help="Storage backend (default: json)")
+    parser.add_argument("--file", default=None,
+                        help="Todo file (default: todos.json, or todos.db for sqlite)")
+    return parser
 
 def print_todo(todo):
     """Print a todo item in a formatted way"""
@@ -107,15 +764,100 @@ def print_todo(todo):
     print(f"Priority: {todo['priority']}")
     if todo["due_date"]:
         print(f"Due Date: {todo['due_date']}")
+    if todo.get("depends_on"):
+        print(f"Depends on: {', '.join(f'#{i}' for i in todo['depends_on'])}")
     print(f"Created: {todo['created_date']}")
     if todo["completed"]:
         print(f"Completed: {todo['completed_date']}")
     print("-" * 50)
 
-def main():
-    todo_list = TodoList()
+def format_duration(seconds):
+    """Rough human-readable length of a time span"""
+    if seconds is None:
+        return "n/a"
+    days, rest = divmod(int(seconds), 86400)
+    hours, rest = divmod(rest, 3600)
+    if days:
+        return f"{days}d {hours}h"
+    return f"{hours}h {rest // 60}m"
+
+def format_stats(stats):
+    """Lines of text describing a stats() result"""
+    lines = [
+        f"Total: {stats['total']}  Active: {stats['active']}  Completed: {stats['completed']}",
+        f"Completion rate: {stats['completion_rate']:.0%}",
+        f"Average time to complete: {format_duration(stats['avg_completion_seconds'])}",
+    ]
+    for title, groups in (("By category", stats["categories"]), ("By priority", stats["priorities"])):
+        lines.append(f"{title}:")
+        for name, counts in groups.items():
+            lines.append(f"  {name}: {counts['total']} ({counts['completed']} completed)")
+    return lines
+
+PAGE_SIZE = 20
+
+def print_pages(todo_list, heading, sort_by="id", page_size=PAGE_SIZE, **filters):
+    """Print matching todos a page at a time; returns whether there were any"""
+    after = None
+    while True:
+        todos = todo_list.get_todos(sort_by=sort_by, limit=page_size, after=after, **filters)
+        if not todos:
+            return after is not None
+        if after is None:
+            print(heading)
+        for todo in todos:
+            print_todo(todo)
+        if len(todos) < page_size:
+            return True
+        if input("\nPress Enter for more, or q to stop: ").strip().lower() == "q":
+            return True
+        after = make_cursor(todos[-1], sort_by)
+
+def ask_sort_order():
+    """Ask how to order a listing; returns None for an invalid answer"""
+    sort_by = input(f"Sort by ({'/'.join(SORT_KEYS)}, default: id): ").strip().lower() or "id"
+    if sort_by not in SORT_KEYS:
+        print("Invalid sort order.")
+        return None
+    return sort_by
+
+def run_command(args):
+    """Run an ``import`` or ``export`` command instead of the menu"""
+    from todo_io import export_todos, import_todos
+    todo_list = open_todo_list(args.backend, args.file)
+    try:
+        if args.command == "import":
+            imported, skipped, errors = import_todos(todo_list, args.path, args.format)
+            for line_no, message in errors:
+                print(f"{args.path}:{line_no}: {message}")
+            print(f"Imported {imported} todo(s), skipped {skipped} invalid row(s).")
+        else:
+            exported = export_todos(todo_list, args.path, args.format)
+            print(f"Exported {exported} todo(s) to {args.path}.")
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Error: {e}")
+    finally:
+        todo_list.close()
+
+def main(argv=None):
+    parser = build_arg_parser("Todo List Manager")
+    commands = parser.add_subparsers(dest="command")
+    for name, help_text in (("import", "Import todos from a CSV or NDJSON file"),
+                            ("export", "Export all todos to a CSV or NDJSON file")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path")
+        command.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                             help="File format (default: from the file extension)")
+    args = parser.parse_args(argv)
+    if args.command:
+        run_command(args)
+        return
+    # Completed todos are only loaded once a menu needs them
+    todo_list = open_todo_list(args.backend, args.file, load_completed=False)
     
     while True:
+        # Pick up what other processes (e.g. the GUI) changed meanwhile
+        todo_list.refresh()
         print("\nTodo List Manager")
         print("1. Add Todo")
         print("2. List Todos")
@@ -123,9 +865,15 @@ def main():
         print("4. Update Todo")
         print("5. Delete Todo")
         print("6. Filter Todos")
-        print("7. Exit")
+        print("7. Search Todos")
+        print("8. Archive & History")
+        print("9. Stats")
+        print("10. Dependencies")
+        print("11. Undo")
+        print("12. Redo")
+        print("13. Exit")
         
-        choice = input("\nEnter your choice (1-7): ")
+        choice = input("\nEnter your choice (1-13): ")
         
         if choice == "1":
             title = input("Enter todo title: ")
@@ -146,25 +894,17 @@ def main():
             print(f"\nTodo added successfully with ID: {todo_id}")
 
         elif choice == "2":
-            todos = todo_list.get_todos()
-            if not todos:
-                print("No todos found.")
+            sort_by = ask_sort_order()
+            if sort_by is None:
                 continue
-                
-            print("\nYour Todos:")
-            for todo in todos:
-                print_todo(todo)
+            if not print_pages(todo_list, "\nYour Todos:", sort_by):
+                print("No todos found.")
 
         elif choice == "3":
-            todos = todo_list.get_todos(filter_completed=False)
-            if not todos:
+            if not print_pages(todo_list, "\nIncomplete Todos:", filter_completed=False):
                 print("No incomplete todos found.")
                 continue
                 
-            print("\nIncomplete Todos:")
-            for todo in todos:
-                print_todo(todo)
-                
             try:
                 todo_id = int(input("\nEnter todo ID to complete (0 to cancel): "))
                 if todo_id == 0:
@@ -177,15 +917,10 @@ def main():
                 print("Invalid input. Please enter a number.")
 
         elif choice == "4":
-            todos = todo_list.get_todos()
-            if not todos:
+            if not print_pages(todo_list, "\nYour Todos:"):
                 print("No todos found.")
                 continue
                 
-            print("\nYour Todos:")
-            for todo in todos:
-                print_todo(todo)
-                
             try:
                 todo_id = int(input("\nEnter todo ID to update (0 to cancel): "))
                 if todo_id == 0:
@@ -217,15 +952,10 @@ def main():
                 print("Invalid input. Please enter a number.")
 
         elif choice == "5":
-            todos = todo_list.get_todos()
-            if not todos:
+            if not print_pages(todo_list, "\nYour Todos:"):
                 print("No todos found.")
                 continue
                 
-            print("\nYour Todos:")
-            for todo in todos:
-                print_todo(todo)
-                
             try:
                 todo_id = int(input("\nEnter todo ID to delete (0 to cancel): "))
                 if todo_id == 0:
@@ -242,13 +972,13 @@ def main():
             print("1. By Status")
             print("2. By Category")
             print("3. By Priority")
+            print("4. By Query")
             
-            filter_choice = input("\nEnter filter choice (1-3): ")
+            filter_choice = input("\nEnter filter choice (1-4): ")
             
             if filter_choice == "1":
                 status_choice = input("Show completed todos? (y/n): ").lower()
-                filter_completed = status_choice == 'y'
-                todos = todo_list.get_todos(filter_completed=filter_completed)
+                filters = {"filter_completed": status_choice == 'y'}
             
             elif filter_choice == "2":
                 categories = todo_list.get_categories()
@@ -257,26 +987,142 @@ def main():
                     continue
                 print("\nCategories:", ", ".join(categories))
                 category = input("Enter category to filter by: ").lower()
-                todos = todo_list.get_todos(category=category)
+                filters = {"category": category}
             
             elif filter_choice == "3":
                 print("\nPriority levels: low, medium, high")
                 priority = input("Enter priority to filter by: ").lower()
-                todos = todo_list.get_todos(priority=priority)
+                filters = {"priority": priority}
+            
+            elif filter_choice == "4":
+                print("\nCombine terms, e.g.: priority:high category:work due<2026-11-01 !completed \"report\"")
+                try:
+                    todos = todo_list.query(input("Enter query: "))
+                except ValueError as e:
+                    print(f"Invalid query: {e}")
+                    continue
+                if not todos:
+                    print("No matching todos found.")
+                    continue
+                print(f"\n{len(todos)} matching todo(s):")
+                for todo in todos:
+                    print_todo(todo)
+                continue
             
             else:
                 print("Invalid filter choice.")
                 continue
             
+            sort_by = ask_sort_order()
+            if sort_by is None:
+                continue
+            if not print_pages(todo_list, "\nFiltered Todos:", sort_by, **filters):
+                print("No matching todos found.")
+
+        elif choice == "7":
+            query = input("Enter search words: ")
+            todos = todo_list.search(query, limit=20)
             if not todos:
                 print("No matching todos found.")
                 continue
-                
-            print("\nFiltered Todos:")
+            
+            print("\nBest Matches:")
             for todo in todos:
                 print_todo(todo)
 
-        elif choice == "7":
+        elif choice == "8":
+            print("\n1. Archive old completed todos")
+            print("2. Show history")
+            archive_choice = input("\nEnter choice (1-2): ")
+            
+            if archive_choice == "1":
+                days = input(f"Archive todos completed more than how many days ago? "
+                             f"(default: {TodoList.ARCHIVE_AFTER_DAYS}): ").strip()
+                try:
+                    archived = todo_list.archive_completed(int(days) if days else None)
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+                    continue
+                print(f"{archived} todo(s) archived.")
+            
+            elif archive_choice == "2":
+                since = input("Completed since (YYYY-MM-DD) or press Enter for all: ").strip()
+                until = input("Completed until (YYYY-MM-DD) or press Enter for all: ").strip()
+                shown = 0
+                for todo in todo_list.history(since or None, until or None):
+                    if shown == 0:
+                        print("\nArchived Todos:")
+                    print_todo(todo)
+                    shown += 1
+                    if shown % PAGE_SIZE == 0 and input(
+                            "\nPress Enter for more, or q to stop: ").strip().lower() == "q":
+                        break
+                if not shown:
+                    print("No archived todos found.")
+            
+            else:
+                print("Invalid choice.")
+
+        elif choice == "9":
+            print("\nStats:")
+            print("\n".join(format_stats(todo_list.stats())))
+            if input("\nInclude archived history? (y/n): ").lower() == "y":
+                print("\nArchived:")
+                print("\n".join(format_stats(todo_list.history_stats())))
+
+        elif choice == "10":
+            print("\n1. Show ready todos")
+            print("2. Add dependency")
+            print("3. Remove dependency")
+            print("4. Show critical path")
+            deps_choice = input("\nEnter choice (1-4): ")
+            
+            if deps_choice == "1":
+                todos = todo_list.ready()
+                if not todos:
+                    print("No todos are ready.")
+                    continue
+                print("\nReady Todos:")
+                for todo in todos:
+                    print_todo(todo)
+            
+            elif deps_choice in ("2", "3"):
+                try:
+                    todo_id = int(input("Enter todo ID: "))
+                    depends_on = int(input("Enter ID of the todo it waits for: "))
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+                    continue
+                if deps_choice == "3":
+                    found = todo_list.remove_dependency(todo_id, depends_on)
+                    print("Dependency removed." if found else "No such dependency.")
+                    continue
+                try:
+                    found = todo_list.add_dependency(todo_id, depends_on)
+                except ValueError as e:
+                    print(f"Cannot add dependency: {e}")
+                    continue
+                print("Dependency added." if found else "Todo not found.")
+            
+            elif deps_choice == "4":
+                path = todo_list.critical_path()
+                if not path:
+                    print("No open todos.")
+                    continue
+                print(f"\nCritical path ({len(path)} step(s)):")
+                print(" -> ".join(f"#{todo['id']} {todo['title']}" for todo in path))
+            
+            else:
+                print("Invalid choice.")
+
+        elif choice == "11":
+            print("Undone." if todo_list.undo() else "Nothing to undo.")
+
+        elif choice == "12":
+            print("Redone." if todo_list.redo() else "Nothing to redo.")
+
+        elif choice == "13":
+            todo_list.close()
             print("Goodbye!")
             break
         
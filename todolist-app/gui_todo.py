@@ -2,17 +2,28 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import Calendar
 from datetime import datetime
-from cli_todo import TodoList
+from cli_todo import build_arg_parser, format_stats, open_todo_list
+from virtual_tree import VirtualTreeview
+from autosave import DebouncedWriter
+from todo_reminders import TodoReminders
 import json
 
 class TodoGUI:
-    def __init__(self, root):
+    # Milliseconds between checks for changes made by other processes
+    POLL_INTERVAL = 1000
+    
+    def __init__(self, root, todo_list=None):
         self.root = root
         self.root.title("Todo List Manager")
         self.root.geometry("800x600")
         
         # Initialize todo list
-        self.todo_list = TodoList()
+        self.todo_list = todo_list if todo_list is not None else open_todo_list(write_behind=True)
+        
+        # Changes are written to disk in the background, after a short pause.
+        # Changes from other processes are merged in on the Tk thread only.
+        self.writer = DebouncedWriter(lambda: self.todo_list.flush(merge=False))
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Theme configuration
         self.setup_theme()
@@ -20,8 +31,15 @@ class TodoGUI:
         # Create GUI elements
         self.setup_gui()
         
-        # Load todos
+        # Load todos and follow changes row by row from now on
         self.load_todos()
+        self.todo_list.subscribe(self.on_todo_changed)
+        self.update_save_status()
+        
+        # Due-date reminders, fired from the Tk event loop
+        self.reminders = TodoReminders(self.todo_list, self.show_reminder)
+        self.tick_reminders()
+        self.poll_changes()
         
     def setup_theme(self):
         """Configure the application theme"""
@@ -56,9 +74,24 @@ class TodoGUI:
         ttk.Radiobutton(filters_frame, text="Completed", variable=self.status_var,
                        value="completed", command=self.apply_filters).pack(side=tk.LEFT)
         
+        # Search
+        self.search_var = tk.StringVar()
+        self.search_job = None
+        ttk.Label(filters_frame, text="Search:").pack(side=tk.LEFT, padx=(10, 2))
+        search_entry = ttk.Entry(filters_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        search_entry.bind("<KeyRelease>", self.on_search_changed)
+        
+        # Query filter, e.g. "priority:high due<2026-11-01"
+        self.query_var = tk.StringVar()
+        ttk.Label(filters_frame, text="Filter:").pack(side=tk.LEFT, padx=(10, 2))
+        query_entry = ttk.Entry(filters_frame, textvariable=self.query_var)
+        query_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        query_entry.bind("<KeyRelease>", self.on_search_changed)
+        
         # Todo list
         self.todo_tree = ttk.Treeview(self.list_frame, columns=("ID", "Title", "Due", "Priority", "Category"),
-                                    show="headings", selectmode="browse")
+                                    show="headings", selectmode="extended")
         self.todo_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Configure columns
@@ -74,11 +107,10 @@ class TodoGUI:
         self.todo_tree.column("Priority", width=80)
         self.todo_tree.column("Category", width=100)
         
-        # Scrollbar
-        tree_scroll = ttk.Scrollbar(self.list_frame, orient=tk.VERTICAL, 
-                                  command=self.todo_tree.yview)
+        # Scrollbar, driven by the virtual tree so only visible rows exist
+        tree_scroll = ttk.Scrollbar(self.list_frame, orient=tk.VERTICAL)
         tree_scroll.grid(row=1, column=1, sticky=(tk.N, tk.S))
-        self.todo_tree["yscrollcommand"] = tree_scroll.set
+        self.virtual_tree = VirtualTreeview(self.todo_tree, tree_scroll, self.todo_row_values)
         
         # Right side - Todo details
         self.details_frame = ttk.LabelFrame(self.main_frame, text="Todo Details", padding="5")
@@ -133,6 +165,26 @@ class TodoGUI:
                   command=self.complete_todo).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Delete", 
                   command=self.delete_todo).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Undo",
+                  command=self.undo).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Redo",
+                  command=self.redo).pack(side=tk.LEFT, padx=5)
+        
+        # Stats
+        stats_frame = ttk.LabelFrame(self.details_frame, text="Stats", padding="5")
+        stats_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N))
+        self.stats_var = tk.StringVar()
+        ttk.Label(stats_frame, textvariable=self.stats_var, justify=tk.LEFT).pack(anchor=tk.W)
+        
+        # Save status
+        self.save_status_var = tk.StringVar()
+        ttk.Label(self.main_frame, textvariable=self.save_status_var).grid(
+            row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        # Latest reminder
+        self.reminder_var = tk.StringVar()
+        ttk.Label(self.main_frame, textvariable=self.reminder_var,
+                  foreground="red").grid(row=2, column=0, columnspan=2, sticky=tk.W)
         
         # Configure grid weights
         self.main_frame.columnconfigure(1, weight=1)
@@ -142,45 +194,105 @@ class TodoGUI:
         self.details_frame.columnconfigure(1, weight=1)
         
         # Bind selection event
-        self.todo_tree.bind("<<TreeviewSelect>>", self.on_select_todo)
-        
+        self.todo_tree.bind("<<VirtualSelect>>", self.on_select_todo)
+        
+        # Undo/redo shortcuts, for the todo list as a whole: in a text field
+        # they are left to the field (see typing_in)
+        for sequence in ("<Control-z>", "<Control-Z>"):
+            self.root.bind(sequence, self.undo)
+        for sequence in ("<Control-y>", "<Control-Y>"):
+            self.root.bind(sequence, self.redo)
+        
+    def todo_row_values(self, todo):
+        """Column values of a todo in the tree view"""
+        return (
+            todo["id"],
+            todo["title"],
+            todo["due_date"] or "",
+            todo["priority"],
+            todo["category"]
+        )
+    
     def load_todos(self):
         """Load and display todos in the tree view"""
-        # Clear existing items
-        for item in self.todo_tree.get_children():
-            self.todo_tree.delete(item)
-        
-        # Update category list
+        self.update_categories()
+        self.update_stats()
+        self.apply_filters()
+    
+    def update_stats(self):
+        """Refresh the stats panel from the list's running aggregates"""
+        self.stats_var.set("\n".join(format_stats(self.todo_list.stats())))
+    
+    def update_categories(self):
+        """Refresh the category choices"""
         categories = self.todo_list.get_categories()
         self.category_combo["values"] = ["general"] + [c for c in categories if c != "general"]
+    
+    def todo_matches_filter(self, todo):
+        """Whether a todo belongs in the tree under the current status filter"""
+        status = self.status_var.get()
+        return status == "all" or todo["completed"] == (status == "completed")
+    
+    def on_todo_changed(self, event, todo, old):
+        """Apply a single change from the todo list to the tree"""
+        if event == "reset":
+            self.load_todos()
+            return
         
-        # Apply filters
-        self.apply_filters()
+        self.writer.schedule()
+        shown = self.virtual_tree.index_of(todo["id"]) is not None
+        if self.search_var.get().strip() or self.query_var.get().strip():
+            # Search results are ranked, and queries cheap to re-run from
+            # their cached plan; just re-run them
+            self.apply_filters()
+        elif event == "delete" or not self.todo_matches_filter(todo):
+            if shown:
+                self.virtual_tree.remove_row(todo["id"])
+        elif shown:
+            self.virtual_tree.update_row(todo)
+        else:
+            self.virtual_tree.insert_row(todo)
+        
+        if event != "update" or "category" in old:
+            self.update_categories()
+        self.update_stats()
         
     def apply_filters(self):
         """Apply filters and update the todo list"""
         status = self.status_var.get()
-        
-        if status == "all":
+        query = self.search_var.get().strip()
+        filter_text = self.query_var.get().strip()
+        
+        if filter_text:
+            try:
+                matching = self.todo_list.query(filter_text)
+            except ValueError:
+                # Most likely still being typed; keep showing the last result
+                return
+            todos = [t for t in matching if self.todo_matches_filter(t)]
+            if query:
+                matching_ids = {t["id"] for t in todos}
+                todos = [t for t in self.todo_list.search(query) if t["id"] in matching_ids]
+        elif query:
+            todos = [t for t in self.todo_list.search(query) if self.todo_matches_filter(t)]
+        elif status == "all":
             todos = self.todo_list.get_todos()
         elif status == "active":
             todos = self.todo_list.get_todos(filter_completed=False)
         else:  # completed
             todos = self.todo_list.get_todos(filter_completed=True)
         
-        # Clear existing items
-        for item in self.todo_tree.get_children():
-            self.todo_tree.delete(item)
-        
-        # Add filtered todos
-        for todo in todos:
-            self.todo_tree.insert("", "end", values=(
-                todo["id"],
-                todo["title"],
-                todo["due_date"] or "",
-                todo["priority"],
-                todo["category"]
-            ))
+        self.virtual_tree.set_rows(todos)
+    
+    def on_search_changed(self, event=None):
+        """Re-run the search shortly after the user stops typing"""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(200, self.run_search)
+    
+    def run_search(self):
+        self.search_job = None
+        self.apply_filters()
     
     def show_calendar(self):
         """Show calendar popup for date selection"""
@@ -203,7 +315,7 @@ class TodoGUI:
         self.due_date_var.set("")
         self.priority_var.set("medium")
         self.category_var.set("general")
-        self.todo_tree.selection_remove(self.todo_tree.selection())
+        self.virtual_tree.clear_selection()
     
     def save_todo(self):
         """Save the current todo"""
@@ -217,70 +329,144 @@ class TodoGUI:
         priority = self.priority_var.get()
         category = self.category_var.get()
         
-        selection = self.todo_tree.selection()
+        selection = self.selected_todo_ids()
         if selection:  # Update existing todo
-            todo_id = int(self.todo_tree.item(selection[0])["values"][0])
+            todo_id = selection[0]
             self.todo_list.update_todo(
                 todo_id, title, description, due_date, priority, category
             )
         else:  # New todo
             self.todo_list.add_todo(title, description, due_date, priority, category)
         
-        self.load_todos()
         messagebox.showinfo("Success", "Todo saved successfully!")
     
+    def selected_todo_ids(self):
+        """Ids of all selected todos"""
+        return self.virtual_tree.selected_ids()
+    
     def complete_todo(self):
-        """Mark the selected todo as completed"""
-        selection = self.todo_tree.selection()
-        if not selection:
+        """Mark the selected todos as completed"""
+        todo_ids = self.selected_todo_ids()
+        if not todo_ids:
             messagebox.showwarning("Warning", "Please select a todo to complete.")
             return
         
-        todo_id = int(self.todo_tree.item(selection[0])["values"][0])
-        if self.todo_list.complete_todo(todo_id):
-            self.load_todos()
-            messagebox.showinfo("Success", "Todo marked as completed!")
+        with self.todo_list.transaction():
+            completed = sum(1 for todo_id in todo_ids if self.todo_list.complete_todo(todo_id))
+        if completed:
+            messagebox.showinfo("Success", f"{completed} todo(s) marked as completed!")
         else:
             messagebox.showerror("Error", "Failed to complete todo.")
     
     def delete_todo(self):
-        """Delete the selected todo"""
-        selection = self.todo_tree.selection()
-        if not selection:
+        """Delete the selected todos"""
+        todo_ids = self.selected_todo_ids()
+        if not todo_ids:
             messagebox.showwarning("Warning", "Please select a todo to delete.")
             return
         
-        if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this todo?"):
-            todo_id = int(self.todo_tree.item(selection[0])["values"][0])
-            if self.todo_list.delete_todo(todo_id):
-                self.load_todos()
+        if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {len(todo_ids)} todo(s)?"):
+            with self.todo_list.transaction():
+                deleted = sum(1 for todo_id in todo_ids if self.todo_list.delete_todo(todo_id))
+            if deleted:
                 self.new_todo()
-                messagebox.showinfo("Success", "Todo deleted successfully!")
+                messagebox.showinfo("Success", f"{deleted} todo(s) deleted successfully!")
             else:
                 messagebox.showerror("Error", "Failed to delete todo.")
     
+    @staticmethod
+    def typing_in(event):
+        """Whether a key event went to a field the user is typing in"""
+        return event is not None and isinstance(event.widget, (tk.Entry, tk.Text))
+
+    def undo(self, event=None):
+        """Revert the latest change (Ctrl+Z)"""
+        if self.typing_in(event):
+            return None
+        if not self.todo_list.undo():
+            self.root.bell()
+        return "break"
+    
+    def redo(self, event=None):
+        """Apply the latest undone change again (Ctrl+Y)"""
+        if self.typing_in(event):
+            return None
+        if not self.todo_list.redo():
+            self.root.bell()
+        return "break"
+    
     def on_select_todo(self, event):
         """Handle todo selection"""
-        selection = self.todo_tree.selection()
+        selection = self.selected_todo_ids()
         if not selection:
             return
         
-        todo_id = int(self.todo_tree.item(selection[0])["values"][0])
-        todos = self.todo_list.get_todos()
-        
-        for todo in todos:
-            if todo["id"] == todo_id:
-                self.title_var.set(todo["title"])
-                self.description_text.delete("1.0", tk.END)
-                self.description_text.insert("1.0", todo["description"])
-                self.due_date_var.set(todo["due_date"] or "")
-                self.priority_var.set(todo["priority"])
-                self.category_var.set(todo["category"])
-                break
+        todo = self.todo_list.get_todo(selection[0])
+        
+        if todo:
+            self.title_var.set(todo["title"])
+            self.description_text.delete("1.0", tk.END)
+            self.description_text.insert("1.0", todo["description"])
+            self.due_date_var.set(todo["due_date"] or "")
+            self.priority_var.set(todo["priority"])
+            self.category_var.set(todo["category"])
+
+    def update_save_status(self):
+        """Show whether changes are still waiting to be written"""
+        if self.writer.error:
+            self.save_status_var.set(f"Save failed: {self.writer.error}")
+        elif self.writer.pending:
+            self.save_status_var.set("Saving...")
+        else:
+            self.save_status_var.set("All changes saved")
+        self.root.after(250, self.update_save_status)
+    
+    def poll_changes(self):
+        """Merge in changes other processes wrote, and our queued writes"""
+        try:
+            self.todo_list.refresh()
+        except OSError as e:
+            self.save_status_var.set(f"Save failed: {e}")
+        self.root.after(self.POLL_INTERVAL, self.poll_changes)
+    
+    def tick_reminders(self):
+        """Run the reminders that are due and check again in one tick"""
+        self.reminders.wheel.advance()
+        self.root.after(int(self.reminders.wheel.tick * 1000), self.tick_reminders)
+    
+    def show_reminder(self, todo):
+        """Point out a todo whose due date has arrived"""
+        self.reminder_var.set(f"Due {todo['due_date']}: #{todo['id']} {todo['title']}")
+        self.root.bell()
+    
+    def on_close(self):
+        """Save pending writes before closing the window.
+
+        What the background writer could not save is saved here once more;
+        if that fails too, the user decides whether to lose it.
+        """
+        if not self.writer.close():
+            try:
+                self.todo_list.flush()
+            except OSError as e:
+                if not messagebox.askyesno(
+                        "Unsaved changes",
+                        f"Your latest changes could not be saved:\n{e}\n\n"
+                        "Close anyway and lose them?"):
+                    self.writer = DebouncedWriter(self.writer.write)
+                    self.writer.schedule()
+                    return
+        self.reminders.close()
+        try:
+            self.todo_list.close()
+        except OSError:
+            pass  # Only the changes the user agreed to lose
+        self.root.destroy()
 
-def main():
+def main(argv=None):
+    args = build_arg_parser("Todo List Manager GUI").parse_args(argv)
     root = tk.Tk()
-    app = TodoGUI(root)
+    app = TodoGUI(root, open_todo_list(args.backend, args.file, write_behind=True))
     root.mainloop()
 
 if __name__ == "__main__":
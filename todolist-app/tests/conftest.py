@@ -0,0 +1,22 @@
+"""Fixtures shared by the TodoList tests"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_sqlite import SQLiteTodoList
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def todo_list(request, tmp_path):
+    """An empty todo list on each storage backend"""
+    if request.param == "json":
+        todo_list = TodoList(str(tmp_path / "todos.json"))
+    else:
+        todo_list = SQLiteTodoList(str(tmp_path / "todos.db"))
+    yield todo_list
+    todo_list.close()
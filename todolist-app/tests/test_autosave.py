@@ -0,0 +1,117 @@
+"""Tests for background debounced persistence"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from autosave import DebouncedWriter
+from cli_todo import TodoList
+
+
+def test_burst_is_coalesced_into_one_write():
+    """Test that rapid changes produce a single write after the pause"""
+    writes = []
+    writer = DebouncedWriter(lambda: writes.append(time.monotonic()), delay=0.05)
+    for _ in range(20):
+        writer.schedule()
+    assert writer.pending
+    time.sleep(0.3)
+
+    assert len(writes) == 1
+    assert not writer.pending
+    writer.close()
+
+
+def test_flush_writes_immediately():
+    """Test that flush does not wait for the debounce window"""
+    writes = []
+    writer = DebouncedWriter(lambda: writes.append(1), delay=60)
+    writer.schedule()
+    writer.flush()
+
+    assert writes == [1]
+    writer.close()
+
+
+def test_write_errors_are_reported():
+    """Test that a failing write is surfaced instead of killing the thread"""
+    calls = []
+
+    def write():
+        calls.append(threading.current_thread())
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    writer = DebouncedWriter(write, delay=0)
+    writer.schedule()
+    writer.flush()
+    assert isinstance(writer.error, OSError)
+    assert calls[0] is not threading.current_thread()
+
+    writer.schedule()
+    writer.flush()
+    assert writer.error is None
+    writer.close()
+
+
+def test_failed_write_is_retried():
+    """Test that changes stay pending after a failed write and go out on
+    the retry, and that close() reports what it could not save"""
+    results = [OSError("disk full"), False, True]
+
+    def write():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    writer = DebouncedWriter(write, delay=0.01, max_delay=0.05)
+    writer.schedule()
+    assert writer.flush() is False
+    assert writer.pending
+    time.sleep(0.3)
+
+    assert results == []
+    assert writer.error is None
+    assert not writer.pending
+    assert writer.close() is True
+
+    writer = DebouncedWriter(lambda: False, delay=60)
+    writer.schedule()
+    assert writer.close() is False
+    assert writer.pending
+
+
+def test_failed_flush_keeps_records(tmp_path, monkeypatch):
+    """Test that records whose append failed are written by the next flush"""
+    todo_list = TodoList(str(tmp_path / "todos.json"), write_behind=True)
+    todo_list.add_todo("Queued")
+    append_many = todo_list.journal.append_many
+
+    def fail(records):
+        raise OSError("disk full")
+    monkeypatch.setattr(todo_list.journal, "append_many", fail)
+    with pytest.raises(OSError):
+        todo_list.flush()
+
+    monkeypatch.setattr(todo_list.journal, "append_many", append_many)
+    todo_list.close()
+    assert [t["title"] for t in TodoList(str(tmp_path / "todos.json")).get_todos()] == ["Queued"]
+
+
+def test_write_behind_todo_list(tmp_path):
+    """Test that queued journal records reach the disk only on flush"""
+    todo_list = TodoList(str(tmp_path / "todos.json"), write_behind=True)
+    writer = DebouncedWriter(todo_list.flush, delay=60)
+    todo_list.add_todo("Queued")
+    writer.schedule()
+    assert not (tmp_path / "todos.journal").exists()
+
+    writer.close()
+    todo_list.close()
+    assert [t["title"] for t in TodoList(str(tmp_path / "todos.json")).get_todos()] == ["Queued"]
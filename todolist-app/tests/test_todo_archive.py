@@ -0,0 +1,94 @@
+"""Tests for archiving completed todos"""
+import gzip
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_archive import TodoArchive
+from todo_sqlite import SQLiteTodoList
+
+NOW = datetime(2026, 10, 16, 12, 0, 0)
+
+
+def backdate(todo_list, todo_id, completed_date):
+    """Pretend a todo was completed at ``completed_date``"""
+    if isinstance(todo_list, SQLiteTodoList):
+        todo_list._set_fields(todo_id, {"completed_date": completed_date})
+    else:
+        todo_list._update(todo_list.get_todo(todo_id), {"completed_date": completed_date})
+
+
+@pytest.fixture
+def todo_list(todo_list):
+    completed = {
+        "Old report": "2026-03-05 10:00:00",
+        "Old invoice": "2026-03-20 09:30:00",
+        "Summer trip": "2026-07-01 08:00:00",
+        "Last week": "2026-10-09 12:00:00",
+    }
+    for title, completed_date in completed.items():
+        todo_id = todo_list.add_todo(title, category="work" if "Old" in title else "home")
+        todo_list.complete_todo(todo_id)
+        backdate(todo_list, todo_id, completed_date)
+    todo_list.add_todo("Still open")
+    return todo_list
+
+
+def test_archive_moves_old_completed_todos(todo_list, tmp_path):
+    assert todo_list.archive_completed(30, now=NOW) == 3
+    assert [t["title"] for t in todo_list.get_todos()] == ["Last week", "Still open"]
+    assert sorted(p.name for p in (tmp_path / "todos.archive").iterdir()) == \
+        ["2026-03.ndjson.gz", "2026-07.ndjson.gz"]
+    assert todo_list.archive_completed(30, now=NOW) == 0
+
+
+def test_history_is_filtered_by_date_and_category(todo_list):
+    todo_list.archive_completed(30, now=NOW)
+    assert [t["title"] for t in todo_list.history()] == ["Old report", "Old invoice", "Summer trip"]
+    assert [t["title"] for t in todo_list.history(since="2026-03-10")] == ["Old invoice", "Summer trip"]
+    assert [t["title"] for t in todo_list.history(until="2026-03-31", category="WORK")] == \
+        ["Old report", "Old invoice"]
+
+
+def test_archived_todos_leave_the_hot_file(tmp_path):
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_id = todo_list.add_todo("Done long ago")
+    todo_list.complete_todo(todo_id)
+    todo_list.add_todo("Active")
+    todo_list.archive_completed(0, now=datetime(2100, 1, 1))
+
+    snapshot = json.loads((tmp_path / "todos.json").read_text())
+    assert [t["title"] for t in snapshot] == ["Active"]
+    reloaded = TodoList(str(tmp_path / "todos.json"))
+    assert [t["title"] for t in reloaded.get_todos()] == ["Active"]
+    assert [t["title"] for t in reloaded.history()] == ["Done long ago"]
+
+
+def test_segments_are_appendable_and_deduplicated(tmp_path):
+    archive = TodoArchive(str(tmp_path / "archive"))
+    todo = {"id": 1, "title": "Twice", "completed_date": "2026-01-02 03:04:05"}
+    archive.append([todo])
+    archive.append([todo, {"id": 2, "title": "Undated", "completed_date": None}])
+
+    with gzip.open(archive.segment_path("2026-01"), "rt") as f:
+        assert len(f.readlines()) == 2
+    assert [t["title"] for t in archive.history()] == ["Undated", "Twice"]
+    assert [t["title"] for t in archive.history(since="2026-01-01")] == ["Twice"]
+    assert list(TodoArchive(str(tmp_path / "missing")).history()) == []
+
+
+def test_reused_ids_are_kept_apart(tmp_path):
+    """Test that two todos archived under the same id are both kept"""
+    archive = TodoArchive(str(tmp_path / "archive"))
+    archive.append([{"id": 2, "title": "First", "created_date": "2026-01-01 09:00:00",
+                     "completed_date": "2026-01-02 03:04:05"}])
+    archive.append([{"id": 2, "title": "Second", "created_date": "2026-01-05 09:00:00",
+                     "completed_date": "2026-01-06 03:04:05"}])
+    assert [t["title"] for t in archive.history()] == ["First", "Second"]
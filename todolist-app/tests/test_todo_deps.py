@@ -0,0 +1,149 @@
+"""Tests for dependencies between todos"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_deps import DependencyGraph, find_cycle, longest_chain
+
+
+@pytest.fixture
+def todo_list(todo_list):
+    # 1 design -> 2 build -> 4 release, 3 docs -> 4 release, 5 unrelated
+    todo_list.add_todo("Design")
+    todo_list.add_todo("Build", depends_on=[1])
+    todo_list.add_todo("Docs")
+    todo_list.add_todo("Release", depends_on=[2, 3])
+    todo_list.add_todo("Unrelated")
+    return todo_list
+
+
+def ids(todos):
+    return [todo["id"] for todo in todos]
+
+
+def test_ready_follows_completions(todo_list):
+    """Test that todos become ready once their prerequisites are done"""
+    assert ids(todo_list.ready()) == [1, 3, 5]
+    todo_list.complete_todo(1)
+    assert ids(todo_list.ready()) == [2, 3, 5]
+    todo_list.complete_todo(2)
+    todo_list.complete_todo(3)
+    assert ids(todo_list.ready()) == [4, 5]
+    assert ids(todo_list.blocked_by(4)) == []
+
+
+def test_blocked_by(todo_list):
+    assert ids(todo_list.blocked_by(4)) == [2, 3]
+    todo_list.complete_todo(3)
+    assert ids(todo_list.blocked_by(4)) == [2]
+
+
+def test_adding_and_removing_dependencies(todo_list):
+    assert todo_list.add_dependency(5, 4)
+    assert todo_list.get_todo(5)["depends_on"] == [4]
+    assert ids(todo_list.ready()) == [1, 3]
+    assert todo_list.remove_dependency(5, 4)
+    assert ids(todo_list.ready()) == [1, 3, 5]
+    assert not todo_list.remove_dependency(5, 4)
+    assert not todo_list.add_dependency(5, 99)
+
+
+def test_cycles_are_rejected(todo_list):
+    """Test that a link closing a cycle raises and changes nothing"""
+    with pytest.raises(ValueError, match="#1 -> #4 -> #2 -> #1"):
+        todo_list.add_dependency(1, 4)
+    with pytest.raises(ValueError):
+        todo_list.add_dependency(3, 3)
+    assert "depends_on" not in todo_list.get_todo(1)
+
+
+def test_deleted_prerequisite_does_not_block(todo_list):
+    todo_list.delete_todo(1)
+    assert ids(todo_list.ready()) == [2, 3, 5]
+
+
+def test_failed_transaction_drops_new_dependency(todo_list):
+    """Test that a dependency added in a rolled back transaction is gone"""
+    with pytest.raises(RuntimeError):
+        with todo_list.transaction():
+            todo_list.add_dependency(5, 4)
+            raise RuntimeError("abort")
+    assert "depends_on" not in todo_list.get_todo(5)
+    assert ids(todo_list.ready()) == [1, 3, 5]
+
+
+def test_delete_unlinks_dependents(todo_list):
+    """Test that deleting a todo removes it from its dependents' lists"""
+    todo_list.delete_todo(3)
+    assert todo_list.get_todo(4)["depends_on"] == [2]
+    todo_list.undo()
+    assert todo_list.get_todo(4)["depends_on"] == [2, 3]
+    assert ids(todo_list.blocked_by(4)) == [2, 3]
+
+
+def test_deleted_ids_are_not_reused(tmp_path):
+    """Test that a new todo never takes the id of a deleted one, across restarts"""
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_list.add_todo("Keep")
+    todo_list.add_todo("Gone")
+    todo_list.delete_todo(2)
+    todo_list.save_todos()
+    todo_list.close()
+
+    reloaded = TodoList(str(tmp_path / "todos.json"))
+    assert reloaded.add_todo("New") == 3
+    reloaded.close()
+
+
+def test_critical_path(todo_list):
+    assert ids(todo_list.critical_path()) == [1, 2, 4]
+    todo_list.complete_todo(1)
+    assert ids(todo_list.critical_path()) == [2, 4]
+
+
+def test_undo_dependency(todo_list):
+    todo_list.add_dependency(5, 4)
+    todo_list.undo()
+    assert ids(todo_list.ready()) == [1, 3, 5]
+
+
+def test_dependencies_are_persisted(tmp_path):
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_list.add_todo("Design")
+    todo_list.add_todo("Build", depends_on=[1])
+    todo_list.save_todos()
+    todo_list.close()
+
+    reloaded = TodoList(str(tmp_path / "todos.json"))
+    assert ids(reloaded.ready()) == [1]
+    assert reloaded.get_todo(2)["depends_on"] == [1]
+
+
+def test_completion_only_touches_dependents():
+    """Test that completing a todo only updates the counts of its dependents"""
+    graph = DependencyGraph()
+    todos = [{"id": i, "completed": False, "depends_on": [0] if i < 50 else []} for i in range(1, 101)]
+    graph.add({"id": 0, "completed": False})
+    for todo in todos:
+        graph.add(todo)
+
+    touched = []
+    shift = graph._shift
+    graph._shift = lambda todo_id, delta: (touched.append(todo_id), shift(todo_id, delta))
+    root = {"id": 0, "completed": True}
+    graph.update(root, {"completed": False})
+
+    assert sorted(set(touched) - {0}) == list(range(1, 50))
+    assert len(graph.ready) == 100
+
+
+def test_graph_helpers():
+    links = {1: [], 2: [1], 3: [2], 4: [1]}
+    assert find_cycle(1, 3, links.get) == [1, 3, 2, 1]
+    assert find_cycle(4, 3, links.get) is None
+    assert longest_chain(links, links.get) == [1, 2, 3]
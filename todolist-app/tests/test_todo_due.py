@@ -0,0 +1,57 @@
+"""Tests for the due-date queries"""
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+TODAY = date(2026, 10, 16)
+
+
+@pytest.fixture
+def todo_list(todo_list):
+    todo_list.add_todo("Late", due_date="2026-10-01")
+    todo_list.add_todo("Today", due_date="2026-10-16")
+    todo_list.add_todo("No date")
+    todo_list.add_todo("Sometime", due_date="soon")
+    todo_list.add_todo("Tomorrow", due_date="2026-10-17")
+    todo_list.add_todo("Next month", due_date="2026-11-20")
+    done = todo_list.add_todo("Done", due_date="2026-10-02")
+    todo_list.complete_todo(done)
+    return todo_list
+
+
+def titles(todos):
+    return [todo["title"] for todo in todos]
+
+
+def test_due_before(todo_list):
+    assert titles(todo_list.due_before(date(2026, 10, 17))) == ["Late", "Today", "Tomorrow"]
+    assert titles(todo_list.due_before("2026-10-16")) == ["Late", "Today"]
+    assert titles(todo_list.due_before(datetime(2026, 9, 30, 12))) == []
+
+
+def test_overdue_and_next_due(todo_list):
+    assert titles(todo_list.overdue(TODAY)) == ["Late"]
+    assert titles(todo_list.next_due(2, TODAY)) == ["Today", "Tomorrow"]
+    assert titles(todo_list.next_due(10, TODAY)) == ["Today", "Tomorrow", "Next month"]
+
+
+def test_queries_follow_changes(todo_list):
+    late = todo_list.due_before(TODAY)[0]["id"]
+    todo_list.update_todo(late, due_date="2026-12-01")
+    assert todo_list.overdue(TODAY) == []
+    assert titles(todo_list.next_due(10, TODAY))[-1] == "Late"
+
+    todo_list.complete_todo(late)
+    todo_list.delete_todo(todo_list.next_due(1, TODAY)[0]["id"])
+    assert titles(todo_list.next_due(10, TODAY)) == ["Tomorrow", "Next month"]
+
+
+def test_invalid_date_is_rejected(todo_list):
+    with pytest.raises(ValueError):
+        todo_list.due_before("next week")
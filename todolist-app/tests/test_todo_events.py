@@ -0,0 +1,46 @@
+"""Tests for TodoList change events"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+
+
+def record_events(todo_list):
+    events = []
+    todo_list.subscribe(lambda event, todo, old: events.append(
+        (event, todo and todo["id"], old)))
+    return events
+
+
+def test_mutations_emit_one_event_each(todo_list):
+    """Test add, update, complete and delete events with old values"""
+    events = record_events(todo_list)
+    todo_id = todo_list.add_todo("Plan", category="work")
+    todo_list.update_todo(todo_id, category="home")
+    todo_list.complete_todo(todo_id)
+    todo_list.delete_todo(todo_id)
+    todo_list.delete_todo(todo_id)
+
+    assert [e[0] for e in events] == ["add", "update", "update", "delete"]
+    assert events[1][2] == {"category": "work"}
+    assert events[2][2] == {"completed": False, "completed_date": None}
+
+
+def test_rollback_emits_compensating_events(tmp_path):
+    """Test that listeners see a rolled back transaction undone"""
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_id = todo_list.add_todo("Keep")
+    events = record_events(todo_list)
+
+    with pytest.raises(KeyError):
+        with todo_list.transaction():
+            todo_list.delete_todo(todo_id)
+            raise KeyError("abort")
+
+    assert [e[0] for e in events] == ["delete", "add"]
+    todo_list.close()
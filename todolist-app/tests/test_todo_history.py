@@ -0,0 +1,98 @@
+"""Tests for undo/redo"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_history import UndoHistory
+
+
+def snapshot(todo_list):
+    return [dict(todo) for todo in todo_list.get_todos()]
+
+
+def test_undo_and_redo_each_kind_of_change(todo_list):
+    """Test that add, update, complete and delete can be undone and redone"""
+    states = [snapshot(todo_list)]
+    todo_id = todo_list.add_todo("Write report", "draft", "2026-11-01", "high", "work")
+    states.append(snapshot(todo_list))
+    todo_list.update_todo(todo_id, title="Write final report", category="home")
+    states.append(snapshot(todo_list))
+    todo_list.complete_todo(todo_id)
+    states.append(snapshot(todo_list))
+    todo_list.delete_todo(todo_id)
+    states.append(snapshot(todo_list))
+
+    for state in reversed(states[:-1]):
+        assert todo_list.undo()
+        assert snapshot(todo_list) == state
+    assert not todo_list.undo()
+
+    for state in states[1:]:
+        assert todo_list.redo()
+        assert snapshot(todo_list) == state
+    assert not todo_list.redo()
+
+
+def test_transaction_is_one_step(todo_list):
+    """Test that a transaction is undone as a whole"""
+    keep = todo_list.add_todo("Keep")
+    gone = todo_list.add_todo("Gone")
+    before = snapshot(todo_list)
+    with todo_list.transaction():
+        todo_list.add_todo("New")
+        todo_list.update_todo(keep, title="Changed")
+        todo_list.delete_todo(gone)
+
+    assert todo_list.undo()
+    assert snapshot(todo_list) == before
+
+
+def test_new_change_clears_redo(todo_list):
+    """Test that redo is only possible right after undo"""
+    todo_list.add_todo("A")
+    todo_list.undo()
+    todo_list.add_todo("B")
+
+    assert not todo_list.redo()
+    assert [todo["title"] for todo in todo_list.get_todos()] == ["B"]
+
+
+def test_rolled_back_transaction_leaves_no_step(todo_list):
+    """Test that a failed transaction cannot be undone"""
+    todo_list.add_todo("A")
+    with pytest.raises(RuntimeError):
+        with todo_list.transaction():
+            todo_list.add_todo("B")
+            raise RuntimeError("abort")
+
+    assert todo_list.undo()
+    assert todo_list.get_todos() == []
+    assert not todo_list.undo()
+
+
+def test_undo_is_persisted(tmp_path):
+    """Test that undoing a delete is written like any other change"""
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_id = todo_list.add_todo("Important", category="work")
+    todo_list.delete_todo(todo_id)
+    todo_list.undo()
+    todo_list.close()
+
+    reloaded = TodoList(str(tmp_path / "todos.json"))
+    assert reloaded.get_todo(todo_id)["category"] == "work"
+
+
+def test_oldest_steps_are_evicted():
+    """Test that the history stays within its budget"""
+    history = UndoHistory(limit=10)
+    for todo_id in range(20):
+        history.record(("delete", todo_id))
+        history.end_step()
+
+    assert history.size == 10
+    assert [step[0][1] for step in history.undo_steps] == list(range(10, 20))
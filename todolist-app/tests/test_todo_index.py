@@ -0,0 +1,58 @@
+"""Tests for the in-memory TodoList indexes"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+
+
+def make_list(tmp_path):
+    return TodoList(str(tmp_path / "todos.json"))
+
+
+def test_buckets_follow_mutations(tmp_path):
+    """Test that secondary indexes are updated on every mutation"""
+    todo_list = make_list(tmp_path)
+    first = todo_list.add_todo("Email", category="Work", priority="high")
+    second = todo_list.add_todo("Gym", category="health")
+    third = todo_list.add_todo("Slides", category="work", priority="high")
+
+    assert [t["id"] for t in todo_list.get_todos(category="work", priority="HIGH")] == [first, third]
+    todo_list.update_todo(first, category="home")
+    todo_list.complete_todo(third)
+    todo_list.delete_todo(second)
+
+    assert todo_list.get_todos(category="work", filter_completed=False) == []
+    assert [t["id"] for t in todo_list.get_todos(category="home")] == [first]
+    assert [t["id"] for t in todo_list.get_todos(filter_completed=True)] == [third]
+    assert todo_list.get_categories() == ["home", "work"]
+    assert todo_list.get_todo(second) is None
+
+
+def test_index_is_rebuilt_on_reload(tmp_path):
+    """Test that indexes built from snapshot and journal agree"""
+    todo_list = make_list(tmp_path)
+    todo_list.COMPACT_MIN = 2
+    for title in ("A", "B", "C"):
+        todo_list.add_todo(title, category="x")
+    todo_list.complete_todo(2)
+    todo_list.close()
+
+    reloaded = make_list(tmp_path)
+    assert [t["title"] for t in reloaded.get_todos(category="x", filter_completed=False)] == ["A", "C"]
+    assert reloaded.get_todo(2)["completed"] is True
+
+
+def test_ids_are_not_reused_after_delete(tmp_path):
+    """Test that the id index never sees two todos with the same id"""
+    todo_list = make_list(tmp_path)
+    todo_list.add_todo("A")
+    second = todo_list.add_todo("B")
+    todo_list.add_todo("C")
+    todo_list.delete_todo(second)
+
+    new_id = todo_list.add_todo("D")
+    assert new_id == 4
+    assert [t["title"] for t in todo_list.get_todos()] == ["A", "C", "D"]
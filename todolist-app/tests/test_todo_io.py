@@ -0,0 +1,99 @@
+"""Tests for streaming import and export"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cli_todo
+from cli_todo import TodoList
+from todo_io import export_todos, import_todos
+
+
+CSV = """title,description,due_date,priority,category,completed,completed_date
+Write report,Q3 numbers,2026-11-01,HIGH,Work,false,
+Pay rent,,,,,yes,2026-10-01 08:00:00
+,missing title,,,,,
+Bad priority,,,urgent,,,
+Bad date,,01/11/2026,,,,
+"Multi, line
+title",,,low,home,0,
+"""
+
+
+def test_import_csv_validates_rows(todo_list, tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text(CSV)
+    imported, skipped, errors = import_todos(todo_list, str(path), batch_size=2)
+    assert (imported, skipped) == (3, 3)
+    assert [line for line, _ in errors] == [4, 5, 6]
+    assert "title" in errors[0][1] and "priority" in errors[1][1] and "due_date" in errors[2][1]
+
+    todos = todo_list.get_todos()
+    assert [t["title"] for t in todos] == ["Write report", "Pay rent", "Multi, line\ntitle"]
+    assert (todos[0]["priority"], todos[0]["category"], todos[0]["due_date"]) == ("high", "work", "2026-11-01")
+    assert (todos[1]["completed"], todos[1]["completed_date"]) == (True, "2026-10-01 08:00:00")
+    assert todos[2]["completed"] is False
+
+
+def test_export_import_round_trip(todo_list, tmp_path):
+    first = todo_list.add_todo("First", "desc", "2026-12-24", "low", "home")
+    second = todo_list.add_todo("Second, with comma", depends_on=[first])
+    todo_list.add_todo("Third")
+    todo_list.add_dependency(first, 3)
+    todo_list.delete_todo(second)
+    todo_list.add_todo("Fourth", depends_on=[first, 3])
+    todo_list.complete_todo(first)
+    for fmt in ("csv", "ndjson"):
+        path = tmp_path / f"out.{fmt}"
+        assert export_todos(todo_list, str(path), batch_size=1) == 3
+        copy = TodoList(str(tmp_path / f"copy-{fmt}.json"))
+        assert import_todos(copy, str(path)) == (3, 0, [])
+        # New ids, same links
+        assert copy.get_todo(1)["depends_on"] == [2]
+        assert copy.get_todo(3)["depends_on"] == [1, 2]
+        old_ids = {1: 1, 2: 3, 3: 4}
+        copied = []
+        for todo in copy.get_todos():
+            todo = dict(todo, id=old_ids[todo["id"]])
+            if "depends_on" in todo:
+                todo["depends_on"] = [old_ids[i] for i in todo["depends_on"]]
+            copied.append(todo)
+        assert copied == [dict(t) for t in todo_list.get_todos()]
+
+
+def test_import_writes_one_journal_record_per_batch(tmp_path):
+    path = tmp_path / "in.ndjson"
+    path.write_text("".join(json.dumps({"title": f"Todo {i}"}) + "\n" for i in range(25))
+                    + "not json\n")
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    assert import_todos(todo_list, str(path), batch_size=10) == (25, 1, [(26, "not a JSON object")])
+    todo_list.close()
+    lines = (tmp_path / "todos.journal").read_text().splitlines()
+    assert [len(json.loads(line)["ops"]) for line in lines] == [10, 10, 5]
+
+
+def test_import_and_export_commands(tmp_path, capsys):
+    source = tmp_path / "in.ndjson"
+    source.write_text(json.dumps({"title": "From file", "category": "misc"}) + "\n")
+    todo_file = str(tmp_path / "todos.json")
+    cli_todo.main(["--file", todo_file, "import", str(source)])
+    cli_todo.main(["--file", todo_file, "export", str(tmp_path / "out.csv")])
+    assert "Imported 1 todo(s)" in capsys.readouterr().out
+    assert "From file" in (tmp_path / "out.csv").read_text()
+    with pytest.raises(SystemExit):
+        cli_todo.main(["--file", todo_file, "export", str(tmp_path / "out.txt")])
+
+
+def test_import_reports_every_bad_row(todo_list, tmp_path):
+    """Test that wrongly typed values skip the row and all skips are counted"""
+    path = tmp_path / "in.ndjson"
+    rows = [{"title": 5}, {"title": "ok", "category": ["work"]}, {"title": "ok", "completed": "maybe"},
+            {"title": "ok", "depends_on": "x"}] * 40 + [{"title": "Fine"}]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    imported, skipped, errors = import_todos(todo_list, str(path))
+    assert (imported, skipped, len(errors)) == (1, 160, 100)
+    assert "title must be text" in errors[0][1]
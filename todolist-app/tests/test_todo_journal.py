@@ -0,0 +1,115 @@
+"""Tests for the append-only todo journal"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+
+
+def make_list(tmp_path):
+    return TodoList(str(tmp_path / "todos.json"))
+
+
+def test_mutations_append_instead_of_rewriting(tmp_path):
+    """Test that mutations go to the journal, not the snapshot"""
+    todo_list = make_list(tmp_path)
+    todo_id = todo_list.add_todo("Write report")
+    todo_list.complete_todo(todo_id)
+    todo_list.close()
+
+    assert not (tmp_path / "todos.json").exists()
+    lines = (tmp_path / "todos.journal").read_text().splitlines()
+    assert [json.loads(line)["op"] for line in lines] == ["add", "complete"]
+
+
+def test_reload_replays_journal(tmp_path):
+    """Test that a new instance sees snapshot plus journal tail"""
+    todo_list = make_list(tmp_path)
+    first = todo_list.add_todo("First", category="work")
+    second = todo_list.add_todo("Second")
+    todo_list.update_todo(first, title="First (edited)")
+    todo_list.delete_todo(second)
+    todo_list.close()
+
+    reloaded = make_list(tmp_path)
+    todos = reloaded.get_todos()
+    assert [t["title"] for t in todos] == ["First (edited)"]
+    assert todos[0]["category"] == "work"
+
+
+def test_compaction_writes_snapshot_and_resets_journal(tmp_path):
+    """Test that the journal is folded into the snapshot"""
+    todo_list = make_list(tmp_path)
+    todo_list.COMPACT_MIN = 3
+    for i in range(3):
+        todo_list.add_todo(f"Todo {i}")
+    todo_list.close()
+
+    assert len(json.loads((tmp_path / "todos.json").read_text())) == 3
+    assert (tmp_path / "todos.journal").read_text() == ""
+    assert len(make_list(tmp_path).get_todos()) == 3
+
+
+def test_replay_over_compacted_snapshot_is_idempotent(tmp_path):
+    """Test that a journal left behind after a snapshot does not duplicate todos"""
+    todo_list = make_list(tmp_path)
+    todo_id = todo_list.add_todo("Only once")
+    todo_list.complete_todo(todo_id)
+    todo_list.close()
+    journal = (tmp_path / "todos.journal").read_text()
+    todo_list.save_todos()
+    (tmp_path / "todos.journal").write_text(journal)
+
+    todos = make_list(tmp_path).get_todos()
+    assert len(todos) == 1
+    assert todos[0]["completed"] is True
+
+
+def test_torn_trailing_record_is_dropped(tmp_path):
+    """Test that a partially written last line is ignored and truncated"""
+    todo_list = make_list(tmp_path)
+    todo_list.add_todo("Survives")
+    todo_list.close()
+    with open(tmp_path / "todos.journal", "a") as f:
+        f.write('{"op": "add", "todo": {"id"')
+
+    reloaded = make_list(tmp_path)
+    assert [t["title"] for t in reloaded.get_todos()] == ["Survives"]
+    reloaded.add_todo("Appended after recovery")
+    reloaded.close()
+    assert len(make_list(tmp_path).get_todos()) == 2
+
+
+def test_failed_append_is_cut_off(tmp_path):
+    """Test that a partly written append is removed so a retry is clean"""
+    todo_list = make_list(tmp_path)
+    todo_list.add_todo("Written")
+    journal = todo_list.journal
+    handle = journal._handle
+
+    class Torn:
+        def write(self, data):
+            handle.write(data[:10])
+            handle.flush()
+            raise OSError("disk full")
+
+        def fileno(self):
+            return handle.fileno()
+
+        def close(self):
+            handle.close()
+
+    journal._handle = Torn()
+    record = {"op": "add", "todo": {"id": 2, "title": "Retried"}}
+    with pytest.raises(OSError):
+        journal.append_many([record])
+    journal.append_many([record])
+    todo_list.close()
+
+    lines = (tmp_path / "todos.journal").read_text().splitlines()
+    assert [json.loads(line)["todo"]["title"] for line in lines] == ["Written", "Retried"]
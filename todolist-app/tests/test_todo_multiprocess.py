@@ -0,0 +1,110 @@
+"""Tests for several processes sharing one todos.json"""
+import subprocess
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+
+APP_DIR = Path(__file__).parent.parent
+
+
+def open_list(tmp_path, **kwargs):
+    return TodoList(str(tmp_path / "todos.json"), **kwargs)
+
+
+def titles(todo_list):
+    return {todo["id"]: todo["title"] for todo in todo_list.get_todos()}
+
+
+def test_clashing_ids_are_renumbered(tmp_path):
+    """Test that two lists adding at once keep both todos"""
+    first = open_list(tmp_path)
+    second = open_list(tmp_path)
+    assert first.add_todo("From first") == 1
+    assert second.add_todo("From second") == 2
+    first.refresh()
+    assert titles(first) == titles(second) == {1: "From first", 2: "From second"}
+
+
+def test_write_behind_adds_are_moved_on_merge(tmp_path):
+    first = open_list(tmp_path, write_behind=True)
+    second = open_list(tmp_path)
+    pending = first.add_todo("Pending")
+    first.update_todo(pending, description="edited before the write")
+    second.add_todo("Written")
+    assert first.flush(merge=False) is False
+    assert first.get_todo(pending)["title"] == "Pending"
+
+    assert first.flush() is True
+    assert titles(first) == {1: "Written", 2: "Pending"}
+    second.refresh()
+    assert titles(second) == {1: "Written", 2: "Pending"}
+    assert second.get_todo(2)["description"] == "edited before the write"
+
+
+def test_concurrent_edits_to_one_todo_merge(tmp_path):
+    first = open_list(tmp_path)
+    todo_id = first.add_todo("Shared")
+    second = open_list(tmp_path)
+    first.update_todo(todo_id, title="Renamed")
+    second.complete_todo(todo_id)
+    first.refresh()
+    for todo_list in (first, second):
+        todo = todo_list.get_todo(todo_id)
+        assert (todo["title"], todo["completed"]) == ("Renamed", True)
+
+
+def test_refresh_reads_only_the_delta(tmp_path):
+    first = open_list(tmp_path)
+    for i in range(5):
+        first.add_todo(f"Todo {i}")
+    second = open_list(tmp_path)
+    offset = second.journal.offset
+    assert second.refresh() is False
+
+    first.delete_todo(1)
+    assert second.refresh() is True
+    assert second.journal.offset > offset
+    assert second.journal.count == 6
+    assert 1 not in titles(second)
+
+
+def test_compaction_by_another_process_reloads(tmp_path):
+    first = open_list(tmp_path)
+    second = open_list(tmp_path, write_behind=True)
+    events = []
+    second.subscribe(lambda event, todo, old: events.append(event))
+    first.add_todo("Before snapshot")
+    second.add_todo("Queued")
+    first.save_todos()
+    first.add_todo("After snapshot")
+
+    second.flush()
+    assert "reset" in events
+    assert titles(second) == {1: "Before snapshot", 2: "After snapshot", 3: "Queued"}
+    first.refresh()
+    assert titles(first) == titles(second)
+    assert titles(open_list(tmp_path)) == titles(second)
+
+
+def test_parallel_processes_keep_every_write(tmp_path):
+    """Test that writers in separate processes, compacting as they go, lose nothing"""
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(APP_DIR)!r})\n"
+        "from cli_todo import TodoList\n"
+        f"todo_list = TodoList({str(tmp_path / 'todos.json')!r})\n"
+        "todo_list.COMPACT_MIN = 7\n"
+        "for i in range(40):\n"
+        "    todo_list.add_todo(f'{sys.argv[1]} {i}')\n"
+        "todo_list.close()\n"
+    )
+    workers = [subprocess.Popen([sys.executable, "-c", script, f"worker{n}"]) for n in range(4)]
+    assert [worker.wait() for worker in workers] == [0] * 4
+
+    todos = open_list(tmp_path).get_todos()
+    assert len(todos) == 160
+    assert len({todo["title"] for todo in todos}) == 160
@@ -0,0 +1,94 @@
+"""Tests for sorted, cursor-paged todo listings"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from todo_sort import SortedIndex, make_cursor, sort_key
+
+DUE_DATES = [None, "", "2026-10-16", "2026-01-02", "2027-03-01", "someday", "asap"]
+PRIORITIES = ["low", "medium", "high", "High", "urgent"]
+
+
+@pytest.fixture
+def todo_list(todo_list):
+    rng = random.Random(7)
+    with todo_list.transaction():
+        for i in range(60):
+            todo_id = todo_list.add_todo(
+                rng.choice(["Call", "buy", "Alpha", "zeta", "Mail"]) + f" {i % 7}",
+                due_date=rng.choice(DUE_DATES),
+                priority=rng.choice(PRIORITIES),
+                category=rng.choice(["work", "home"]))
+            if rng.random() < 0.3:
+                todo_list.complete_todo(todo_id)
+    return todo_list
+
+
+def read_pages(todo_list, page_size, sort_by, **filters):
+    ids = []
+    after = None
+    while True:
+        page = todo_list.get_todos(sort_by=sort_by, limit=page_size, after=after, **filters)
+        assert len(page) <= page_size
+        ids.extend(todo["id"] for todo in page)
+        if len(page) < page_size:
+            return ids
+        after = make_cursor(page[-1], sort_by)
+
+
+@pytest.mark.parametrize("sort_by", ["id", "due_date", "priority", "title"])
+@pytest.mark.parametrize("filters", [{}, {"filter_completed": False},
+                                     {"category": "WORK", "priority": "high"}])
+def test_pages_add_up_to_sorted_listing(todo_list, sort_by, filters):
+    expected = sorted(todo_list.get_todos(**filters), key=lambda t: sort_key(t, sort_by))
+    assert [t["id"] for t in todo_list.get_todos(sort_by=sort_by, **filters)] == \
+        [t["id"] for t in expected]
+    for page_size in (1, 7, 100):
+        assert read_pages(todo_list, page_size, sort_by, **filters) == [t["id"] for t in expected]
+
+
+def test_due_date_order(todo_list):
+    dates = [t["due_date"] for t in todo_list.get_todos(sort_by="due_date")]
+    real = [d for d in dates if d and d[0].isdigit()]
+    assert dates[:len(real)] == sorted(real)
+    assert set(dates[-dates.count(None) - dates.count(""):]) <= {None, ""}
+
+
+def test_cursor_survives_changes(todo_list):
+    """Test that deleting or editing the cursor's todo keeps the next page"""
+    first_page = todo_list.get_todos(sort_by="title", limit=10)
+    cursor = make_cursor(first_page[-1], "title")
+    rest = [t["id"] for t in todo_list.get_todos(sort_by="title", after=cursor)]
+
+    todo_list.delete_todo(first_page[-1]["id"])
+    todo_list.update_todo(first_page[0]["id"], title="zzz last")
+    assert [t["id"] for t in todo_list.get_todos(sort_by="title", after=cursor)] == \
+        rest + [first_page[0]["id"]]
+
+
+def test_invalid_sort_and_cursor(todo_list):
+    with pytest.raises(ValueError):
+        todo_list.get_todos(sort_by="colour")
+    with pytest.raises(ValueError):
+        todo_list.get_todos(sort_by="title", after="garbage")
+    cursor = make_cursor(todo_list.get_todo(1), "id")
+    with pytest.raises(ValueError):
+        todo_list.get_todos(sort_by="title", after=cursor)
+
+
+def test_sorted_index_builds_with_one_sort():
+    """Test that building appends and sorts once, and later adds stay sorted"""
+    index = SortedIndex("title")
+    for todo_id, title in enumerate(["delta", "alpha", "charlie"], 1):
+        index.add({"id": todo_id, "title": title})
+    assert index.unsorted
+    assert [todo["title"] for todo in index.iter_from(0)] == ["alpha", "charlie", "delta"]
+    assert not index.unsorted
+
+    index.add({"id": 4, "title": "bravo"})
+    assert index.entries == sorted(index.entries)
@@ -0,0 +1,93 @@
+"""Tests for the todo query language"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_query import compile_query
+
+
+@pytest.fixture
+def todo_list(todo_list):
+    todo_list.add_todo("Quarterly report", "numbers for Q3", "2026-10-20", "high", "work")
+    todo_list.add_todo("Team lunch", "", "2026-11-05", "low", "work")
+    todo_list.add_todo("Buy groceries", "milk, eggs", "2026-10-18", "medium", "home")
+    todo_list.add_todo("Report bug", "in the report tool", None, "high", "Work")
+    todo_list.add_todo("Renew passport", "", "2026-10-01", "high", "home")
+    todo_list.complete_todo(5)
+    return todo_list
+
+
+def ids(todos):
+    return [todo["id"] for todo in todos]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", [1, 2, 3, 4, 5]),
+    ("priority:high", [1, 4, 5]),
+    ("priority:high category:work", [1, 4]),
+    ("Category:WORK", [1, 2, 4]),
+    ("completed", [5]),
+    ("!completed priority:high", [1, 4]),
+    ("completed:no category:home", [3]),
+    ("due<2026-11-01", [1, 3, 5]),
+    ("due<2026-11-01 !completed", [1, 3]),
+    ("due>=2026-10-20 due<=2026-11-05", [1, 2]),
+    ("due:2026-10-18", [3]),
+    ("!due<2026-11-01", [2, 4]),
+    ("report", [1, 4]),
+    ('"quarterly rep"', [1]),
+    ("rep !bug", [1]),
+    ("priority:high category:work due<2026-11-01 !completed report", [1]),
+    ("!category:work", [3, 5]),
+])
+def test_query(todo_list, text, expected):
+    """Test each kind of term, alone and combined, on both backends"""
+    assert ids(todo_list.query(text)) == expected
+
+
+def test_query_limit(todo_list):
+    """Test that limit keeps the first matches by id"""
+    assert ids(todo_list.query("category:work", limit=2)) == [1, 2]
+
+
+def test_query_sees_changes(todo_list):
+    """Test that a cached plan runs against the current todos"""
+    assert ids(todo_list.query("!completed due<2026-10-19")) == [3]
+    todo_list.complete_todo(3)
+    todo_list.update_todo(2, due_date="2026-10-10")
+    assert ids(todo_list.query("!completed due<2026-10-19")) == [2]
+
+
+@pytest.mark.parametrize("text", [
+    "owner:me", "priority<high", "completed:maybe", "due<soon", '"unbalanced',
+])
+def test_invalid_query(todo_list, text):
+    """Test that malformed queries raise ValueError"""
+    with pytest.raises(ValueError):
+        todo_list.query(text)
+
+
+def test_plans_are_cached():
+    """Test that the same text is parsed once"""
+    assert compile_query("priority:high !completed") is compile_query("priority:high !completed")
+
+
+def test_most_selective_index_is_used(tmp_path):
+    """Test that candidates come from the smallest index, not a scan"""
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_list.add_many([{"title": f"Chore {i}", "category": "home"} for i in range(200)]
+                       + [{"title": "Ship release", "category": "work", "priority": "high",
+                           "due_date": "2026-10-20"}])
+    index, due_index, search_index = todo_list.index, todo_list.due_index, todo_list.search_index
+
+    def candidates(text):
+        return ids(compile_query(text).candidates(index, due_index, search_index))
+
+    assert candidates("category:home priority:high") == [201]
+    assert candidates("!completed due<2026-11-01") == [201]
+    assert candidates("ship category:home") == [201]
@@ -0,0 +1,69 @@
+"""Tests for the compact TodoRecord representation"""
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_record import TodoRecord
+
+SAMPLE = {
+    "id": 7,
+    "title": "Pay rent",
+    "description": "",
+    "created_date": "2025-11-01 08:15:00",
+    "due_date": "2025-11-05",
+    "priority": "high",
+    "category": "home",
+    "completed": True,
+    "completed_date": "2025-11-04 19:00:00"
+}
+
+
+def test_round_trips_through_dict_view():
+    """Test that a record reads back exactly like the dict it came from"""
+    record = TodoRecord.from_dict(SAMPLE)
+
+    assert dict(record) == SAMPLE
+    assert json.loads(json.dumps(record, default=dict)) == SAMPLE
+    assert record["due_date"] == "2025-11-05"
+    assert record.get("missing") is None
+
+
+def test_dates_and_labels_are_stored_compactly():
+    """Test integer dates and interned category strings"""
+    record = TodoRecord.from_dict(SAMPLE)
+    other = TodoRecord.from_dict(json.loads(json.dumps(SAMPLE)))
+
+    assert isinstance(record.created, int)
+    assert isinstance(record.due, int)
+    assert isinstance(record.completed_at, int)
+    assert record.category is other.category
+    assert not hasattr(record, "__dict__")
+
+
+def test_free_form_dates_and_extra_fields_are_kept():
+    """Test values that cannot be packed and keys outside the schema"""
+    record = TodoRecord(1, "Call mom", due_date="next friday")
+    record["notes"] = "birthday"
+    record.update({"due_date": "", "priority": "low"})
+
+    assert record["due_date"] == ""
+    assert record["notes"] == "birthday"
+    assert list(record)[-1] == "notes"
+
+
+def test_todo_list_stores_records(tmp_path):
+    """Test that TodoList keeps records and persists plain JSON"""
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_id = todo_list.add_todo("Water plants", due_date="2026-01-10")
+    todo_list.complete_todo(todo_id)
+    todo_list.save_todos()
+
+    assert isinstance(todo_list.get_todo(todo_id), TodoRecord)
+    saved = json.loads((tmp_path / "todos.json").read_text())
+    assert saved[0]["due_date"] == "2026-01-10"
+    assert saved[0]["completed"] is True
+    assert TodoList(str(tmp_path / "todos.json")).get_todo(todo_id)["title"] == "Water plants"
@@ -0,0 +1,70 @@
+"""Tests for the timer wheel and todo reminders"""
+import sys
+from datetime import datetime, time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_reminders import TimerWheel, TodoReminders
+
+
+def test_timers_fire_in_order_across_levels():
+    """Test timers on every level, and past the wheel's span, fire on time"""
+    wheel = TimerWheel(tick=1, slots=4, levels=3, now=0)
+    fired = []
+    deadlines = [1, 3, 4, 5, 15, 16, 17, 63, 64, 65, 200, 1000]
+    for deadline in reversed(deadlines):
+        wheel.schedule(deadline, lambda d: fired.append((d, now)), deadline)
+    for now in range(1, 1001):
+        wheel.advance(now)
+    assert fired == [(d, d) for d in deadlines]
+    assert len(wheel) == 0
+
+
+def test_cancel_and_past_timers():
+    wheel = TimerWheel(tick=1, slots=4, levels=2, now=100)
+    fired = []
+    timer = wheel.schedule(110, fired.append, "cancelled")
+    wheel.schedule(50, fired.append, "past")
+    assert wheel.cancel(timer)
+    assert not wheel.cancel(timer)
+    assert wheel.advance(101) == 1
+    assert wheel.advance(200) == 0
+    assert fired == ["past"]
+
+
+def test_large_jump_fires_everything_due():
+    wheel = TimerWheel(tick=0.5, slots=8, levels=2, now=0)
+    fired = []
+    for second in range(0, 100, 7):
+        wheel.schedule(second + 0.5, fired.append, second)
+    assert wheel.advance(50) == 8
+    assert fired == list(range(0, 50, 7))
+
+
+def remind_time(due_date):
+    return datetime.combine(datetime.strptime(due_date, "%Y-%m-%d"), time(9)).timestamp()
+
+
+def test_reminders_follow_todo_changes(tmp_path):
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    first = todo_list.add_todo("Renew passport", due_date="2099-01-01")
+    second = todo_list.add_todo("Pay rent", due_date="2099-01-02")
+    todo_list.add_todo("Long gone", due_date="2000-01-01")
+    wheel = TimerWheel(tick=3600)
+    notified = []
+    reminders = TodoReminders(todo_list, notified.append, wheel=wheel)
+    assert len(wheel) == 2
+
+    todo_list.update_todo(first, due_date="2099-01-03")
+    todo_list.complete_todo(second)
+    third = todo_list.add_todo("File taxes", due_date="2099-01-02")
+    assert len(wheel) == 2
+
+    wheel.advance(remind_time("2099-01-02") + 3600)
+    assert [todo["id"] for todo in notified] == [third]
+    wheel.advance(remind_time("2099-01-03") + 3600)
+    assert [todo["id"] for todo in notified] == [third, first]
+    reminders.close()
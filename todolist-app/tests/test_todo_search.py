@@ -0,0 +1,65 @@
+"""Tests for full-text search over todos"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+
+
+def titles(todos):
+    return [t["title"] for t in todos]
+
+
+def test_all_words_must_match(todo_list):
+    """Test that results contain every query word"""
+    todo_list.add_todo("Quarterly report", "numbers for finance")
+    todo_list.add_todo("Report bug", "crash on startup")
+    todo_list.add_todo("Buy milk")
+
+    assert titles(todo_list.search("report finance")) == ["Quarterly report"]
+    assert todo_list.search("milk report") == []
+    assert todo_list.search("   ") == []
+
+
+def test_prefix_matching(todo_list):
+    """Test that query words also match as prefixes"""
+    todo_list.add_todo("Prepare presentation")
+    todo_list.add_todo("Call the plumber")
+
+    assert titles(todo_list.search("pres")) == ["Prepare presentation"]
+    assert titles(todo_list.search("PLUM")) == ["Call the plumber"]
+
+
+def test_ranking_by_relevance_then_due_date(todo_list):
+    """Test that title hits outrank description hits, then sooner due dates win"""
+    todo_list.add_todo("Groceries", "remember the budget")
+    todo_list.add_todo("Budget review", due_date="2026-12-01")
+    todo_list.add_todo("Budget planning", due_date="2026-11-01")
+
+    assert titles(todo_list.search("budget")) == ["Budget planning", "Budget review", "Groceries"]
+    assert titles(todo_list.search("budget", limit=1)) == ["Budget planning"]
+
+
+def test_index_follows_updates_and_deletes(todo_list):
+    """Test that edits and deletions are reflected in results"""
+    first = todo_list.add_todo("Draft email")
+    second = todo_list.add_todo("Draft contract")
+    todo_list.update_todo(first, title="Send email")
+    todo_list.delete_todo(second)
+
+    assert todo_list.search("draft") == []
+    assert titles(todo_list.search("email")) == ["Send email"]
+
+
+def test_index_is_rebuilt_on_reload(tmp_path):
+    """Test that search works right after loading snapshot and journal"""
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_list.COMPACT_MIN = 1
+    todo_list.add_todo("Renew passport")
+    todo_list.add_todo("Book flights")
+    todo_list.close()
+
+    reloaded = TodoList(str(tmp_path / "todos.json"))
+    assert titles(reloaded.search("pass")) == ["Renew passport"]
@@ -0,0 +1,121 @@
+"""Tests for the asyncio HTTP service"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+from urllib.parse import quote
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_server import TodoServer
+
+
+async def call(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+                 f"Connection: close\r\n\r\n".encode("latin-1") + data)
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def serve(tmp_path, scenario):
+    """Run ``scenario(port, todo_list)`` against a server on a fresh todo list"""
+    todo_list = TodoList(str(tmp_path / "todos.json"), write_behind=True)
+
+    async def main():
+        server = TodoServer(todo_list)
+        _, port = await server.start(port=0)
+        try:
+            return await scenario(port, todo_list)
+        finally:
+            await server.close()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        todo_list.close()
+
+
+def test_crud_round_trip(tmp_path):
+    async def scenario(port, todo_list):
+        status, body = await call(port, "POST", "/todos", {"title": "Write report", "category": "work"})
+        assert (status, body) == (201, {"id": 1})
+        assert (await call(port, "PATCH", "/todos/1", {"priority": "high"}))[0] == 200
+        assert (await call(port, "POST", "/todos/1/complete"))[0] == 200
+        status, todo = await call(port, "GET", "/todos/1")
+        assert status == 200
+        assert (todo["title"], todo["priority"], todo["completed"]) == ("Write report", "high", True)
+        assert (await call(port, "DELETE", "/todos/1"))[0] == 200
+        assert (await call(port, "GET", "/todos/1"))[0] == 404
+
+    serve(tmp_path, scenario)
+    assert TodoList(str(tmp_path / "todos.json")).get_todos() == []
+
+
+def test_concurrent_writes_are_group_committed(tmp_path):
+    """Test that writes waiting together share one journal record"""
+    async def scenario(port, todo_list):
+        results = await asyncio.gather(*(call(port, "POST", "/todos", {"title": f"Todo {i}"})
+                                         for i in range(30)))
+        assert sorted(body["id"] for _, body in results) == list(range(1, 31))
+
+    serve(tmp_path, scenario)
+    lines = (tmp_path / "todos.journal").read_text().splitlines()
+    assert len(lines) < 30
+    assert len(TodoList(str(tmp_path / "todos.json")).get_todos()) == 30
+
+
+def test_list_pages_and_errors(tmp_path):
+    async def scenario(port, todo_list):
+        for i in range(5):
+            await call(port, "POST", "/todos", {"title": f"Todo {i}", "due_date": f"2026-10-2{i}"})
+        status, page = await call(port, "GET", "/todos?sort_by=due_date&limit=3")
+        assert [todo["id"] for todo in page["todos"]] == [1, 2, 3]
+        status, page = await call(port, "GET", "/todos?sort_by=due_date&limit=3&after=" + quote(page["next"]))
+        assert ([todo["id"] for todo in page["todos"]], page["next"]) == ([4, 5], None)
+        assert (await call(port, "GET", "/search?q=todo&limit=2"))[1]["todos"][0]["title"] == "Todo 0"
+        assert [t["id"] for t in (await call(port, "GET", "/due?before=2026-10-21"))[1]["todos"]] == [1, 2]
+
+        assert (await call(port, "GET", "/todos?sort_by=colour"))[0] == 400
+        assert (await call(port, "POST", "/todos", {"name": "no title"}))[0] == 400
+        assert (await call(port, "PATCH", "/todos/99", {"title": "x"}))[0] == 404
+        assert (await call(port, "PUT", "/todos/1"))[0] == 405
+        assert (await call(port, "GET", "/nowhere"))[0] == 404
+
+    serve(tmp_path, scenario)
+
+
+def test_invalid_fields_are_rejected(tmp_path):
+    """Test that bad field types and values get 400 and change nothing"""
+    async def scenario(port, todo_list):
+        for body in ({"title": 123}, {"title": "ok", "priority": None}, {"title": "ok", "priority": "urgent"},
+                     {"title": "ok", "due_date": "next week"}, {"title": " "},
+                     {"title": "ok", "depends_on": "1"}):
+            assert (await call(port, "POST", "/todos", body))[0] == 400, body
+        assert (await call(port, "POST", "/todos", {"title": "ok", "due_date": None}))[0] == 201
+        assert (await call(port, "PATCH", "/todos/1", {"category": ["work"]}))[0] == 400
+        assert (await call(port, "GET", "/todos?sort_by=priority"))[0] == 200
+        assert [todo["title"] for todo in todo_list.get_todos()] == ["ok"]
+        assert todo_list.search("ok")
+
+    serve(tmp_path, scenario)
+
+
+def test_malformed_content_length_is_rejected(tmp_path):
+    """Test that a bad Content-Length gets 400 instead of a dropped connection"""
+    async def scenario(port, todo_list):
+        for length in ("abc", "-5", "1_0", "+3"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"POST /todos HTTP/1.1\r\nContent-Length: {length}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1"))
+            response = await reader.read()
+            writer.close()
+            assert int(response.split()[1]) == 400, length
+        assert todo_list.get_todos() == []
+
+    serve(tmp_path, scenario)
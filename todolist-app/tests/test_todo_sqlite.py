@@ -0,0 +1,108 @@
+"""Tests for the SQLite todo backend"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_sqlite import SCHEMA, SQLiteTodoList, migrate_from_json
+
+
+def test_crud_matches_json_backend(tmp_path):
+    """Test that the SQLite backend behaves like TodoList"""
+    todo_list = SQLiteTodoList(str(tmp_path / "todos.db"))
+    first = todo_list.add_todo("Email", category="work", priority="high")
+    second = todo_list.add_todo("Groceries", category="home")
+    assert todo_list.complete_todo(first)
+    assert todo_list.update_todo(second, title="Groceries and milk")
+    assert not todo_list.delete_todo(999)
+
+    todo = todo_list.get_todo(first)
+    assert todo["completed"] is True
+    assert todo["completed_date"]
+    assert todo_list.get_todo(second)["title"] == "Groceries and milk"
+    assert todo_list.get_categories() == ["home", "work"]
+    todo_list.close()
+
+
+def test_filters_are_case_insensitive(tmp_path):
+    """Test filter pushdown with the same semantics as TodoList.get_todos"""
+    todo_list = SQLiteTodoList(str(tmp_path / "todos.db"))
+    todo_list.add_todo("A", category="Work", priority="high")
+    todo_list.add_todo("B", category="work", priority="low")
+    done = todo_list.add_todo("C", category="home", priority="high")
+    todo_list.complete_todo(done)
+
+    assert [t["title"] for t in todo_list.get_todos(category="WORK")] == ["A", "B"]
+    assert [t["title"] for t in todo_list.get_todos(priority="high", filter_completed=False)] == ["A"]
+    assert [t["title"] for t in todo_list.get_todos(filter_completed=True)] == ["C"]
+    todo_list.close()
+
+
+def test_filters_use_indexes(tmp_path):
+    """Test that SQLite plans filtered reads through an index"""
+    todo_list = SQLiteTodoList(str(tmp_path / "todos.db"))
+    plan = todo_list.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM todos WHERE category = ?", ("work",)
+    ).fetchall()
+    assert "idx_todos_category" in " ".join(str(tuple(row)) for row in plan)
+    todo_list.close()
+
+
+def test_migrate_from_json(tmp_path):
+    """Test migrating snapshot and journal into SQLite, keeping ids"""
+    json_file = str(tmp_path / "todos.json")
+    source = TodoList(json_file)
+    source.add_todo("Keep")
+    dropped = source.add_todo("Drop")
+    source.add_todo("Done", category="work")
+    source.delete_todo(dropped)
+    source.complete_todo(3)
+    source.close()
+
+    db_file = str(tmp_path / "todos.db")
+    assert migrate_from_json(json_file, db_file) == 2
+    target = SQLiteTodoList(db_file)
+    assert [t["id"] for t in target.get_todos()] == [1, 3]
+    assert target.get_todos(filter_completed=True)[0]["title"] == "Done"
+    target.close()
+
+
+def test_deleted_ids_are_not_reused(tmp_path):
+    """Test that the highest deleted id is not handed out again, across restarts"""
+    todo_list = SQLiteTodoList(str(tmp_path / "todos.db"))
+    todo_list.add_todo("Keep")
+    todo_list.add_todo("Gone")
+    todo_list.delete_todo(2)
+    todo_list.close()
+
+    reloaded = SQLiteTodoList(str(tmp_path / "todos.db"))
+    assert reloaded.add_todo("New") == 3
+    reloaded.close()
+
+
+def test_old_table_is_rebuilt_with_autoincrement(tmp_path):
+    """Test that a database from before AUTOINCREMENT keeps its todos,
+    search and indexes, and stops reusing ids"""
+    db_file = str(tmp_path / "todos.db")
+    conn = sqlite3.connect(db_file)
+    conn.executescript(SCHEMA.replace("PRIMARY KEY AUTOINCREMENT", "PRIMARY KEY"))
+    conn.execute("INSERT INTO todos (title, created_date, priority, category) "
+                 "VALUES ('Water plants', '2025-01-01 09:00:00', 'low', 'home')")
+    conn.execute("INSERT INTO todos (title, created_date, priority, category) "
+                 "VALUES ('Pay rent', '2025-01-01 09:00:00', 'high', 'home')")
+    conn.commit()
+    conn.close()
+
+    todo_list = SQLiteTodoList(db_file)
+    table_sql = todo_list.conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'todos'").fetchone()[0]
+    assert "AUTOINCREMENT" in table_sql
+    assert [t["title"] for t in todo_list.search("rent")] == ["Pay rent"]
+    assert todo_list.get_todos(category="HOME", priority="low")[0]["id"] == 1
+    todo_list.delete_todo(2)
+    assert todo_list.add_todo("Call mum") == 3
+    assert [t["title"] for t in todo_list.search("mum")] == ["Call mum"]
+    todo_list.close()
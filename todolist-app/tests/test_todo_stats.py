@@ -0,0 +1,79 @@
+"""Tests for the todo statistics"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import todo_stats
+from cli_todo import TodoList
+from todo_sqlite import SQLiteTodoList
+from todo_stats import compute_stats
+
+
+def set_dates(todo_list, todo_id, created_date, completed_date):
+    fields = {"created_date": created_date, "completed_date": completed_date}
+    if isinstance(todo_list, SQLiteTodoList):
+        todo_list._set_fields(todo_id, fields)
+    else:
+        todo_list._update(todo_list.get_todo(todo_id), fields)
+
+
+def fill(todo_list):
+    ids = [todo_list.add_todo("Report", category="Work", priority="high"),
+           todo_list.add_todo("Groceries", category="home"),
+           todo_list.add_todo("Slides", category="work", priority="low"),
+           todo_list.add_todo("Taxes", category="home", priority="high")]
+    todo_list.complete_todo(ids[0])
+    todo_list.complete_todo(ids[2])
+    set_dates(todo_list, ids[0], "2026-10-01 09:00:00", "2026-10-02 09:00:00")
+    set_dates(todo_list, ids[2], "2026-10-01 09:00:00", "2026-10-01 12:00:00")
+    return ids
+
+
+def test_stats_summary(todo_list):
+    fill(todo_list)
+    stats = todo_list.stats()
+    assert (stats["total"], stats["completed"], stats["active"]) == (4, 2, 2)
+    assert stats["completion_rate"] == 0.5
+    assert stats["avg_completion_seconds"] == (86400 + 3 * 3600) / 2
+    assert stats["categories"] == {"home": {"total": 2, "completed": 0},
+                                   "work": {"total": 2, "completed": 2}}
+    assert stats["priorities"] == {"high": {"total": 2, "completed": 1},
+                                   "low": {"total": 1, "completed": 1},
+                                   "medium": {"total": 1, "completed": 0}}
+
+
+def test_stats_follow_changes(todo_list):
+    ids = fill(todo_list)
+    todo_list.update_todo(ids[1], category="errands")
+    todo_list.delete_todo(ids[0])
+    todo_list.complete_todo(ids[3])
+    set_dates(todo_list, ids[3], "2026-10-01 09:00:00", "2026-10-01 10:00:00")
+    stats = todo_list.stats()
+    assert (stats["total"], stats["completed"]) == (3, 2)
+    assert stats["avg_completion_seconds"] == (3 * 3600 + 3600) / 2
+    assert set(stats["categories"]) == {"errands", "home", "work"}
+    assert stats == compute_stats(todo_list.get_todos())
+
+
+def test_empty_stats(todo_list):
+    stats = todo_list.stats()
+    assert (stats["total"], stats["completion_rate"], stats["avg_completion_seconds"]) == (0, 0.0, None)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_compute_stats_matches_incremental(tmp_path, monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(todo_stats, "numpy", None)
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    fill(todo_list)
+    todos = [dict(todo) for todo in todo_list.get_todos()]
+    todos.append(dict(todos[0], id=99, completed_date="not a date"))
+    todo_list._insert(todo_list.get_todo(1).from_dict(todos[-1]))
+    assert compute_stats(todos) == todo_list.stats()
+    assert compute_stats([]) == TodoList(str(tmp_path / "empty.json")).stats()
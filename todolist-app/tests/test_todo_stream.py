@@ -0,0 +1,94 @@
+"""Tests for streaming the todos snapshot and lazy loading of completed todos"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_stream import iter_json_array
+
+
+def write_snapshot(tmp_path, todos):
+    path = tmp_path / "todos.json"
+    path.write_text(json.dumps(todos, indent=4))
+    return path
+
+
+def make_todos(count):
+    return [{"id": i, "title": f"Todo {i}", "description": "x" * i,
+             "completed": i % 2 == 0, "priority": "medium", "category": "general"}
+            for i in range(1, count + 1)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_iter_json_array_across_chunk_boundaries(tmp_path, chunk_size):
+    """Test that elements split over chunks are decoded whole"""
+    values = make_todos(20) + [12345, -1.5e3, "text, with ] chars", None, True, []]
+    path = write_snapshot(tmp_path, values)
+    assert list(iter_json_array(str(path), chunk_size=chunk_size)) == values
+
+
+@pytest.mark.parametrize("content", ["", "{}", "[1, 2", "[1 2]", "[1,, 2]", "[1, {\"a\": ]"])
+def test_iter_json_array_rejects_malformed_input(tmp_path, content):
+    path = tmp_path / "todos.json"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path), chunk_size=4))
+
+
+def test_lazy_load_skips_completed_todos(tmp_path):
+    """Test that completed todos are only loaded when asked for"""
+    write_snapshot(tmp_path, make_todos(10))
+    todo_list = TodoList(str(tmp_path / "todos.json"), load_completed=False)
+
+    assert [t["id"] for t in todo_list.get_todos(filter_completed=False)] == [1, 3, 5, 7, 9]
+    assert len(todo_list.index) == 5
+    assert todo_list.next_id == 11
+
+    assert [t["id"] for t in todo_list.get_todos(filter_completed=True)] == [2, 4, 6, 8, 10]
+    assert len(todo_list.index) == 10
+
+
+def test_mutating_a_skipped_todo_loads_it(tmp_path):
+    write_snapshot(tmp_path, make_todos(4))
+    todo_list = TodoList(str(tmp_path / "todos.json"), load_completed=False)
+
+    assert todo_list.update_todo(2, title="Renamed")
+    assert todo_list.get_todo(2)["title"] == "Renamed"
+    assert todo_list.completed_loaded
+
+
+def test_journal_records_for_skipped_todos_are_deferred(tmp_path):
+    """Test that journal records touching skipped todos apply once they load"""
+    write_snapshot(tmp_path, make_todos(4))
+    todo_list = TodoList(str(tmp_path / "todos.json"))
+    todo_list.update_todo(2, title="Edited")
+    todo_list.delete_todo(4)
+    todo_list.update_todo(1, title="Open edited")
+    todo_list.close()
+
+    lazy = TodoList(str(tmp_path / "todos.json"), load_completed=False)
+    assert [t["title"] for t in lazy.get_todos(filter_completed=False)] == ["Open edited", "Todo 3"]
+    assert [t["title"] for t in lazy.get_todos()] == ["Open edited", "Edited", "Todo 3"]
+
+
+def test_compaction_keeps_skipped_todos(tmp_path):
+    write_snapshot(tmp_path, make_todos(6))
+    todo_list = TodoList(str(tmp_path / "todos.json"), load_completed=False)
+    todo_list.add_todo("New")
+    todo_list.save_todos()
+    todo_list.close()
+
+    reloaded = TodoList(str(tmp_path / "todos.json"))
+    assert [t["id"] for t in reloaded.get_todos()] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_corrupt_snapshot_loads_empty(tmp_path):
+    (tmp_path / "todos.json").write_text("[{\"id\": 1, ")
+    todo_list = TodoList(str(tmp_path / "todos.json"), load_completed=False)
+    assert todo_list.get_todos() == []
+    assert todo_list.next_id == 1
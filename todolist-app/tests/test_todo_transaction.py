@@ -0,0 +1,91 @@
+"""Tests for TodoList batches and transactions"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cli_todo import TodoList
+from todo_sqlite import SQLiteTodoList
+
+
+def make_list(tmp_path):
+    return TodoList(str(tmp_path / "todos.json"))
+
+
+def journal_records(tmp_path):
+    return [json.loads(line) for line in (tmp_path / "todos.journal").read_text().splitlines()]
+
+
+def test_add_many_writes_once(tmp_path):
+    """Test that a bulk add is persisted as a single journal record"""
+    todo_list = make_list(tmp_path)
+    ids = todo_list.add_many({"title": f"Todo {i}", "category": "import"} for i in range(50))
+    todo_list.close()
+
+    assert ids == list(range(1, 51))
+    records = journal_records(tmp_path)
+    assert len(records) == 1
+    assert records[0]["op"] == "batch"
+    assert len(make_list(tmp_path).get_todos(category="import")) == 50
+
+
+def test_update_many(tmp_path):
+    """Test bulk updates, skipping unknown ids"""
+    todo_list = make_list(tmp_path)
+    todo_list.add_many([{"title": "A"}, {"title": "B"}])
+    updated = todo_list.update_many([(1, {"priority": "high"}), (2, {"title": "B2"}), (9, {"title": "X"})])
+
+    assert updated == 2
+    assert todo_list.get_todo(1)["priority"] == "high"
+    assert todo_list.get_todo(2)["title"] == "B2"
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    """Test that an exception undoes every mutation in the block"""
+    todo_list = make_list(tmp_path)
+    keep = todo_list.add_todo("Keep", category="work")
+    gone = todo_list.add_todo("Gone")
+
+    with pytest.raises(RuntimeError):
+        with todo_list.transaction():
+            todo_list.add_todo("New")
+            todo_list.update_todo(keep, title="Changed", category="home")
+            todo_list.complete_todo(keep)
+            todo_list.delete_todo(gone)
+            raise RuntimeError("abort")
+    todo_list.close()
+
+    for current in (todo_list, make_list(tmp_path)):
+        assert [t["title"] for t in current.get_todos()] == ["Keep", "Gone"]
+        assert [t["id"] for t in current.get_todos(category="work", filter_completed=False)] == [keep]
+        assert current.get_categories() == ["general", "work"]
+
+
+def test_nested_transactions_commit_once(tmp_path):
+    """Test that an inner transaction joins the outer one"""
+    todo_list = make_list(tmp_path)
+    with todo_list.transaction():
+        todo_list.add_todo("Outer")
+        with todo_list.transaction():
+            todo_list.add_todo("Inner")
+        assert not (tmp_path / "todos.journal").exists()
+    todo_list.close()
+
+    assert len(journal_records(tmp_path)) == 1
+
+
+def test_sqlite_transaction_rollback(tmp_path):
+    """Test that the SQLite backend offers the same transaction API"""
+    todo_list = SQLiteTodoList(str(tmp_path / "todos.db"))
+    todo_list.add_many([{"title": "A"}, {"title": "B"}])
+    with pytest.raises(ValueError):
+        with todo_list.transaction():
+            todo_list.delete_todo(1)
+            raise ValueError("abort")
+
+    assert [t["title"] for t in todo_list.get_todos()] == ["A", "B"]
+    todo_list.close()
@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+
+UNDATED = "undated"
+SUFFIX = ".ndjson.gz"
+
+
+class TodoArchive:
+    """Cold storage for completed todos, outside the hot todos.json.
+
+    Todos are appended to one gzip-compressed NDJSON segment per month of
+    completion (``2025-03.ndjson.gz``; ``undated`` for todos completed
+    without a date). Appends add a new gzip member to the segment, so an
+    archived todo is never rewritten. Reads stream one segment at a time and
+    skip segments outside the requested months without opening them.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def partition(todo):
+        """Segment name for a todo: month it was completed, or "undated" """
+        completed_date = todo.get("completed_date")
+        return completed_date[:7] if completed_date else UNDATED
+
+    def segment_path(self, name):
+        return os.path.join(self.directory, name + SUFFIX)
+
+    def segments(self, since=None, until=None):
+        """Segment names in order, limited to the months of since/until"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(entry[:-len(SUFFIX)] for entry in os.listdir(self.directory)
+                       if entry.endswith(SUFFIX))
+        dated = [name for name in names if name != UNDATED]
+        if since:
+            dated = [name for name in dated if name >= since[:7]]
+        if until:
+            dated = [name for name in dated if name <= until[:7]]
+        if UNDATED in names and not (since or until):
+            dated.insert(0, UNDATED)
+        return dated
+
+    def append(self, todos):
+        """Write todos to their segments; durable once this returns"""
+        by_segment = {}
+        for todo in todos:
+            by_segment.setdefault(self.partition(todo), []).append(todo)
+        if not by_segment:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for name, segment_todos in by_segment.items():
+            data = "".join(json.dumps(todo, default=dict) + "\n" for todo in segment_todos)
+            with open(self.segment_path(name), "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                    f.write(data.encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+
+    def read_segment(self, name):
+        """Todos in one segment, by (id, created_date).
+
+        A todo archived twice (the archive was written but the delete was
+        not) counts once; an id reused by a later todo is told apart by its
+        creation time.
+        """
+        todos = {}
+        with gzip.open(self.segment_path(name), "rt", encoding="utf-8") as f:
+            for line in f:
+                todo = json.loads(line)
+                todos[todo["id"], todo.get("created_date")] = todo
+        return todos
+
+    def history(self, since=None, until=None, category=None):
+        """Yield archived todos completed between since and until (YYYY-MM-DD).
+
+        Segments are read lazily, oldest month first.
+        """
+        for name in self.segments(since, until):
+            for todo in self.read_segment(name).values():
+                completed_date = (todo.get("completed_date") or "")[:10]
+                if since and completed_date < since:
+                    continue
+                if until and completed_date > until:
+                    continue
+                if category and todo.get("category", "").lower() != category.lower():
+                    continue
+                yield todo
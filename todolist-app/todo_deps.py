@@ -0,0 +1,159 @@
+def prerequisites(todo):
+    """Ids a todo depends on, from its optional ``depends_on`` list"""
+    return todo.get("depends_on") or ()
+
+
+def find_cycle(todo_id, depends_on, get_prerequisites):
+    """Path ``todo_id -> ... -> todo_id`` that depending on ``depends_on``
+    would close, or None.
+
+    Only walks the prerequisites of ``depends_on`` (what ``todo_id`` would
+    transitively wait for), never the whole graph.
+    """
+    parents = {depends_on: todo_id}
+    stack = [depends_on]
+    while stack:
+        current = stack.pop()
+        if current == todo_id:
+            path = [todo_id]
+            while True:
+                current = parents[current]
+                path.append(current)
+                if current == todo_id:
+                    return path[::-1]
+        for prerequisite in get_prerequisites(current):
+            if prerequisite not in parents:
+                parents[prerequisite] = current
+                stack.append(prerequisite)
+    return None
+
+
+def longest_chain(todo_ids, get_prerequisites):
+    """Longest prerequisite chain among ``todo_ids``, first step first.
+
+    Edges to ids outside ``todo_ids`` are ignored. Each id is visited once
+    (memoized depth-first search), so the cost is linear in the subgraph.
+    """
+    todo_ids = set(todo_ids)
+    # todo_id -> (chain length, next prerequisite on the chain)
+    best = {}
+    for root in todo_ids:
+        stack = [(root, False)]
+        while stack:
+            todo_id, expanded = stack.pop()
+            if todo_id in best:
+                continue
+            waiting = [p for p in get_prerequisites(todo_id) if p in todo_ids]
+            if not expanded:
+                stack.append((todo_id, True))
+                stack.extend((p, False) for p in waiting if p not in best)
+                continue
+            length, step = 1, None
+            for prerequisite in waiting:
+                # A cycle (only possible in hand-edited files) just ends the chain
+                if prerequisite in best and best[prerequisite][0] + 1 > length:
+                    length, step = best[prerequisite][0] + 1, prerequisite
+            best[todo_id] = (length, step)
+    if not best:
+        return []
+    todo_id = max(sorted(best), key=lambda i: best[i][0])
+    chain = []
+    while todo_id is not None:
+        chain.append(todo_id)
+        todo_id = best[todo_id][1]
+    return chain[::-1]
+
+
+class DependencyGraph:
+    """The ``depends_on`` links between todos, as an incrementally kept DAG.
+
+    ``dependents`` maps each id to the todos that depend on it, and
+    ``waiting`` counts for each todo how many of its prerequisites exist
+    and are not completed (its in-degree among open todos). ``ready`` holds
+    the open todos with a count of zero, so asking what can be worked on is
+    a lookup. Completing a todo only decrements the counts of its
+    dependents. Links to deleted todos do not block.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.docs = {}
+        self.dependents = {}
+        self.waiting = {}
+        # todo_id -> todo, in the order they became ready
+        self.ready = {}
+
+    def prerequisites(self, todo_id):
+        todo = self.docs.get(todo_id)
+        return prerequisites(todo) if todo is not None else ()
+
+    def _blocks(self, todo_id):
+        todo = self.docs.get(todo_id)
+        return todo is not None and not todo["completed"]
+
+    def _shift(self, todo_id, delta):
+        """Change how many open prerequisites a todo waits for"""
+        count = self.waiting[todo_id] = self.waiting[todo_id] + delta
+        todo = self.docs[todo_id]
+        if count == 0 and not todo["completed"]:
+            self.ready[todo_id] = todo
+        else:
+            self.ready.pop(todo_id, None)
+
+    def add(self, todo):
+        todo_id = todo["id"]
+        self.docs[todo_id] = todo
+        for prerequisite in prerequisites(todo):
+            self.dependents.setdefault(prerequisite, set()).add(todo_id)
+        self.waiting[todo_id] = 0
+        self._shift(todo_id, sum(1 for p in prerequisites(todo) if self._blocks(p)))
+        if not todo["completed"]:
+            for dependent in self.dependents.get(todo_id, ()):
+                if dependent in self.docs:
+                    self._shift(dependent, 1)
+
+    def remove(self, todo):
+        todo_id = todo["id"]
+        if not todo["completed"]:
+            for dependent in self.dependents.get(todo_id, ()):
+                if dependent in self.docs:
+                    self._shift(dependent, -1)
+        for prerequisite in prerequisites(todo):
+            dependents = self.dependents.get(prerequisite)
+            if dependents is not None:
+                dependents.discard(todo_id)
+                if not dependents:
+                    del self.dependents[prerequisite]
+        del self.docs[todo_id]
+        del self.waiting[todo_id]
+        self.ready.pop(todo_id, None)
+
+    def update(self, todo, old):
+        todo_id = todo["id"]
+        if "depends_on" in old:
+            before = {"id": todo_id, "depends_on": old["depends_on"],
+                      "completed": old["completed"] if "completed" in old else todo["completed"]}
+            self.remove(before)
+            self.add(todo)
+            return
+        self.docs[todo_id] = todo
+        if "completed" in old and bool(old["completed"]) != bool(todo["completed"]):
+            delta = -1 if todo["completed"] else 1
+            for dependent in self.dependents.get(todo_id, ()):
+                if dependent in self.docs:
+                    self._shift(dependent, delta)
+            self._shift(todo_id, 0)
+
+    def blocked_by(self, todo_id):
+        """Open prerequisites of a todo"""
+        return [self.docs[p] for p in self.prerequisites(todo_id) if self._blocks(p)]
+
+    def would_cycle(self, todo_id, depends_on):
+        return find_cycle(todo_id, depends_on, self.prerequisites)
+
+    def critical_path(self):
+        """Longest chain of open todos that each wait for the previous one"""
+        open_ids = [todo_id for todo_id in self.docs if self._blocks(todo_id)]
+        return [self.docs[todo_id] for todo_id in longest_chain(open_ids, self.prerequisites)]
@@ -0,0 +1,111 @@
+from bisect import bisect_left
+from datetime import date, datetime
+
+from todo_record import TodoRecord, pack_date
+
+
+def to_ordinal(when):
+    """Day ordinal of a date, datetime, "YYYY-MM-DD" string or epoch seconds"""
+    if isinstance(when, datetime):
+        return when.date().toordinal()
+    if isinstance(when, date):
+        return when.toordinal()
+    if isinstance(when, (int, float)):
+        return date.fromtimestamp(when).toordinal()
+    ordinal = pack_date(when)
+    if not isinstance(ordinal, int):
+        raise ValueError(f"not a YYYY-MM-DD date: {when!r}")
+    return ordinal
+
+
+class DueIndex:
+    """Incomplete todos with a due date, sorted by that date.
+
+    ``entries`` is a sorted list of ``(due ordinal, todo_id)`` pairs, so range
+    queries are a binary search plus a slice. Adds append and only mark the
+    list unsorted; it is sorted again on the next query or removal, so bulk
+    loads pay for one sort instead of an insort per todo. Todos whose due
+    date is empty or not a YYYY-MM-DD date are left out, as are completed
+    ones.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.entries = []
+        self.unsorted = False
+        self.keys = {}
+        self.docs = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, todo):
+        if todo["completed"]:
+            return
+        # Records already hold the ordinal; dicts need parsing
+        ordinal = todo.due if isinstance(todo, TodoRecord) else pack_date(todo["due_date"])
+        if not isinstance(ordinal, int):
+            return
+        todo_id = todo["id"]
+        entry = (ordinal, todo_id)
+        if self.entries and entry < self.entries[-1]:
+            self.unsorted = True
+        self.entries.append(entry)
+        self.keys[todo_id] = ordinal
+        self.docs[todo_id] = todo
+
+    def remove(self, todo):
+        todo_id = todo["id"]
+        ordinal = self.keys.pop(todo_id, None)
+        if ordinal is None:
+            return
+        entries = self._sorted()
+        del entries[bisect_left(entries, (ordinal, todo_id))]
+        del self.docs[todo_id]
+
+    def update(self, todo, old):
+        if "due_date" in old or "completed" in old:
+            self.remove(todo)
+            self.add(todo)
+
+    def _sorted(self):
+        if self.unsorted:
+            self.entries.sort()
+            self.unsorted = False
+        return self.entries
+
+    def _todos(self, entries):
+        return [self.docs[todo_id] for _, todo_id in entries]
+
+    def span(self, first=None, last=None):
+        """(start, end) positions in ``entries`` of the todos due from day
+        ordinal ``first`` to ``last``, inclusive; None for an open end"""
+        entries = self._sorted()
+        start = 0 if first is None else bisect_left(entries, (first,))
+        end = len(entries) if last is None else bisect_left(entries, (last + 1,))
+        return start, max(start, end)
+
+    def between(self, first=None, last=None):
+        """Todos due from day ordinal ``first`` to ``last``, soonest first"""
+        start, end = self.span(first, last)
+        return self._todos(self.entries[start:end])
+
+    def due_before(self, when):
+        """Todos due on or before the day of ``when``, soonest first"""
+        entries = self._sorted()
+        end = bisect_left(entries, (to_ordinal(when) + 1,))
+        return self._todos(entries[:end])
+
+    def overdue(self, today=None):
+        """Todos whose due date has passed, most overdue first"""
+        entries = self._sorted()
+        end = bisect_left(entries, (to_ordinal(today or date.today()),))
+        return self._todos(entries[:end])
+
+    def next_due(self, n, today=None):
+        """The ``n`` todos due soonest, from ``today`` on"""
+        entries = self._sorted()
+        start = bisect_left(entries, (to_ordinal(today or date.today()),))
+        return self._todos(entries[start:start + n])
@@ -0,0 +1,118 @@
+from collections import deque
+
+# Budget for the history, in stored values: each delta costs one, plus one
+# per field it keeps. Roughly 10,000 deleted todos or 100,000 added ones.
+LIMIT = 100000
+
+
+def delta_cost(delta):
+    if delta[0] == "delete":
+        return 1
+    return 1 + len(delta[-1])
+
+
+class UndoHistory:
+    """Undo/redo steps for a todo list, kept as inverse deltas.
+
+    Instead of copying the todos before each change, a backend records for
+    every mutation the delta that reverts it:
+
+        ("delete", todo_id)          undoes an add
+        ("update", todo_id, fields)  undoes an update; the old field values
+        ("add", todo)                undoes a delete; the whole todo
+
+    Deltas recorded until the backend calls ``end_step()`` (after a single
+    mutation, or when a transaction commits) form one step. Undoing a step
+    hands its deltas to the backend's ``revert``, which applies them newest
+    first as one change; the deltas recorded meanwhile become the matching
+    redo step, and vice versa. A new change clears the redo steps.
+
+    There is no limit on the number of steps, only on memory: once the
+    steps hold more than ``limit`` values (see delta_cost), the oldest ones
+    are evicted, undo steps before redo steps.
+    """
+
+    def __init__(self, limit=LIMIT):
+        self.limit = limit
+        self.undo_steps = deque()
+        self.redo_steps = deque()
+        self.size = 0
+        self.step = []
+        # "undo" or "redo" while a step is being reverted
+        self.replaying = None
+
+    def __len__(self):
+        return len(self.undo_steps)
+
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.size = 0
+        self.step = []
+
+    def record(self, delta):
+        """Add the inverse of one mutation to the current step"""
+        self.step.append(delta)
+
+    def renumber(self, old_id, new_id):
+        """Point deltas at a todo's new id, after it had to move"""
+        for step in (self.step, *self.undo_steps, *self.redo_steps):
+            for i, delta in enumerate(step):
+                if delta[0] == "add":
+                    if delta[1]["id"] == old_id:
+                        step[i] = ("add", dict(delta[1], id=new_id))
+                elif delta[1] == old_id:
+                    step[i] = (delta[0], new_id) + delta[2:]
+
+    def discard_step(self):
+        """Forget the current step, e.g. when its transaction rolled back"""
+        self.step = []
+
+    def end_step(self):
+        step, self.step = self.step, []
+        if not step:
+            return
+        if self.replaying == "undo":
+            self.redo_steps.append(step)
+        else:
+            if self.replaying is None:
+                self._drop(self.redo_steps)
+            self.undo_steps.append(step)
+        self.size += sum(delta_cost(delta) for delta in step)
+        while self.size > self.limit:
+            self.size -= sum(delta_cost(delta) for delta in
+                             (self.undo_steps or self.redo_steps).popleft())
+
+    def _drop(self, steps):
+        while steps:
+            self.size -= sum(delta_cost(delta) for delta in steps.pop())
+
+    def undo(self, revert):
+        """Revert the newest undo step with ``revert(deltas)``; False if none"""
+        return self._replay(self.undo_steps, "undo", revert)
+
+    def redo(self, revert):
+        """Revert the newest redo step with ``revert(deltas)``; False if none"""
+        return self._replay(self.redo_steps, "redo", revert)
+
+    def _replay(self, steps, mode, revert):
+        if not steps:
+            return False
+        step = steps.pop()
+        self.size -= sum(delta_cost(delta) for delta in step)
+        self.replaying = mode
+        try:
+            revert(step)
+        except BaseException:
+            steps.append(step)
+            self.size += sum(delta_cost(delta) for delta in step)
+            raise
+        finally:
+            self.replaying = None
+        return True
@@ -0,0 +1,119 @@
+from operator import itemgetter
+
+
+class TodoIndex:
+    """In-memory indexes over the todos held by a TodoList.
+
+    ``by_id`` is the primary id -> todo hash index and doubles as the
+    insertion-ordered store of todos. Secondary indexes bucket todos by
+    completion status, category and priority (case-insensitively, matching
+    the semantics of ``TodoList.get_todos``). Every index is updated
+    incrementally, so no operation here scans the whole list.
+    """
+
+    FIELDS = ("completed", "category", "priority")
+
+    def __init__(self):
+        self.by_id = {}
+        self.buckets = {field: {} for field in self.FIELDS}
+        self.category_counts = {}
+        self.max_id = 0
+        self.ordered = True
+
+    @staticmethod
+    def key(value):
+        """Normalize a field value to its bucket key"""
+        return value.lower() if isinstance(value, str) else value
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, todo_id):
+        return todo_id in self.by_id
+
+    def get(self, todo_id):
+        return self.by_id.get(todo_id)
+
+    def add(self, todo):
+        """Index a todo that is not indexed yet"""
+        todo_id = todo["id"]
+        if todo_id < self.max_id:
+            # Re-inserted (e.g. restored by a rollback): by_id is no longer
+            # in id order and gets re-sorted on the next full read
+            self.ordered = False
+        else:
+            self.max_id = todo_id
+        self.by_id[todo_id] = todo
+        self._add_secondary(todo)
+
+    def remove(self, todo):
+        """Drop a todo from every index"""
+        del self.by_id[todo["id"]]
+        self._remove_secondary(todo)
+
+    def update(self, todo, fields):
+        """Apply ``fields`` to an indexed todo, moving it between buckets"""
+        moved = any(field in fields for field in self.FIELDS)
+        if moved:
+            self._remove_secondary(todo)
+        todo.update(fields)
+        if moved:
+            self._add_secondary(todo)
+
+    def _add_secondary(self, todo):
+        todo_id = todo["id"]
+        for field in self.FIELDS:
+            self.buckets[field].setdefault(self.key(todo[field]), {})[todo_id] = todo
+        category = todo["category"]
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+
+    def _remove_secondary(self, todo):
+        todo_id = todo["id"]
+        for field in self.FIELDS:
+            index = self.buckets[field]
+            key = self.key(todo[field])
+            bucket = index[key]
+            del bucket[todo_id]
+            if not bucket:
+                del index[key]
+        category = todo["category"]
+        self.category_counts[category] -= 1
+        if not self.category_counts[category]:
+            del self.category_counts[category]
+
+    def bucket(self, field, value):
+        """Todos whose ``field`` matches ``value``, as an id -> todo dict"""
+        return self.buckets[field].get(self.key(value), {})
+
+    def matches(self, todo, filters):
+        """Whether a todo matches every field filter"""
+        return all(self.key(todo[field]) == self.key(value) for field, value in filters.items())
+
+    def smallest_bucket(self, filters):
+        """The bucket of the most selective field filter"""
+        return min((self.bucket(f, v) for f, v in filters.items()), key=len)
+
+    def matching(self, **filters):
+        """Todos matching every given field filter, as an unordered id -> todo dict
+
+        Only the smallest matching bucket is walked; the others are probed by
+        id, so the cost is proportional to the most selective filter.
+        """
+        buckets = sorted((self.bucket(f, v) for f, v in filters.items()), key=len)
+        result = buckets[0]
+        for other in buckets[1:]:
+            result = {todo_id: todo for todo_id, todo in result.items() if todo_id in other}
+        return result
+
+    def find(self, **filters):
+        """Todos matching every given field filter, ordered by id"""
+        if not filters:
+            if not self.ordered:
+                self.by_id = dict(sorted(self.by_id.items()))
+                self.ordered = True
+            return list(self.by_id.values())
+        return sorted(self.matching(**filters).values(), key=itemgetter("id"))
+
+    def categories(self):
+        """Distinct category names currently in use"""
+        return list(self.category_counts)
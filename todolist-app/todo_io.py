@@ -0,0 +1,247 @@
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+from todo_record import DATE_FORMAT, FIELDS, TIMESTAMP_FORMAT, pack_date, pack_timestamp
+from todo_sort import make_cursor
+
+# Columns written by export_todos and read back by import_todos
+EXPORT_FIELDS = FIELDS + ("depends_on",)
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+PRIORITIES = ("low", "medium", "high")
+TRUE = ("1", "true", "yes", "y")
+FALSE = ("0", "false", "no", "n", "")
+# Rows written per journal record / transaction on import, and read per
+# page on export
+BATCH_SIZE = 10000
+MAX_ERRORS = 100
+
+
+def detect_format(path, fmt=None):
+    """"csv" or "ndjson", from ``fmt`` or else the file extension"""
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ("csv", "ndjson"):
+        raise ValueError(f"cannot tell the format of {path}; use csv or ndjson")
+    return fmt
+
+
+def check_date(value, pack, date_format, field):
+    if value and not isinstance(pack(value), int):
+        raise ValueError(f"{field} {value!r} is not in {date_format} format")
+    return value or None
+
+
+def check_todo_fields(fields, allowed, required=()):
+    """Check add_todo/update_todo arguments from an untrusted source.
+
+    Text fields must be strings (due_date may also be null), priority one of
+    PRIORITIES, due_date a YYYY-MM-DD date and depends_on a list of ids.
+    Raises ValueError before anything reaches the TodoList, where a wrong
+    type would only fail half-way through updating its indexes.
+    """
+    for field in required:
+        if field not in fields:
+            raise ValueError(f"{field} is missing")
+    for field, value in fields.items():
+        if field not in allowed:
+            raise ValueError(f"unknown field {field!r}")
+        if field == "depends_on":
+            if not isinstance(value, list) or not all(
+                    isinstance(todo_id, int) and not isinstance(todo_id, bool) for todo_id in value):
+                raise ValueError("depends_on must be a list of todo ids")
+        elif not isinstance(value, str) and not (field == "due_date" and value is None):
+            raise ValueError(f"{field} must be a string, not {type(value).__name__}")
+    if "title" in fields and not fields["title"].strip():
+        raise ValueError("title is missing")
+    if "priority" in fields and fields["priority"].lower() not in PRIORITIES:
+        raise ValueError(f"priority {fields['priority']!r} is not one of {', '.join(PRIORITIES)}")
+    check_date(fields.get("due_date"), pack_date, DATE_FORMAT, "due_date")
+    return fields
+
+
+def text(row, field):
+    """``row[field]`` if it is a string, None if missing or null"""
+    value = row.get(field)
+    if value is None or isinstance(value, str):
+        return value
+    raise ValueError(f"{field} must be text, not {type(value).__name__}")
+
+
+def parse_id(value, field="id"):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    raise ValueError(f"{field} {value!r} is not a todo id")
+
+
+def parse_ids(value):
+    """depends_on as a list (NDJSON) or space-separated ids (CSV)"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    elif not isinstance(value, list):
+        raise ValueError(f"depends_on {value!r} is not a list of todo ids")
+    return [parse_id(todo_id, "depends_on") for todo_id in value]
+
+
+def validate(row):
+    """Normalize one imported row into todo fields; raises ValueError.
+
+    The row's own ``id`` and its ``depends_on`` list are returned as well;
+    import_todos maps them onto the ids the todos get.
+    """
+    title = (text(row, "title") or "").strip()
+    if not title:
+        raise ValueError("title is missing")
+    priority = (text(row, "priority") or "medium").strip().lower()
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority {priority!r} is not one of {', '.join(PRIORITIES)}")
+    completed = row.get("completed")
+    if isinstance(completed, str):
+        flag = completed.strip().lower()
+        if flag not in TRUE + FALSE:
+            raise ValueError(f"completed {completed!r} is not true or false")
+        completed = flag in TRUE
+    elif completed is not None and not isinstance(completed, (bool, int)):
+        raise ValueError(f"completed {completed!r} is not true or false")
+    completed = bool(completed)
+    todo_id = row.get("id")
+    return {
+        "id": parse_id(todo_id) if todo_id not in (None, "") else None,
+        "title": title,
+        "description": text(row, "description") or "",
+        "created_date": check_date(text(row, "created_date"), pack_timestamp, TIMESTAMP_FORMAT,
+                                  "created_date")
+                        or datetime.now().strftime(TIMESTAMP_FORMAT),
+        "due_date": check_date(text(row, "due_date"), pack_date, DATE_FORMAT, "due_date"),
+        "priority": priority,
+        "category": (text(row, "category") or "general").strip().lower(),
+        "completed": completed,
+        "completed_date": check_date(text(row, "completed_date"), pack_timestamp, TIMESTAMP_FORMAT,
+                                    "completed_date")
+                          if completed else None,
+        "depends_on": parse_ids(row.get("depends_on")),
+    }
+
+
+def read_rows(f, fmt):
+    """Yield (line number, row dict) from an open CSV or NDJSON file"""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, None
+            continue
+        yield line_no, row
+
+
+def import_todos(todo_list, path, fmt=None, batch_size=BATCH_SIZE):
+    """Stream todos from a CSV or NDJSON file into ``todo_list``.
+
+    Rows are validated one at a time and written ``batch_size`` at a time
+    through ``insert_many``, one journal record per batch, so memory use is
+    bounded by the batch, not the file. Imported todos get new ids;
+    ``depends_on`` links between rows of the file are carried over to them
+    once every row is in, and links to ids not in the file are dropped.
+    Invalid rows are skipped. Returns ``(imported, skipped, errors)`` where
+    ``errors`` lists the first MAX_ERRORS ``(line number, message)`` pairs.
+    """
+    fmt = detect_format(path, fmt)
+    imported = 0
+    skipped = 0
+    errors = []
+    # id in the file -> new id, and (new id, ids in the file, line number)
+    # for each row with dependencies
+    new_ids = {}
+    links = []
+
+    def report(line_no, message):
+        if len(errors) < MAX_ERRORS:
+            errors.append((line_no, message))
+
+    def valid_rows(rows):
+        nonlocal skipped
+        for line_no, row in rows:
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("not a JSON object")
+                yield line_no, validate(row)
+            except ValueError as e:
+                skipped += 1
+                report(line_no, str(e))
+
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        rows = valid_rows(read_rows(f, fmt))
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            todos = []
+            for _, fields in batch:
+                fields = dict(fields)
+                del fields["id"], fields["depends_on"]
+                todos.append(fields)
+            for (line_no, fields), todo_id in zip(batch, todo_list.insert_many(todos)):
+                if fields["id"] is not None:
+                    new_ids[fields["id"]] = todo_id
+                if fields["depends_on"]:
+                    links.append((todo_id, fields["depends_on"], line_no))
+            imported += len(batch)
+
+    with todo_list.transaction():
+        for todo_id, depends_on, line_no in links:
+            for old_id in depends_on:
+                if old_id not in new_ids:
+                    continue
+                try:
+                    todo_list.add_dependency(todo_id, new_ids[old_id])
+                except ValueError as e:
+                    report(line_no, str(e))
+    return imported, skipped, errors
+
+
+def iter_all(todo_list, batch_size=BATCH_SIZE):
+    """Every todo, read a page at a time"""
+    after = None
+    while True:
+        page = todo_list.get_todos(limit=batch_size, after=after)
+        yield from page
+        if len(page) < batch_size:
+            return
+        after = make_cursor(page[-1])
+
+
+def export_todos(todo_list, path, fmt=None, batch_size=BATCH_SIZE):
+    """Stream every todo to a CSV or NDJSON file; returns how many were written"""
+    fmt = detect_format(path, fmt)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for todo in iter_all(todo_list, batch_size):
+                row = {field: todo[field] for field in FIELDS}
+                row["completed"] = "true" if todo["completed"] else "false"
+                row["depends_on"] = " ".join(map(str, todo.get("depends_on") or ()))
+                writer.writerow(row)
+                count += 1
+        else:
+            for todo in iter_all(todo_list, batch_size):
+                row = {field: todo[field] for field in FIELDS}
+                if todo.get("depends_on"):
+                    row["depends_on"] = todo["depends_on"]
+                f.write(json.dumps(row) + "\n")
+                count += 1
+    return count
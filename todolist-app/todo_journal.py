@@ -0,0 +1,201 @@
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class TodoJournal:
+    """Append-only log of todo mutations stored as one JSON record per line.
+
+    The journal sits next to the ``todos.json`` snapshot. Every mutation is
+    appended here instead of rewriting the snapshot, and the snapshot is only
+    rewritten when the journal is compacted.
+
+    Several processes can share one journal. Each holds the advisory lock on
+    ``<journal>.lock`` while it reads or writes, and that file also stores a
+    version number that every compaction bumps. ``offset`` is how far this
+    process has read, so ``read_new()`` returns just the records other
+    processes appended since, or None when the journal was compacted under
+    it and everything has to be reloaded.
+    """
+
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+        self.lock_path = journal_file + ".lock"
+        # Number of mutations in the journal; a batch record counts each of
+        # the operations it holds
+        self.count = 0
+        self.offset = 0
+        self.version = 0
+        self._handle = None
+        self._lock_handle = None
+        self._lock_depth = 0
+
+    @contextmanager
+    def locked(self):
+        """Hold the inter-process lock; re-entrant within one process.
+
+        Not thread-safe by itself: callers serialize their threads first.
+        """
+        if not self._lock_depth:
+            if self._lock_handle is None:
+                self._lock_handle = open(self.lock_path, "a+")
+            lock_file(self._lock_handle)
+        self._lock_depth += 1
+        try:
+            yield self
+        finally:
+            self._lock_depth -= 1
+            if not self._lock_depth:
+                unlock_file(self._lock_handle)
+
+    def stored_version(self):
+        """Version number in the lock file (0 if none was written yet)"""
+        self._lock_handle.seek(0)
+        text = self._lock_handle.read().strip()
+        return int(text) if text else 0
+
+    def size(self):
+        try:
+            return os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return 0
+
+    def is_current(self):
+        """Whether no other process wrote since we last read (lock held)"""
+        return self.stored_version() == self.version and self.size() == self.offset
+
+    def read_new(self):
+        """Records appended since the last replay() or read_new() (lock held).
+
+        Returns None if the journal was compacted in the meantime.
+        """
+        if self.stored_version() != self.version or self.size() < self.offset:
+            return None
+        records = []
+        if self.size() == self.offset:
+            return records
+        with open(self.journal_file, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.offset += len(line)
+                self.count += self.weight(record)
+                records.append(record)
+        return records
+
+    def replay(self):
+        """Yield every record in the journal, in the order it was written.
+
+        A torn trailing line (e.g. from a crash mid-write) is dropped and the
+        file is truncated back to the last complete record.
+        """
+        self.count = 0
+        self.offset = 0
+        if self._lock_depth:
+            self.version = self.stored_version()
+        if not os.path.exists(self.journal_file):
+            return
+        good_offset = 0
+        torn = False
+        with open(self.journal_file, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    torn = True
+                    break
+                good_offset += len(line)
+                self.offset = good_offset
+                self.count += self.weight(record)
+                yield record
+        if torn:
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(good_offset)
+
+    def append(self, record):
+        """Append a single record"""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Append several records with a single write"""
+        if not records:
+            return
+        if self._handle is None:
+            self._handle = open(self.journal_file, "a", encoding="utf-8")
+        # default=dict serializes TodoRecord and other mapping types
+        data = "".join(json.dumps(r, default=dict) + "\n" for r in records)
+        start = os.fstat(self._handle.fileno()).st_size
+        try:
+            self._handle.write(data)
+            self._handle.flush()
+        except OSError:
+            # Cut off whatever part made it, so the records can be appended
+            # again without leaving a torn line in front of them
+            handle, self._handle = self._handle, None
+            try:
+                handle.close()
+            except OSError:
+                pass
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(start)
+            raise
+        self.offset = os.fstat(self._handle.fileno()).st_size
+        self.count += sum(self.weight(r) for r in records)
+
+    @staticmethod
+    def weight(record):
+        """Number of mutations a record stands for"""
+        return len(record["ops"]) if record["op"] == "batch" else 1
+
+    def truncate(self):
+        """Drop every record, typically right after a snapshot was written.
+
+        Bumps the version (when the lock is held) so other processes know
+        to reload the snapshot.
+        """
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        open(self.journal_file, "w").close()
+        self.count = 0
+        self.offset = 0
+        if self._lock_depth:
+            self.version = self.stored_version() + 1
+            self._lock_handle.seek(0)
+            self._lock_handle.truncate()
+            self._lock_handle.write(str(self.version))
+            self._lock_handle.flush()
+
+    def close(self):
+        """Close the underlying file handles"""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        if self._lock_handle is not None and not self._lock_depth:
+            self._lock_handle.close()
+            self._lock_handle = None
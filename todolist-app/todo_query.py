@@ -0,0 +1,170 @@
+import re
+import shlex
+from functools import lru_cache
+from operator import itemgetter
+
+from todo_due import to_ordinal
+from todo_index import TodoIndex
+from todo_record import TodoRecord, pack_date
+from todo_search import tokenize
+
+# field<op>value, e.g. "priority:high", "due<2026-11-01"
+TERM_RE = re.compile(r"(\w+)(:|<=|>=|<|>|=)(.*)")
+EQUALITY_FIELDS = ("completed", "category", "priority")
+COMPARISONS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "=": lambda a, b: a == b,
+}
+TRUE = ("true", "yes", "y", "1")
+FALSE = ("false", "no", "n", "0")
+
+
+def due_ordinal(todo):
+    """Due date of a todo as a day ordinal, or None if it has none"""
+    due = todo.due if isinstance(todo, TodoRecord) else pack_date(todo["due_date"])
+    return due if isinstance(due, int) else None
+
+
+def has_word(todo, word):
+    """Whether a token of the title or description starts with ``word``"""
+    return any(token.startswith(word)
+               for token in tokenize(todo["title"]) + tokenize(todo["description"]))
+
+
+class Query:
+    """A parsed todo query, ready to run against the in-memory indexes.
+
+    The language is a list of terms that must all match:
+
+        priority:high  category:work  completed:no   field equality
+        completed                                    same as completed:yes
+        due<2026-11-01  due>=2026-10-01  due:2026-10-16
+        report  "quarterly report"                   words in title/description
+        !term                                        negates any term
+
+    Words match as prefixes, like search(). Parsing and validation happen
+    once in compile_query(), which caches plans by query text.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        # field -> bucket key, for positive equality terms (index lookups)
+        self.equals = {}
+        # Inclusive due ordinal bounds of the positive due terms
+        self.due_from = None
+        self.due_to = None
+        # Positive words, answered by the search index
+        self.words = []
+        # (predicate, negate) pairs every candidate is checked against
+        self.checks = []
+        # The same terms as data, for backends that translate them (SQL):
+        # ("equals", field, key, negate), ("due", op, ordinal, negate) and
+        # ("word", word, negate)
+        self.terms = []
+        for term in shlex.split(text):
+            negate = term.startswith("!")
+            self._add_term(term[1:] if negate else term, negate)
+
+    def _add_term(self, term, negate):
+        match = TERM_RE.fullmatch(term)
+        if match is None:
+            if term.lower() == "completed":
+                self._add_equality("completed", not negate, False)
+                return
+            for word in tokenize(term):
+                if not negate:
+                    self.words.append(word)
+                self.checks.append((lambda todo, word=word: has_word(todo, word), negate))
+                self.terms.append(("word", word, negate))
+            return
+
+        field, op, value = match.groups()
+        field = field.lower()
+        if field == "due":
+            self._add_due(op, value, negate)
+        elif field in EQUALITY_FIELDS:
+            if op not in (":", "="):
+                raise ValueError(f"{field} only supports {field}:value")
+            if field == "completed":
+                if value.lower() not in TRUE + FALSE:
+                    raise ValueError(f"completed:{value} should be yes or no")
+                self._add_equality(field, value.lower() in TRUE, negate)
+            else:
+                self._add_equality(field, TodoIndex.key(value), negate)
+        else:
+            raise ValueError(f"unknown field {field!r} in {term!r}")
+
+    def _add_equality(self, field, key, negate):
+        if field == "completed" and negate:
+            # The only other value, and it is indexed too
+            key, negate = not key, False
+        if not negate and field not in self.equals:
+            self.equals[field] = key
+        self.checks.append((lambda todo: TodoIndex.key(todo[field]) == key, negate))
+        self.terms.append(("equals", field, key, negate))
+
+    def _add_due(self, op, value, negate):
+        op = "=" if op == ":" else op
+        compare = COMPARISONS[op]
+        ordinal = to_ordinal(value)
+
+        def check(todo):
+            due = due_ordinal(todo)
+            return due is not None and compare(due, ordinal)
+
+        self.checks.append((check, negate))
+        self.terms.append(("due", op, ordinal, negate))
+        if negate:
+            return
+        low = {"<": None, "<=": None, ">": ordinal + 1, ">=": ordinal, "=": ordinal}[op]
+        high = {"<": ordinal - 1, "<=": ordinal, ">": None, ">=": None, "=": ordinal}[op]
+        if low is not None:
+            self.due_from = low if self.due_from is None else max(self.due_from, low)
+        if high is not None:
+            self.due_to = high if self.due_to is None else min(self.due_to, high)
+
+    @property
+    def needs_completed(self):
+        """Whether completed todos may match"""
+        return self.equals.get("completed") is not False
+
+    def matches(self, todo):
+        return all(check(todo) != negate for check, negate in self.checks)
+
+    def candidates(self, index, due_index, search_index):
+        """The smallest set of todos that contains every match.
+
+        Each positive equality term offers its bucket, due bounds offer a
+        range of the due index (which only holds incomplete todos, so only
+        when the query excludes completed ones) and words offer the search
+        hits. All sizes but the last are known in O(log n); the search
+        hits are only looked up if a cheap estimate says they may be fewer.
+        """
+        options = [(len(index), lambda: index.by_id.values())]
+        for field, key in self.equals.items():
+            bucket = index.bucket(field, key)
+            options.append((len(bucket), bucket.values))
+        if self.equals.get("completed") is False and (self.due_from, self.due_to) != (None, None):
+            start, end = due_index.span(self.due_from, self.due_to)
+            options.append((end - start, lambda: due_index.between(self.due_from, self.due_to)))
+        size, todos = min(options, key=itemgetter(0))
+        if self.words and size > search_index.estimate(self.words):
+            hits = search_index.matching(self.words)
+            if len(hits) < size:
+                return hits
+        return todos()
+
+    def run(self, index, due_index, search_index, limit=None):
+        """Matching todos, ordered by id"""
+        todos = sorted((todo for todo in self.candidates(index, due_index, search_index)
+                        if self.matches(todo)), key=itemgetter("id"))
+        return todos if limit is None else todos[:limit]
+
+
+@lru_cache(maxsize=128)
+def compile_query(text):
+    """Parse a query once; the GUI re-runs the same one after every change"""
+    return Query(text)
@@ -0,0 +1,151 @@
+import sys
+from collections.abc import MutableMapping
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+EPOCH = datetime(1970, 1, 1)
+
+FIELDS = ("id", "title", "description", "created_date", "due_date",
+          "priority", "category", "completed", "completed_date")
+# Fields stored as-is in a slot of the same name
+PLAIN_FIELDS = frozenset(("id", "title", "description", "completed"))
+
+
+# Imports and bulk loads see the same date strings over and over, and
+# parsing them is most of the cost of building a record
+@lru_cache(maxsize=4096)
+def parse_timestamp(value):
+    try:
+        return int((datetime.strptime(value, TIMESTAMP_FORMAT) - EPOCH).total_seconds())
+    except ValueError:
+        return value
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value):
+    try:
+        return datetime.strptime(value, DATE_FORMAT).toordinal()
+    except ValueError:
+        return value
+
+
+def pack_timestamp(value):
+    """"YYYY-MM-DD HH:MM:SS" -> seconds since 1970 (naive, local time)"""
+    if not isinstance(value, str):
+        return value
+    return parse_timestamp(value)
+
+
+def unpack_timestamp(value):
+    if isinstance(value, int):
+        return (EPOCH + timedelta(seconds=value)).strftime(TIMESTAMP_FORMAT)
+    return value
+
+
+def pack_date(value):
+    """"YYYY-MM-DD" -> proleptic Gregorian ordinal; anything else is kept"""
+    if not isinstance(value, str) or len(value) != 10:
+        return value
+    return parse_date(value)
+
+
+def unpack_date(value):
+    if isinstance(value, int):
+        return date.fromordinal(value).strftime(DATE_FORMAT)
+    return value
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TodoRecord(MutableMapping):
+    """Compact in-memory representation of a todo.
+
+    Uses ``__slots__`` instead of a per-todo dict, interns category and
+    priority so equal values share one string, and keeps dates as integers
+    (seconds since 1970 for timestamps, ordinals for due dates). Reading or
+    writing it through the mapping interface converts to and from the usual
+    string formats, so code written against todo dicts (``todo["due_date"]``,
+    ``todo.get(...)``, ``dict(todo)``, ``json.dump(..., default=dict)``)
+    keeps working. Keys outside the standard fields go to ``extra``.
+    """
+
+    __slots__ = ("id", "title", "description", "created", "due",
+                 "priority", "category", "completed", "completed_at", "extra")
+
+    def __init__(self, id, title, description="", created_date=None, due_date=None,
+                 priority="medium", category="general", completed=False,
+                 completed_date=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.created = pack_timestamp(created_date)
+        self.due = pack_date(due_date)
+        self.priority = intern(priority)
+        self.category = intern(category)
+        self.completed = completed
+        self.completed_at = pack_timestamp(completed_date)
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, todo):
+        """Build a record from a todo dict (e.g. as loaded from JSON)"""
+        record = cls(todo["id"], todo.get("title", ""))
+        for key, value in todo.items():
+            if key != "id":
+                record[key] = value
+        return record
+
+    def __getitem__(self, key):
+        if key in PLAIN_FIELDS:
+            return getattr(self, key)
+        if key == "category":
+            return self.category
+        if key == "priority":
+            return self.priority
+        if key == "due_date":
+            return unpack_date(self.due)
+        if key == "created_date":
+            return unpack_timestamp(self.created)
+        if key == "completed_date":
+            return unpack_timestamp(self.completed_at)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in PLAIN_FIELDS:
+            setattr(self, key, value)
+        elif key == "category":
+            self.category = intern(value)
+        elif key == "priority":
+            self.priority = intern(value)
+        elif key == "due_date":
+            self.due = pack_date(value)
+        elif key == "created_date":
+            self.created = pack_timestamp(value)
+        elif key == "completed_date":
+            self.completed_at = pack_timestamp(value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if self.extra is None or key not in self.extra:
+            raise KeyError(key)
+        del self.extra[key]
+
+    def __iter__(self):
+        yield from FIELDS
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return len(FIELDS) + (len(self.extra) if self.extra else 0)
+
+    def __repr__(self):
+        return f"TodoRecord({dict(self)!r})"
@@ -0,0 +1,185 @@
+import itertools
+import time
+from datetime import datetime, time as clock_time
+
+from todo_record import pack_date
+
+
+class Timer:
+    __slots__ = ("id", "deadline", "callback", "args", "slot")
+
+    def __init__(self, id, deadline, callback, args):
+        self.id = id
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.slot = None
+
+
+class TimerWheel:
+    """Hierarchical timing wheel for large numbers of pending timers.
+
+    Time is counted in ticks of ``tick`` seconds. Level 0 has one slot per
+    tick for the next ``slots`` ticks; each level above covers ``slots``
+    times the span of the one below, and its slots are redistributed to the
+    lower levels as time reaches them. Scheduling and cancelling are O(1),
+    every timer moves down at most ``levels`` times before it fires, and a
+    tick with nothing due costs O(1), so the work per tick is O(1) amortized
+    however many timers are pending. Timers further out than the wheel spans
+    wait in an overflow slot that is re-sorted once per full turn.
+
+    The wheel has no thread of its own: call ``advance(now)`` regularly,
+    e.g. from ``root.after`` in a Tk app, and due callbacks run there.
+    """
+
+    def __init__(self, tick=1.0, slots=64, levels=4, now=None):
+        self.tick = tick
+        self.slots = slots
+        self.levels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.overflow = {}
+        self.current = int((time.time() if now is None else now) / tick)
+        self.count = 0
+        self._ids = itertools.count()
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, when, callback, *args):
+        """Call ``callback(*args)`` once ``advance`` passes ``when`` (epoch seconds).
+
+        Returns a timer that can be passed to ``cancel``. Times in the past
+        fire on the next tick.
+        """
+        deadline = max(int(when / self.tick), self.current + 1)
+        timer = Timer(next(self._ids), deadline, callback, args)
+        self._place(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer):
+        """Drop a timer that has not fired yet; returns whether it was pending"""
+        if timer.slot is None:
+            return False
+        del timer.slot[timer.id]
+        timer.slot = None
+        self.count -= 1
+        return True
+
+    def _place(self, timer):
+        delta = timer.deadline - self.current
+        span = self.slots
+        for level, wheel in enumerate(self.levels):
+            if delta < span:
+                slot = wheel[(timer.deadline // (span // self.slots)) % self.slots]
+                break
+            span *= self.slots
+        else:
+            slot = self.overflow
+        slot[timer.id] = timer
+        timer.slot = slot
+
+    def advance(self, now=None):
+        """Move the wheel up to ``now`` and run every callback that is due.
+
+        Returns the number of callbacks run.
+        """
+        target = int((time.time() if now is None else now) / self.tick)
+        fired = 0
+        while self.current < target:
+            if not self.count:
+                self.current = target
+                break
+            self.current += 1
+            self._cascade()
+            slot = self.levels[0][self.current % self.slots]
+            while slot:
+                _, timer = slot.popitem()
+                timer.slot = None
+                self.count -= 1
+                timer.callback(*timer.args)
+                fired += 1
+        return fired
+
+    def _cascade(self):
+        """Redistribute the higher-level slots that time has just reached"""
+        span = 1
+        for level in range(len(self.levels)):
+            span *= self.slots
+            if self.current % span:
+                break
+            if level + 1 < len(self.levels):
+                slot = self.levels[level + 1][(self.current // span) % self.slots]
+            else:
+                slot = self.overflow
+            timers = list(slot.values())
+            slot.clear()
+            for timer in timers:
+                self._place(timer)
+
+
+class TodoReminders:
+    """Schedules a reminder for every incomplete todo with a due date.
+
+    Follows the todo list's change events, so reminders are moved or dropped
+    as todos are edited, completed or deleted. ``notify(todo)`` is called at
+    ``remind_at`` on the due date, minus ``lead`` seconds; reminders that
+    would already be in the past are not scheduled (``overdue()`` lists
+    those todos).
+    """
+
+    REMIND_AT = clock_time(9, 0)
+
+    def __init__(self, todo_list, notify, wheel=None, lead=0, remind_at=REMIND_AT):
+        self.todo_list = todo_list
+        self.notify = notify
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self.lead = lead
+        self.remind_at = remind_at
+        self.timers = {}
+        self.reload()
+        todo_list.subscribe(self.on_todo_changed)
+
+    def close(self):
+        self.todo_list.unsubscribe(self.on_todo_changed)
+
+    def reload(self):
+        for timer in self.timers.values():
+            self.wheel.cancel(timer)
+        self.timers = {}
+        for todo in self.todo_list.get_todos(filter_completed=False):
+            self._schedule(todo)
+
+    def remind_time(self, todo):
+        """Epoch seconds at which to remind about a todo, or None"""
+        ordinal = pack_date(todo["due_date"])
+        if todo["completed"] or not isinstance(ordinal, int):
+            return None
+        day = datetime.fromordinal(ordinal)
+        return datetime.combine(day, self.remind_at).timestamp() - self.lead
+
+    def _schedule(self, todo):
+        when = self.remind_time(todo)
+        if when is not None and when > time.time():
+            self.timers[todo["id"]] = self.wheel.schedule(when, self._fire, todo["id"])
+
+    def _cancel(self, todo_id):
+        timer = self.timers.pop(todo_id, None)
+        if timer is not None:
+            self.wheel.cancel(timer)
+
+    def _fire(self, todo_id):
+        self.timers.pop(todo_id, None)
+        todo = self.todo_list.get_todo(todo_id)
+        if todo is not None and not todo["completed"]:
+            self.notify(todo)
+
+    def on_todo_changed(self, event, todo, old):
+        if event == "reset":
+            self.reload()
+        elif event == "add":
+            self._schedule(todo)
+        elif event == "delete":
+            self._cancel(todo["id"])
+        elif "due_date" in old or "completed" in old:
+            self._cancel(todo["id"])
+            self._schedule(todo)
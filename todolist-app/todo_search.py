@@ -0,0 +1,139 @@
+import heapq
+import re
+from bisect import bisect_left
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-cased word tokens of a piece of text"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Inverted index over todo titles and descriptions.
+
+    ``postings`` maps each token to ``{todo_id: weight}``, where title
+    occurrences weigh more than description ones. The sorted ``vocabulary``
+    lets every query word also match as a prefix ("rep" finds "report")
+    with a binary search instead of a scan; new tokens are appended and the
+    vocabulary is sorted again lazily, on the next lookup.
+    """
+
+    TITLE_WEIGHT = 3
+    DESCRIPTION_WEIGHT = 1
+    # Share of the weight a prefix match earns compared to a whole word
+    PREFIX_FACTOR = 0.5
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.unsorted = False
+        self.doc_terms = {}
+        self.docs = {}
+
+    def add(self, todo):
+        todo_id = todo["id"]
+        weights = {}
+        for token in tokenize(todo["title"]):
+            weights[token] = weights.get(token, 0) + self.TITLE_WEIGHT
+        for token in tokenize(todo["description"]):
+            weights[token] = weights.get(token, 0) + self.DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                if self.vocabulary and token < self.vocabulary[-1]:
+                    self.unsorted = True
+                self.vocabulary.append(token)
+            posting[todo_id] = weight
+        self.doc_terms[todo_id] = list(weights)
+        self.docs[todo_id] = todo
+
+    def remove(self, todo):
+        todo_id = todo["id"]
+        for token in self.doc_terms.pop(todo_id, ()):
+            posting = self.postings[token]
+            del posting[todo_id]
+            if not posting:
+                del self.postings[token]
+                vocabulary = self._sorted()
+                del vocabulary[bisect_left(vocabulary, token)]
+        self.docs.pop(todo_id, None)
+
+    def update(self, todo, old):
+        if "title" in old or "description" in old:
+            self.remove(todo)
+            self.add(todo)
+        else:
+            self.docs[todo["id"]] = todo
+
+    def _sorted(self):
+        if self.unsorted:
+            self.vocabulary.sort()
+            self.unsorted = False
+        return self.vocabulary
+
+    def matching_terms(self, word):
+        """Vocabulary terms equal to or starting with ``word``"""
+        vocabulary = self._sorted()
+        start = bisect_left(vocabulary, word)
+        end = bisect_left(vocabulary, word + "\uffff", start)
+        return vocabulary[start:end]
+
+    def estimate(self, words):
+        """Rough, cheap size of matching(words): the smallest exact posting,
+        or the number of terms a word is a prefix of"""
+        vocabulary = self._sorted()
+        sizes = []
+        for word in words:
+            posting = self.postings.get(word)
+            if posting is not None:
+                sizes.append(len(posting))
+            else:
+                sizes.append(bisect_left(vocabulary, word + "\uffff") - bisect_left(vocabulary, word))
+        return min(sizes)
+
+    def matching(self, words):
+        """Todos matching every word (whole or as a prefix), as a list"""
+        per_word = sorted((self.scores(word) for word in words), key=len)
+        ids = set(per_word[0])
+        for scores in per_word[1:]:
+            ids.intersection_update(scores)
+        return [self.docs[todo_id] for todo_id in ids]
+
+    def scores(self, word):
+        """todo_id -> score for one query word"""
+        scores = {}
+        for term in self.matching_terms(word):
+            factor = 1 if term == word else self.PREFIX_FACTOR
+            for todo_id, weight in self.postings[term].items():
+                scores[todo_id] = scores.get(todo_id, 0) + weight * factor
+        return scores
+
+    def search(self, query, limit=None):
+        """Todos matching every word of ``query``, best matches first.
+
+        Ties are broken by due date (soonest first, undated last), then id.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        per_word = sorted((self.scores(word) for word in words), key=len)
+        totals = per_word[0]
+        for scores in per_word[1:]:
+            totals = {todo_id: total + scores[todo_id]
+                      for todo_id, total in totals.items() if todo_id in scores}
+
+        def rank(todo_id):
+            due_date = self.docs[todo_id]["due_date"]
+            return (-totals[todo_id], not due_date, due_date or "", todo_id)
+
+        if limit is None:
+            ranked = sorted(totals, key=rank)
+        else:
+            ranked = heapq.nsmallest(limit, totals, key=rank)
+        return [self.docs[todo_id] for todo_id in ranked]
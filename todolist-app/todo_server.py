@@ -0,0 +1,278 @@
+"""HTTP/JSON service for a todo list, built on asyncio and the standard library.
+
+Routes:
+    GET    /todos               list (completed, category, priority, sort_by, limit, after)
+    POST   /todos               add a todo, body as add_todo arguments
+    GET    /todos/<id>          one todo
+    PATCH  /todos/<id>          update, body as update_todo arguments
+    POST   /todos/<id>/complete mark completed
+    DELETE /todos/<id>          delete
+    GET    /search?q=...        full-text search (limit)
+    GET    /due?before=...      due-date queries (before, overdue, next)
+
+Usage: python todo_server.py [--backend json|sqlite] [--file todos.json] [--port 8080]
+"""
+import asyncio
+import json
+from collections.abc import Mapping
+from urllib.parse import parse_qs, urlsplit
+
+from cli_todo import build_arg_parser, open_todo_list
+from todo_io import check_todo_fields
+from todo_sort import make_cursor
+
+MAX_BODY = 1 << 20
+# Body fields accepted by POST /todos and PATCH /todos/<id>
+UPDATE_FIELDS = ("title", "description", "due_date", "priority", "category")
+ADD_FIELDS = UPDATE_FIELDS + ("depends_on",)
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TodoServer:
+    """Serves one todo list to many concurrent clients.
+
+    Reads run directly on the event loop against the in-memory indexes, so
+    any number of them proceed concurrently. Mutations are queued to a
+    single writer task: it applies every mutation waiting in the queue in
+    one transaction, writes the resulting journal record in a worker thread
+    and only then answers the clients, so a burst of writes costs one disk
+    write (group commit) and the loop never blocks on the disk.
+    """
+
+    def __init__(self, todo_list):
+        self.todo_list = todo_list
+        self.queue = asyncio.Queue()
+        self.writer_task = None
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.writer_task = asyncio.create_task(self._write_loop())
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writer_task is not None:
+            await self.queue.put(None)
+            await self.writer_task
+        self.todo_list.flush()
+
+    async def mutate(self, method, *args, **kwargs):
+        """Run a TodoList mutation on the writer task; returns its result once durable"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((method, args, kwargs, future))
+        return await future
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            stop = None in batch
+            batch = [item for item in batch if item is not None]
+            results = []
+            with self.todo_list.transaction():
+                for method, args, kwargs, future in batch:
+                    try:
+                        result = getattr(self.todo_list, method)(*args, **kwargs)
+                        if method == "add_todo":
+                            # Merging with other processes may still move it to another id
+                            result = self.todo_list.get_todo(result)
+                        results.append((future, result, None))
+                    except Exception as e:
+                        results.append((future, None, e))
+            error = None
+            try:
+                written = await loop.run_in_executor(None, self.todo_list.flush, False)
+                if not written:
+                    # Another process wrote meanwhile; merge here, where reads run
+                    self.todo_list.flush()
+            except Exception as e:
+                error = e
+            for future, result, exception in results:
+                if future.cancelled():
+                    continue
+                if exception or error:
+                    future.set_exception(exception or error)
+                elif isinstance(result, Mapping):
+                    future.set_result(result["id"])
+                else:
+                    future.set_result(result)
+            if stop:
+                return
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except (TypeError, ValueError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                self.write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            self.write_response(writer, e.status, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """(method, target, headers, body, keep_alive), or None at end of stream"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length") or "0"
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, "malformed Content-Length")
+        length = int(length)
+        if length > MAX_BODY:
+            raise HTTPError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target, headers, body, keep_alive
+
+    def write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=dict).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if parts == ["todos"]:
+            if method == "GET":
+                return 200, self.list_todos(query)
+            if method == "POST":
+                fields = check_todo_fields(self.json_body(body), ADD_FIELDS, required=("title",))
+                todo_id = await self.mutate("add_todo", **fields)
+                return 201, {"id": todo_id}
+        elif len(parts) >= 2 and parts[0] == "todos":
+            todo_id = self.parse_id(parts[1])
+            if len(parts) == 2 and method == "GET":
+                todo = self.todo_list.get_todo(todo_id)
+                if todo is None:
+                    raise HTTPError(404, f"todo {todo_id} not found")
+                return 200, todo
+            if len(parts) == 2 and method == "PATCH":
+                fields = check_todo_fields(self.json_body(body), UPDATE_FIELDS)
+                found = await self.mutate("update_todo", todo_id, **fields)
+            elif len(parts) == 2 and method == "DELETE":
+                found = await self.mutate("delete_todo", todo_id)
+            elif parts[2:] == ["complete"] and method == "POST":
+                found = await self.mutate("complete_todo", todo_id)
+            else:
+                raise HTTPError(405, f"{method} not allowed on {url.path}")
+            if not found:
+                raise HTTPError(404, f"todo {todo_id} not found")
+            return 200, {"id": todo_id}
+        elif parts == ["search"] and method == "GET":
+            limit = int(query["limit"]) if "limit" in query else None
+            return 200, {"todos": self.todo_list.search(query.get("q", ""), limit)}
+        elif parts == ["due"] and method == "GET":
+            if "before" in query:
+                todos = self.todo_list.due_before(query["before"])
+            elif "next" in query:
+                todos = self.todo_list.next_due(int(query["next"]))
+            else:
+                todos = self.todo_list.overdue()
+            return 200, {"todos": todos}
+        else:
+            raise HTTPError(404, f"no route for {url.path}")
+        raise HTTPError(405, f"{method} not allowed on {url.path}")
+
+    def list_todos(self, query):
+        completed = query.get("completed")
+        if completed is not None:
+            completed = completed.lower() in ("1", "true", "yes")
+        sort_by = query.get("sort_by", "id")
+        limit = int(query["limit"]) if "limit" in query else None
+        todos = self.todo_list.get_todos(
+            completed, query.get("category"), query.get("priority"),
+            sort_by=sort_by, limit=limit, after=query.get("after"))
+        cursor = None
+        if todos and limit is not None and len(todos) == limit:
+            cursor = make_cursor(todos[-1], sort_by)
+        return {"todos": todos, "next": cursor}
+
+    @staticmethod
+    def parse_id(text):
+        try:
+            return int(text)
+        except ValueError:
+            raise HTTPError(404, f"no todo {text!r}") from None
+
+    @staticmethod
+    def json_body(body):
+        try:
+            fields = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "request body is not valid JSON") from None
+        if not isinstance(fields, dict):
+            raise HTTPError(400, "request body must be a JSON object")
+        return fields
+
+
+async def serve(todo_list, host, port):
+    server = TodoServer(todo_list)
+    host, port = await server.start(host, port)
+    print(f"Serving todos on http://{host}:{port}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = build_arg_parser("Todo List HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    todo_list = open_todo_list(args.backend, args.file, write_behind=True)
+    try:
+        asyncio.run(serve(todo_list, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        todo_list.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import json
+from bisect import bisect_left, bisect_right, insort
+
+from todo_record import pack_date
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+def priority_key(priority):
+    """High, medium, low, then anything else"""
+    return (PRIORITY_RANK.get(priority.lower(), 3),)
+
+
+def due_date_key(due_date):
+    """YYYY-MM-DD dates soonest first, then other text, then no due date"""
+    if not due_date:
+        return (2, "")
+    ordinal = pack_date(due_date)
+    if isinstance(ordinal, int):
+        return (0, ordinal)
+    return (1, due_date)
+
+
+def title_key(title):
+    return (title.lower(),)
+
+
+# sort_by -> (field, key function of the field value). Ties are broken by id.
+SORT_KEYS = {
+    "id": ("id", lambda todo_id: ()),
+    "due_date": ("due_date", due_date_key),
+    "priority": ("priority", priority_key),
+    "title": ("title", title_key),
+}
+
+
+def check_sort(sort_by):
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"cannot sort by {sort_by!r}, choose from {', '.join(SORT_KEYS)}")
+
+
+def sort_key(todo, sort_by):
+    """Position of a todo in the ``sort_by`` order"""
+    field, key = SORT_KEYS[sort_by]
+    return (key(todo[field]), todo["id"])
+
+
+def make_cursor(todo, sort_by="id"):
+    """Cursor for the page that follows ``todo`` in the ``sort_by`` order.
+
+    The cursor records the todo's sort value rather than its position, so it
+    stays valid when todos are added or removed, including ``todo`` itself.
+    """
+    field = SORT_KEYS[sort_by][0]
+    return json.dumps([sort_by, todo[field], todo["id"]])
+
+
+def parse_cursor(cursor, sort_by):
+    """(sort value, todo id) stored in a cursor made for ``sort_by``"""
+    try:
+        cursor_sort, value, todo_id = json.loads(cursor)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid cursor: {cursor!r}") from None
+    if cursor_sort != sort_by:
+        raise ValueError(f"cursor was made for sort_by={cursor_sort!r}, not {sort_by!r}")
+    return value, todo_id
+
+
+class SortedIndex:
+    """Todos kept in one sort order for paging.
+
+    ``entries`` is a sorted list of ``sort_key(todo)`` pairs, so finding the
+    start of a page is a binary search and reading it is a slice. Built on
+    first use for each sort order. As in DueIndex, building (or rebuilding
+    after a reload) appends and sorts once on the next read; after that,
+    single changes are placed with insort.
+    """
+
+    def __init__(self, sort_by):
+        check_sort(sort_by)
+        self.sort_by = sort_by
+        self.field = SORT_KEYS[sort_by][0]
+        self.clear()
+
+    def clear(self):
+        self.entries = []
+        # Until the next read, adds append and the list is sorted once then
+        self.unsorted = True
+        self.keys = {}
+        self.docs = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, todo):
+        key = sort_key(todo, self.sort_by)
+        if self.unsorted:
+            self.entries.append(key)
+        else:
+            insort(self.entries, key)
+        self.keys[todo["id"]] = key
+        self.docs[todo["id"]] = todo
+
+    def remove(self, todo):
+        key = self.keys.pop(todo["id"])
+        entries = self._sorted()
+        del entries[bisect_left(entries, key)]
+        del self.docs[todo["id"]]
+
+    def update(self, todo, old):
+        if self.field in old:
+            self.remove(todo)
+            self.add(todo)
+
+    def _sorted(self):
+        if self.unsorted:
+            self.entries.sort()
+            self.unsorted = False
+        return self.entries
+
+    def cursor_key(self, after):
+        """Entry position recorded by the cursor ``after``, or None"""
+        if after is None:
+            return None
+        value, todo_id = parse_cursor(after, self.sort_by)
+        return (SORT_KEYS[self.sort_by][1](value), todo_id)
+
+    def position(self, cursor):
+        """Index of the first entry after ``cursor`` (a cursor_key())"""
+        return 0 if cursor is None else bisect_right(self._sorted(), cursor)
+
+    def iter_from(self, start):
+        """Todos in order from entry ``start`` on"""
+        docs = self.docs
+        entries = self._sorted()
+        for index in range(start, len(entries)):
+            yield docs[entries[index][1]]
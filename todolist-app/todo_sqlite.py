@@ -0,0 +1,554 @@
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from todo_archive import TodoArchive
+from todo_deps import find_cycle, longest_chain
+from todo_due import to_ordinal
+from todo_history import UndoHistory
+from todo_query import compile_query
+from todo_record import TIMESTAMP_FORMAT
+from todo_search import tokenize
+from todo_sort import SORT_KEYS, check_sort, parse_cursor
+from todo_stats import compute_stats, summarize
+
+# AUTOINCREMENT makes SQLite keep the highest id ever handed out, so the id
+# of a deleted todo is never given to a new one (like TodoList's next_id)
+TODOS_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    created_date TEXT NOT NULL,
+    due_date TEXT,
+    priority TEXT NOT NULL COLLATE NOCASE,
+    category TEXT NOT NULL COLLATE NOCASE,
+    completed INTEGER NOT NULL DEFAULT 0,
+    completed_date TEXT,
+    depends_on TEXT
+);
+"""
+
+SCHEMA = TODOS_TABLE.format(name="todos") + """
+CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos (completed);
+CREATE INDEX IF NOT EXISTS idx_todos_category ON todos (category);
+CREATE INDEX IF NOT EXISTS idx_todos_priority ON todos (priority);
+CREATE INDEX IF NOT EXISTS idx_todos_due_date ON todos (due_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+    title, description, content='todos', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+    INSERT INTO todos_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO todos_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+"""
+
+# due_date values the due-date queries understand (YYYY-MM-DD)
+DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+# SQL versions of the todo_sort key functions, "{0}" standing for the
+# column (or a cursor parameter)
+SORT_SQL = {
+    "id": [],
+    "due_date": [
+        f"CASE WHEN {{0}} GLOB '{DATE_GLOB}' THEN 0 WHEN COALESCE({{0}}, '') = '' THEN 2 ELSE 1 END",
+        "COALESCE({0}, '')",
+    ],
+    "priority": ["CASE lower({0}) WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END"],
+    "title": ["lower({0})"],
+}
+
+COLUMNS = ("id", "title", "description", "created_date", "due_date",
+           "priority", "category", "completed", "completed_date", "depends_on")
+
+
+def to_column(column, value):
+    """A todo field as stored in its column; depends_on is a JSON list"""
+    if column == "completed":
+        return int(bool(value))
+    if column == "depends_on":
+        return json.dumps(value) if value else None
+    return value
+
+
+class SQLiteTodoList:
+    """TodoList backed by a SQLite database instead of todos.json.
+
+    Exposes the same public API as ``cli_todo.TodoList``. Filters are pushed
+    down into SQL so that they are answered from the indexes on ``completed``,
+    ``category``, ``priority`` and ``due_date`` instead of a scan in Python.
+    """
+
+    ARCHIVE_AFTER_DAYS = 30
+
+    def __init__(self, db_file="todos.db"):
+        self.db_file = db_file
+        self.archive = TodoArchive(os.path.splitext(db_file)[0] + ".archive")
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'todos_fts'"
+        ).fetchone()
+        self.conn.executescript(SCHEMA)
+        if not has_fts:
+            # Databases created before full-text search existed
+            self.conn.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(todos)")}
+        if "depends_on" not in columns:
+            # Databases created before dependencies existed
+            self.conn.execute("ALTER TABLE todos ADD COLUMN depends_on TEXT")
+        self.conn.commit()
+        table_sql = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'todos'"
+        ).fetchone()[0]
+        if "AUTOINCREMENT" not in table_sql.upper():
+            # Databases created before ids were never reused: copy the rows
+            # into a table that keeps a high-water mark (seeded with the
+            # highest id left), then recreate its indexes and triggers. The
+            # full-text index is keyed by id, which does not change.
+            self.conn.executescript(
+                "BEGIN;" + TODOS_TABLE.format(name="todos_new")
+                + f"INSERT INTO todos_new ({', '.join(COLUMNS)}) SELECT {', '.join(COLUMNS)} FROM todos;"
+                + "DROP TABLE todos; ALTER TABLE todos_new RENAME TO todos;"
+                + SCHEMA + "COMMIT;"
+            )
+        self._txn_depth = 0
+        self._listeners = []
+        self.undo_history = UndoHistory()
+
+    def load_todos(self):
+        """Nothing to load, rows are read on demand"""
+
+    def save_todos(self):
+        """Commit pending changes to the database"""
+        self.conn.commit()
+
+    def flush(self, merge=True):
+        """Nothing is held back, every change is committed right away"""
+        return True
+
+    def refresh(self):
+        """Reads always go to the database, so there is nothing to pick up"""
+        return False
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def subscribe(self, listener):
+        """Call ``listener(event, todo, old)`` after every change, like TodoList"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, event, todo, old=None):
+        for listener in self._listeners:
+            listener(event, todo, old)
+
+    def _commit(self):
+        if not self._txn_depth:
+            self.conn.commit()
+            self.undo_history.end_step()
+
+    @contextmanager
+    def transaction(self):
+        """Commit several mutations at once, or roll all of them back"""
+        self._txn_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._txn_depth -= 1
+            if not self._txn_depth:
+                self.conn.rollback()
+                self.undo_history.discard_step()
+                self._notify("reset", None)
+            raise
+        self._txn_depth -= 1
+        self._commit()
+
+    def _to_todo(self, row):
+        todo = dict(row)
+        todo["completed"] = bool(todo["completed"])
+        # Like TodoList, only todos with dependencies have the key
+        depends_on = todo.pop("depends_on", None)
+        if depends_on:
+            todo["depends_on"] = json.loads(depends_on)
+        return todo
+
+    def add_todo(self, title, description="", due_date=None, priority="medium", category="general",
+                 depends_on=None):
+        """Add a new todo item, optionally waiting for the todos in ``depends_on``"""
+        for prerequisite in depends_on or ():
+            if self.get_todo(prerequisite) is None:
+                raise ValueError(f"todo {prerequisite} not found")
+        cursor = self.conn.execute(
+            "INSERT INTO todos (title, description, created_date, due_date, priority, category, "
+            "depends_on) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (title, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+             due_date, priority, category, to_column("depends_on", depends_on))
+        )
+        self.undo_history.record(("delete", cursor.lastrowid))
+        self._commit()
+        if self._listeners:
+            self._notify("add", self.get_todo(cursor.lastrowid))
+        return cursor.lastrowid
+
+    def _set_fields(self, todo_id, fields):
+        old_todo = self.get_todo(todo_id)
+        if old_todo is None:
+            return False
+        old = {name: old_todo.get(name) for name in fields}
+        self.undo_history.record(("update", todo_id, old))
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self.conn.execute(
+            f"UPDATE todos SET {assignments} WHERE id = ?",
+            [to_column(name, value) for name, value in fields.items()] + [todo_id]
+        )
+        self._commit()
+        if self._listeners:
+            self._notify("update", self.get_todo(todo_id), old)
+        return True
+
+    def complete_todo(self, todo_id):
+        """Mark a todo as completed"""
+        return self._set_fields(todo_id, {
+            "completed": True,
+            "completed_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+    def delete_todo(self, todo_id):
+        """Delete a todo item"""
+        todo = self.get_todo(todo_id)
+        if todo is None:
+            return False
+        with self.transaction():
+            # Nothing should go on waiting for a todo that is gone
+            dependents = self.conn.execute(
+                "SELECT todos.id FROM todos, json_each(todos.depends_on) WHERE json_each.value = ?",
+                (todo_id,)
+            ).fetchall()
+            for (dependent_id,) in dependents:
+                self._set_fields(dependent_id, {"depends_on": [
+                    i for i in self._prerequisites(dependent_id) if i != todo_id]})
+            self.undo_history.record(("add", todo))
+            self.conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        self._notify("delete", todo)
+        return True
+
+    def _restore(self, todo):
+        """Insert a deleted todo again, under its old id"""
+        self.conn.execute(
+            f"INSERT INTO todos ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [to_column(column, todo.get(column)) for column in COLUMNS]
+        )
+        self.undo_history.record(("delete", todo["id"]))
+        self._commit()
+        self._notify("add", self.get_todo(todo["id"]))
+
+    def get_todo(self, todo_id):
+        """Get a single todo by id, or None"""
+        row = self.conn.execute("SELECT * FROM todos WHERE id = ?", (todo_id,)).fetchone()
+        return self._to_todo(row) if row else None
+
+    def get_todos(self, filter_completed=None, category=None, priority=None,
+                  sort_by="id", limit=None, after=None):
+        """Get filtered todos, ``limit`` at a time after the cursor ``after``"""
+        check_sort(sort_by)
+        clauses = []
+        params = []
+        if filter_completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(filter_completed))
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if priority:
+            clauses.append("priority = ?")
+            params.append(priority)
+        order = [expr.format(SORT_KEYS[sort_by][0]) for expr in SORT_SQL[sort_by]] + ["id"]
+        if after is not None:
+            value, todo_id = parse_cursor(after, sort_by)
+            bounds = [expr.format("?") for expr in SORT_SQL[sort_by]] + ["?"]
+            clauses.append(f"({', '.join(order)}) > ({', '.join(bounds)})")
+            for bound in bounds[:-1]:
+                params.extend([value] * bound.count("?"))
+            params.append(todo_id)
+        sql = "SELECT * FROM todos"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY " + ", ".join(order) + " LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [self._to_todo(row) for row in self.conn.execute(sql, params)]
+
+    def get_categories(self):
+        """Get list of all categories"""
+        rows = self.conn.execute("SELECT DISTINCT category FROM todos ORDER BY category")
+        return [row[0] for row in rows]
+
+    def search(self, query, limit=None):
+        """Full-text search over titles and descriptions, best matches first"""
+        words = tokenize(query)
+        if not words:
+            return []
+        rows = self.conn.execute(
+            "SELECT todos.* FROM todos_fts JOIN todos ON todos.id = todos_fts.rowid "
+            "WHERE todos_fts MATCH ? "
+            "ORDER BY bm25(todos_fts, 3.0, 1.0), todos.due_date IS NULL, todos.due_date, todos.id "
+            "LIMIT ?",
+            (" ".join(f'"{word}"*' for word in words), -1 if limit is None else limit)
+        )
+        return [self._to_todo(row) for row in rows]
+
+    def query(self, text, limit=None):
+        """Todos matching a query (see todo_query.Query), ordered by id.
+
+        The parsed terms become a WHERE clause, and SQLite picks the index.
+        """
+        clauses = []
+        params = []
+        for term in compile_query(text).terms:
+            kind, negate = term[0], term[-1]
+            if kind == "equals":
+                clause = f"{term[1]} = ?"
+                params.append(int(term[2]) if term[1] == "completed" else term[2])
+            elif kind == "due":
+                clause = f"(COALESCE(due_date, '') GLOB '{DATE_GLOB}' AND due_date {term[1]} ?)"
+                params.append(date.fromordinal(term[2]).isoformat())
+            else:
+                clause = "id IN (SELECT rowid FROM todos_fts WHERE todos_fts MATCH ?)"
+                params.append(f'"{term[1]}"*')
+            clauses.append(f"NOT {clause}" if negate else clause)
+        sql = "SELECT * FROM todos"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [self._to_todo(row) for row in self.conn.execute(sql, params)]
+
+    def _due(self, condition, day, limit=None):
+        rows = self.conn.execute(
+            f"SELECT * FROM todos WHERE due_date {condition} ? AND completed = 0 "
+            f"AND due_date GLOB '{DATE_GLOB}' ORDER BY due_date, id LIMIT ?",
+            (date.fromordinal(to_ordinal(day)).isoformat(), -1 if limit is None else limit)
+        )
+        return [self._to_todo(row) for row in rows]
+
+    def due_before(self, when):
+        """Incomplete todos due on or before the day of ``when``, soonest first"""
+        return self._due("<=", when)
+
+    def overdue(self, today=None):
+        """Incomplete todos whose due date has passed, most overdue first"""
+        return self._due("<", today or date.today())
+
+    def next_due(self, n, today=None):
+        """The ``n`` incomplete todos due soonest, from today on"""
+        return self._due(">=", today or date.today(), n)
+
+    def archive_completed(self, older_than_days=None, now=None):
+        """Move todos completed more than ``older_than_days`` ago to the archive"""
+        if older_than_days is None:
+            older_than_days = self.ARCHIVE_AFTER_DAYS
+        cutoff = ((now or datetime.now()) - timedelta(days=older_than_days)).strftime(TIMESTAMP_FORMAT)
+        rows = self.conn.execute(
+            "SELECT * FROM todos WHERE completed = 1 AND COALESCE(completed_date, '') < ?",
+            (cutoff,)
+        ).fetchall()
+        if not rows:
+            return 0
+        old = [self._to_todo(row) for row in rows]
+        self.archive.append(old)
+        with self.transaction():
+            for todo in old:
+                self.delete_todo(todo["id"])
+        self.undo_history.clear()
+        return len(old)
+
+    def history(self, since=None, until=None, category=None):
+        """Archived todos completed between ``since`` and ``until`` (YYYY-MM-DD)"""
+        return self.archive.history(since, until, category)
+
+    def stats(self):
+        """Counts per category and priority, completion rate and average
+        time to complete, aggregated by SQL"""
+        groups = {}
+        for column in ("category", "priority"):
+            rows = self.conn.execute(
+                f"SELECT lower({column}), COUNT(*), SUM(completed) FROM todos GROUP BY lower({column})")
+            groups[column] = {row[0]: [row[1], row[2]] for row in rows}
+        days = "CASE WHEN completed THEN julianday(completed_date) - julianday(created_date) END"
+        total, completed, duration_sum, duration_count = self.conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(completed), 0), "
+            f"SUM(CAST(ROUND(({days}) * 86400) AS INTEGER)), COUNT({days}) FROM todos"
+        ).fetchone()
+        return summarize(total, completed, duration_sum or 0, duration_count,
+                         groups["category"], groups["priority"])
+
+    def history_stats(self, since=None, until=None, category=None):
+        """The same stats, recomputed over archived todos"""
+        return compute_stats(self.history(since, until, category))
+
+    def update_todo(self, todo_id, title=None, description=None, due_date=None,
+                    priority=None, category=None):
+        """Update a todo item"""
+        fields = {
+            "title": title,
+            "description": description,
+            "due_date": due_date,
+            "priority": priority,
+            "category": category
+        }
+        fields = {name: value for name, value in fields.items() if value is not None}
+        if not fields:
+            return self.get_todo(todo_id) is not None
+        return self._set_fields(todo_id, fields)
+
+    def add_many(self, todos):
+        """Add several todos, given as dicts of add_todo arguments, in one commit"""
+        with self.transaction():
+            return [self.add_todo(**todo) for todo in todos]
+
+    def insert_many(self, todos):
+        """Add complete todos (e.g. imported rows) under new ids, in one commit"""
+        ids = []
+        with self.transaction():
+            for fields in todos:
+                values = {column: fields.get(column) for column in COLUMNS if column != "id"}
+                values["description"] = values["description"] or ""
+                values["created_date"] = values["created_date"] or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                values["priority"] = values["priority"] or "medium"
+                values["category"] = values["category"] or "general"
+                values["completed"] = to_column("completed", values["completed"])
+                values["depends_on"] = to_column("depends_on", values["depends_on"])
+                cursor = self.conn.execute(
+                    f"INSERT INTO todos ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                    list(values.values())
+                )
+                ids.append(cursor.lastrowid)
+                self.undo_history.record(("delete", cursor.lastrowid))
+                if self._listeners:
+                    self._notify("add", self.get_todo(cursor.lastrowid))
+        return ids
+
+    def update_many(self, updates):
+        """Apply several (todo_id, fields) updates in one commit"""
+        with self.transaction():
+            return sum(1 for todo_id, fields in updates if self.update_todo(todo_id, **fields))
+
+    def _prerequisites(self, todo_id):
+        row = self.conn.execute("SELECT depends_on FROM todos WHERE id = ?", (todo_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else []
+
+    def add_dependency(self, todo_id, depends_on):
+        """Make a todo wait for another one; raises ValueError on a cycle"""
+        if self.get_todo(todo_id) is None or self.get_todo(depends_on) is None:
+            return False
+        current = self._prerequisites(todo_id)
+        if depends_on in current:
+            return True
+        cycle = find_cycle(todo_id, depends_on, self._prerequisites)
+        if cycle:
+            raise ValueError("that would create a cycle: " + " -> ".join(f"#{i}" for i in cycle))
+        return self._set_fields(todo_id, {"depends_on": current + [depends_on]})
+
+    def remove_dependency(self, todo_id, depends_on):
+        """Stop a todo waiting for another one; returns False if it did not"""
+        current = self._prerequisites(todo_id)
+        if depends_on not in current:
+            return False
+        return self._set_fields(todo_id, {"depends_on": [i for i in current if i != depends_on]})
+
+    def ready(self):
+        """Open todos whose prerequisites are all completed, ordered by id"""
+        rows = self.conn.execute(
+            "SELECT * FROM todos WHERE completed = 0 AND NOT EXISTS ("
+            "SELECT 1 FROM json_each(COALESCE(todos.depends_on, '[]')) AS link "
+            "JOIN todos AS prerequisite ON prerequisite.id = link.value "
+            "WHERE prerequisite.completed = 0) ORDER BY id"
+        )
+        return [self._to_todo(row) for row in rows]
+
+    def blocked_by(self, todo_id):
+        """Open todos that ``todo_id`` still waits for"""
+        return [todo for todo in map(self.get_todo, self._prerequisites(todo_id))
+                if todo is not None and not todo["completed"]]
+
+    def critical_path(self):
+        """Longest chain of open todos each waiting for the one before it"""
+        links = {row[0]: json.loads(row[1]) if row[1] else []
+                 for row in self.conn.execute("SELECT id, depends_on FROM todos WHERE completed = 0")}
+        return [self.get_todo(todo_id) for todo_id in longest_chain(links, links.get)]
+
+    def undo(self):
+        """Revert the latest change; returns False if there is none"""
+        return self.undo_history.undo(self._revert)
+
+    def redo(self):
+        """Apply the latest undone change again; returns False if there is none"""
+        return self.undo_history.redo(self._revert)
+
+    def _revert(self, deltas):
+        """Apply inverse deltas newest first, in one commit"""
+        with self.transaction():
+            for delta in reversed(deltas):
+                if delta[0] == "add":
+                    if self.get_todo(delta[1]["id"]) is None:
+                        self._restore(delta[1])
+                elif delta[0] == "delete":
+                    self.delete_todo(delta[1])
+                else:
+                    self._set_fields(delta[1], delta[2])
+
+
+def migrate_from_json(json_file="todos.json", db_file="todos.db"):
+    """Copy every todo from a JSON todo list (snapshot + journal) into SQLite.
+
+    Ids are preserved. Returns the number of migrated todos.
+    """
+    from cli_todo import TodoList
+
+    source = TodoList(json_file)
+    if not (os.path.exists(json_file) or os.path.exists(source.journal.journal_file)):
+        raise FileNotFoundError(f"{json_file} does not exist")
+    target = SQLiteTodoList(db_file)
+    rows = [
+        tuple(to_column(c, todo.get(c)) for c in COLUMNS)
+        for todo in source.get_todos()
+    ]
+    with target.conn:
+        target.conn.executemany(
+            f"INSERT OR REPLACE INTO todos ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+            rows
+        )
+    source.close()
+    target.close()
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate todos.json into a SQLite database")
+    parser.add_argument("json_file", nargs="?", default="todos.json", help="Source JSON todo list")
+    parser.add_argument("db_file", nargs="?", default="todos.db", help="Target SQLite database")
+    args = parser.parse_args(argv)
+
+    count = migrate_from_json(args.json_file, args.db_file)
+    print(f"Migrated {count} todos from {args.json_file} to {args.db_file}")
+
+
+if __name__ == "__main__":
+    main()
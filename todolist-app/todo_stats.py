@@ -0,0 +1,142 @@
+from todo_index import TodoIndex
+from todo_record import TodoRecord, pack_timestamp
+
+try:
+    import numpy
+except ImportError:  # optional, only used by compute_stats()
+    numpy = None
+
+
+def completion_seconds(todo):
+    """Seconds from creation to completion, or None if unknown"""
+    if not todo["completed"]:
+        return None
+    if isinstance(todo, TodoRecord):
+        created, completed = todo.created, todo.completed_at
+    else:
+        created = pack_timestamp(todo["created_date"])
+        completed = pack_timestamp(todo["completed_date"])
+    if isinstance(created, int) and isinstance(completed, int):
+        return completed - created
+    return None
+
+
+def summarize(total, completed, duration_sum, duration_count, categories, priorities):
+    """The stats dict returned by TodoStats.summary() and compute_stats()"""
+    return {
+        "total": total,
+        "completed": completed,
+        "active": total - completed,
+        "completion_rate": completed / total if total else 0.0,
+        "avg_completion_seconds": duration_sum / duration_count if duration_count else None,
+        "categories": {name: {"total": counts[0], "completed": counts[1]}
+                       for name, counts in sorted(categories.items())},
+        "priorities": {name: {"total": counts[0], "completed": counts[1]}
+                       for name, counts in sorted(priorities.items())},
+    }
+
+
+class TodoStats:
+    """Aggregates over the todos, updated in O(1) on every change.
+
+    Keeps totals and completed counts overall, per category and per priority
+    (case-insensitively, like the filters), plus the sum and count of
+    creation-to-completion times for the average.
+    """
+
+    FIELDS = ("category", "priority", "completed", "created_date", "completed_date")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.total = 0
+        self.completed = 0
+        self.duration_sum = 0
+        self.duration_count = 0
+        # name -> [total, completed]
+        self.categories = {}
+        self.priorities = {}
+
+    def _count(self, todo, sign):
+        done = 1 if todo["completed"] else 0
+        self.total += sign
+        self.completed += sign * done
+        for counts, name in ((self.categories, TodoIndex.key(todo["category"])),
+                             (self.priorities, TodoIndex.key(todo["priority"]))):
+            entry = counts.setdefault(name, [0, 0])
+            entry[0] += sign
+            entry[1] += sign * done
+            if not entry[0]:
+                del counts[name]
+        seconds = completion_seconds(todo)
+        if seconds is not None:
+            self.duration_sum += sign * seconds
+            self.duration_count += sign
+
+    def add(self, todo):
+        self._count(todo, 1)
+
+    def remove(self, todo):
+        self._count(todo, -1)
+
+    def update(self, todo, old):
+        if any(field in old for field in self.FIELDS):
+            before = {field: old[field] if field in old else todo[field] for field in self.FIELDS}
+            self._count(before, -1)
+            self._count(todo, 1)
+
+    def summary(self):
+        return summarize(self.total, self.completed, self.duration_sum, self.duration_count,
+                         self.categories, self.priorities)
+
+
+def compute_stats(todos):
+    """Stats over any iterable of todos (e.g. the archive), from scratch.
+
+    Uses NumPy to aggregate when it is installed, which is much faster for
+    millions of records; otherwise falls back to a TodoStats pass.
+    """
+    if numpy is None:
+        stats = TodoStats()
+        for todo in todos:
+            stats.add(todo)
+        return stats.summary()
+
+    categories, priorities, completed, created_dates, completed_dates = [], [], [], [], []
+    for todo in todos:
+        categories.append(TodoIndex.key(todo["category"]))
+        priorities.append(TodoIndex.key(todo["priority"]))
+        completed.append(bool(todo["completed"]))
+        created_dates.append(todo["created_date"] or "NaT")
+        completed_dates.append(todo["completed_date"] or "NaT")
+    completed = numpy.array(completed, dtype=bool)
+    durations = parse_timestamps(completed_dates) - parse_timestamps(created_dates)
+    known = completed & ~numpy.isnat(durations)
+    seconds = durations[known].astype("int64")
+
+    def grouped(values):
+        if not values:
+            return {}
+        names, inverse = numpy.unique(numpy.array(values), return_inverse=True)
+        totals = numpy.bincount(inverse, minlength=len(names))
+        done = numpy.bincount(inverse, weights=completed, minlength=len(names))
+        return {str(name): [int(t), int(d)] for name, t, d in zip(names, totals, done)}
+
+    return summarize(len(completed), int(completed.sum()), int(seconds.sum()),
+                     len(seconds), grouped(categories), grouped(priorities))
+
+
+def parse_timestamps(values):
+    """"YYYY-MM-DD HH:MM:SS" strings -> datetime64 array, NaT where unparsable"""
+    try:
+        return numpy.array(values, dtype="datetime64[s]")
+    except ValueError:
+        # Some value is not a timestamp; parse one by one, keeping what we can
+        parsed = []
+        for value in values:
+            try:
+                parsed.append(numpy.datetime64(value, "s"))
+            except ValueError:
+                parsed.append(numpy.datetime64("NaT", "s"))
+        return numpy.array(parsed, dtype="datetime64[s]")
@@ -0,0 +1,73 @@
+import json
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",]"
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """Yield the objects of a top-level JSON array one at a time.
+
+    The file is read in ``chunk_size`` pieces, so memory use is bounded by
+    the chunk and the largest single element rather than the file size.
+    Raises ValueError if the file is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def refill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                refill()
+
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] != "[":
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos += 1
+        expect_value = True
+        while True:
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise ValueError(f"{path} ends in the middle of the array")
+            char = buffer[pos]
+            if char == "]":
+                return
+            if char == ",":
+                if expect_value:
+                    raise ValueError(f"unexpected ',' in {path}")
+                expect_value = True
+                pos += 1
+                continue
+            if not expect_value:
+                raise ValueError(f"missing ',' in {path}")
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                refill()
+                continue
+            if not eof and (end == len(buffer) or buffer[end] not in DELIMITERS):
+                # A number cut by the chunk boundary ("1.", "2e") decodes as
+                # a shorter one; read on until a delimiter follows the value
+                refill()
+                continue
+            pos = end
+            expect_value = False
+            yield value
+
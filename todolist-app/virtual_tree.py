@@ -0,0 +1,210 @@
+from bisect import bisect_left
+
+
+class VirtualTreeview:
+    """Drives a ttk.Treeview so that it only holds the rows on screen.
+
+    The full list of rows lives in ``self.rows``; the Treeview itself only
+    contains a small pool of items (one per visible row plus ``BUFFER``)
+    whose values are rewritten as the user scrolls. Rows are kept sorted by
+    row id so single rows can be inserted, updated or removed in place. Redraw cost and widget
+    memory therefore depend on the window height, not on the number of rows.
+    The scrollbar is driven from here instead of by the Treeview.
+
+    Because pooled items are reused for different rows, selection is tracked
+    by row id. A ``<<VirtualSelect>>`` event is generated whenever that
+    selection changes; listen to it instead of ``<<TreeviewSelect>>``, which
+    also fires when scrolling moves the selection between pooled items.
+    """
+
+    BUFFER = 2
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, tree, scrollbar, row_values):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+        self.rows = []
+        self.offset = 0
+        self.selected = {}
+        self.items = []
+        self.row_height = self.DEFAULT_ROW_HEIGHT
+
+        self.scrollbar.configure(command=self.yview)
+        self.tree.configure(yscrollcommand="")
+        self.tree.bind("<Configure>", lambda event: self.render(), add="+")
+        self.tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self.on_arrow(-1))
+        self.tree.bind("<Down>", lambda event: self.on_arrow(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.page_size()))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.page_size()))
+
+    @staticmethod
+    def row_id(row):
+        return row["id"]
+
+    def set_rows(self, rows):
+        """Replace the rows being displayed, keeping the scroll position"""
+        self.rows = rows
+        self.render()
+
+    def page_size(self):
+        """Number of rows that fit in the viewport"""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            height = int(self.tree.cget("height")) * self.row_height
+        header = 0
+        if self.items:
+            bbox = self.tree.bbox(self.items[0])
+            if bbox:
+                header = bbox[1]
+                self.row_height = bbox[3] or self.row_height
+        return max(1, (height - header) // self.row_height)
+
+    def render(self):
+        """Write the rows at the current offset into the item pool"""
+        visible = self.page_size()
+        self.offset = max(0, min(self.offset, len(self.rows) - visible))
+        window = self.rows[self.offset:self.offset + visible + self.BUFFER]
+
+        while len(self.items) < len(window):
+            self.items.append(self.tree.insert("", "end"))
+        while len(self.items) > len(window):
+            self.tree.delete(self.items.pop())
+
+        selection = []
+        for item, row in zip(self.items, window):
+            self.tree.item(item, values=self.row_values(row))
+            if self.row_id(row) in self.selected:
+                selection.append(item)
+        if set(selection) != set(self.tree.selection()):
+            self.tree.selection_set(selection)
+        self.tree.yview_moveto(0)
+        self.update_scrollbar(visible)
+
+    def update_scrollbar(self, visible=None):
+        if visible is None:
+            visible = self.page_size()
+        if self.rows:
+            first = self.offset / len(self.rows)
+            last = min(1.0, (self.offset + visible) / len(self.rows))
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def index_of(self, row_id):
+        """Position of a row in ``self.rows``, or None"""
+        index = bisect_left(self.rows, row_id, key=self.row_id)
+        if index < len(self.rows) and self.row_id(self.rows[index]) == row_id:
+            return index
+        return None
+
+    def in_window(self, index):
+        return self.offset <= index < self.offset + self.page_size() + self.BUFFER
+
+    def insert_row(self, row):
+        """Add one row; only re-renders if it lands on screen"""
+        index = bisect_left(self.rows, self.row_id(row), key=self.row_id)
+        self.rows.insert(index, row)
+        if index < self.offset:
+            # Keep the same rows on screen
+            self.offset += 1
+            self.update_scrollbar()
+        elif self.in_window(index):
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def update_row(self, row):
+        """Refresh one row in place"""
+        index = self.index_of(self.row_id(row))
+        if index is None:
+            return
+        self.rows[index] = row
+        if self.offset <= index < self.offset + len(self.items):
+            self.tree.item(self.items[index - self.offset], values=self.row_values(row))
+
+    def remove_row(self, row_id):
+        """Drop one row; only re-renders if it was on screen"""
+        index = self.index_of(row_id)
+        if index is None:
+            return
+        del self.rows[index]
+        self.selected.pop(row_id, None)
+        if index < self.offset:
+            self.offset -= 1
+            self.update_scrollbar()
+        elif self.in_window(index):
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def yview(self, *args):
+        """Scrollbar callback, following the Tk yview protocol"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.rows))
+            self.render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.page_size()
+            self.scroll(amount)
+
+    def scroll(self, amount):
+        self.offset += amount
+        self.render()
+        return "break"
+
+    def on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_arrow(self, step):
+        """Move the selection with the arrow keys, scrolling at the edges"""
+        index = self.visible_index_of_focus()
+        if index is None:
+            return None
+        target = self.offset + index + step
+        if not 0 <= target < len(self.rows):
+            return "break"
+        visible = self.page_size()
+        if target < self.offset:
+            self.offset = target
+        elif target >= self.offset + visible:
+            self.offset = target - visible + 1
+        self.selected = {self.row_id(self.rows[target]): True}
+        self.render()
+        self.tree.focus(self.items[target - self.offset])
+        self.tree.event_generate("<<VirtualSelect>>")
+        return "break"
+
+    def visible_index_of_focus(self):
+        focus = self.tree.focus()
+        if focus in self.items:
+            return self.items.index(focus)
+        return None
+
+    def on_select(self, event=None):
+        """Track the selection by row id so it survives scrolling"""
+        window = self.rows[self.offset:self.offset + len(self.items)]
+        on_screen = {self.row_id(row) for row in window}
+        selected_items = set(self.tree.selection())
+        selected = {row_id: True for row_id in self.selected if row_id not in on_screen}
+        for item, row in zip(self.items, window):
+            if item in selected_items:
+                selected[self.row_id(row)] = True
+        if selected.keys() != self.selected.keys():
+            self.selected = selected
+            self.tree.event_generate("<<VirtualSelect>>")
+
+    def selected_ids(self):
+        """Ids of the selected rows, including ones scrolled out of view"""
+        return list(self.selected)
+
+    def clear_selection(self):
+        self.selected = {}
+        self.tree.selection_set([])